@@ -0,0 +1,40 @@
+"""
+AuthService con 100k usuarios: búsqueda lineal en lista (anterior) frente al diccionario
+por nombre de usuario, y coste de autenticar con y sin la caché de verificación.
+
+Los usuarios masivos se crean con pocas iteraciones de PBKDF2 para que el montaje sea rápido;
+el usuario medido conserva el coste real de 100k iteraciones.
+
+Uso: python -m benchmarks.bench_auth
+"""
+import time
+from src.services.auth_service import AuthService
+from src.utils.password_hasher import PasswordHasher
+from .common import measure, print_table
+
+
+def main(users: int = 100_000):
+    service = AuthService(hasher=PasswordHasher(iterations=1))
+    for i in range(users):
+        service.create_user(f"user{i:06d}", "password123")
+    service.hasher = PasswordHasher()
+    service.create_user("target", "password123")
+    users_list = list(service.users_db.values())
+
+    rows = []
+    linear_ns = measure(lambda: next((u for u in users_list if u.username == "target"), None), 20, repeat=3)
+    dict_ns = measure(lambda: service.users_db.get("target"), 100_000)
+    rows.append(["búsqueda lineal", f"{linear_ns / 1000:,.1f}"])
+    rows.append(["búsqueda en dict", f"{dict_ns / 1000:,.3f}"])
+
+    start = time.perf_counter()
+    service.authenticate("target", "password123")
+    rows.append(["autenticación sin caché (PBKDF2)", f"{(time.perf_counter() - start) * 1e6:,.1f}"])
+    cached_ns = measure(lambda: service.authenticate("target", "password123"), 100_000)
+    rows.append(["autenticación con caché", f"{cached_ns / 1000:,.2f}"])
+
+    print_table(f"AuthService con {users:,} usuarios (µs/operación)", ["operación", "µs"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Comprobación de permisos con miles de reglas: any() por subcadena (anterior) frente a la
+tabla de permisos compilada en un trie.
+
+Uso: python -m benchmarks.bench_authorization
+"""
+from src.utils.permission_table import PermissionTable
+from .common import measure, print_table
+
+
+def main(iterations: int = 5_000):
+    rows = []
+    for rules in (10, 1_000, 10_000):
+        paths = [f"/tenants/t{i}/admin" for i in range(rules)]
+        table = PermissionTable()
+        for path in paths:
+            table.add_rule("*", path, "admin")
+        request_path = "/orders/12345/items"
+        legacy_ns = measure(lambda: any(admin_path in request_path for admin_path in paths), iterations // 10 or 1)
+        table_ns = measure(lambda: table.required_role("GET", request_path), iterations)
+        rows.append([rules, f"{legacy_ns:,.0f}", f"{table_ns:,.0f}"])
+    print_table("Decisión de autorización (ns/petición)", ["reglas", "subcadena", "trie"], rows)
+
+
+if __name__ == "__main__":
+    main()
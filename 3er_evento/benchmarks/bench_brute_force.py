@@ -0,0 +1,77 @@
+"""
+Ataque de relleno de credenciales desde muchas IPs distintas: memoria retenida y coste
+por petición del limitador con buffers circulares frente a las listas de datetime anteriores.
+
+Uso: python -m benchmarks.bench_brute_force
+"""
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from src.handlers.brute_force_protection_handler import BruteForceProtectionHandler
+from src.models.response import Response
+from src.enum.status_code import StatusCode
+from .common import PassThroughHandler, make_request, print_table
+
+
+class RejectAll(PassThroughHandler):
+    def handle(self, request):
+        return Response(status_code=StatusCode.UNAUTHORIZED, headers={}, body={})
+
+
+class LegacyLimiter:
+    # Réplica del registro anterior: una lista de datetime por IP sin expulsión de IPs inactivas
+    def __init__(self):
+        self.failed_attempts = {}
+        self.next_handler = RejectAll()
+
+    def handle(self, request):
+        response = self.next_handler.handle(request)
+        current_time = datetime.now()
+        attempts = self.failed_attempts.get(request.ip_address)
+        if attempts is not None:
+            cutoff_time = current_time - timedelta(hours=1)
+            self.failed_attempts[request.ip_address] = [t for t in attempts if t > cutoff_time]
+        self.failed_attempts.setdefault(request.ip_address, []).append(current_time)
+        cutoff_time = current_time - timedelta(minutes=15)
+        len([t for t in self.failed_attempts[request.ip_address] if t > cutoff_time])
+        return response
+
+
+def attack(make_handler, ips: int) -> tuple:
+    requests = [make_request(ip_address=f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}") for i in range(ips)]
+
+    handler = make_handler()
+    start = time.perf_counter()
+    for request in requests:
+        handler.handle(request)
+    elapsed = time.perf_counter() - start
+
+    # Segunda pasada con tracemalloc, que distorsiona los tiempos
+    handler = make_handler()
+    tracemalloc.start()
+    for request in requests:
+        handler.handle(request)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / ips * 1e9, retained / 1024 / 1024, handler
+
+
+def make_limiter() -> BruteForceProtectionHandler:
+    limiter = BruteForceProtectionHandler(max_tracked_ips=100_000)
+    limiter.set_next(RejectAll())
+    return limiter
+
+
+def main():
+    rows = []
+    for ips in (10_000, 100_000, 1_000_000):
+        legacy_ns, legacy_mib, _ = attack(LegacyLimiter, ips)
+        new_ns, new_mib, limiter = attack(make_limiter, ips)
+        rows.append([f"{ips:,}", f"{legacy_ns:.0f}", f"{legacy_mib:.1f}",
+                     f"{new_ns:.0f}", f"{new_mib:.1f}", f"{len(limiter.failed_attempts):,}"])
+    print_table("Ataque distribuido (ns/petición, MiB retenidos)",
+                ["IPs", "listas ns", "listas MiB", "anillos ns", "anillos MiB", "IPs seguidas"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Coste por inserción del LRUCache frente al dict con barrido O(n) que usaba CacheHandler.
+
+Uso: python -m benchmarks.bench_cache
+"""
+import time
+from datetime import datetime, timedelta
+from src.utils.lru_cache import LRUCache
+from .common import print_table
+
+
+def legacy_insert(cache: dict, key: str, cache_duration: int = 300):
+    cache[key] = {"response": key, "timestamp": datetime.now()}
+    if len(cache) > 100:
+        current_time = datetime.now()
+        expired = [k for k, item in cache.items()
+                   if current_time - item["timestamp"] > timedelta(seconds=cache_duration)]
+        for k in expired:
+            del cache[k]
+
+
+def time_inserts(insert, prefill: int, samples: int = 2000) -> float:
+    for i in range(prefill):
+        insert(f"pre-{i}")
+    start = time.perf_counter_ns()
+    for i in range(samples):
+        insert(f"new-{i}")
+    return (time.perf_counter_ns() - start) / samples
+
+
+def main():
+    rows = []
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        engine = LRUCache(max_entries=size)
+        engine_ns = time_inserts(lambda key: engine.set(key, key, size=64), size)
+        if size <= 10_000:
+            legacy = {}
+            legacy_ns = f"{time_inserts(lambda key: legacy_insert(legacy, key), size, samples=200):.0f}"
+        else:
+            legacy_ns = "-"
+        rows.append([size, legacy_ns, f"{engine_ns:.0f}", engine.evictions])
+    print_table("Inserción en caché llena (ns/operación)",
+                ["entradas", "dict+barrido", "LRUCache", "expulsiones"], rows)
+
+
+if __name__ == "__main__":
+    main()
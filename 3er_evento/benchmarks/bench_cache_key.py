@@ -0,0 +1,39 @@
+"""
+Coste de derivar la clave de caché: json.dumps + MD5 (anterior) frente a la clave actual
+(tupla sin cuerpo, digest de JSON canónico con cuerpo).
+
+Uso: python -m benchmarks.bench_cache_key
+"""
+import hashlib
+import json
+from src.handlers.cache_handler import CacheHandler
+from src.models.user import User
+from .common import make_request, measure, print_table
+
+
+def legacy_key(request) -> str:
+    cache_data = {
+        "method": request.method,
+        "path": request.path,
+        "body": request.body,
+        "user": request.authenticated_user.username if hasattr(request, 'authenticated_user') and request.authenticated_user else None
+    }
+    return hashlib.md5(json.dumps(cache_data, sort_keys=True).encode()).hexdigest()
+
+
+def main(iterations: int = 2000):
+    handler = CacheHandler()
+    rows = []
+    for fields in (0, 10, 100, 1000):
+        request = make_request(body={f"field{i}": f"value{i}" for i in range(fields)})
+        request.set_authenticated_user(User(username="user1", password="password123"))
+        legacy_ns = measure(lambda: legacy_key(request), iterations)
+        # La clave se usa directamente en un dict: se incluye el coste de hashearla
+        current_ns = measure(lambda: hash(handler._generate_cache_key(request)), iterations)
+        rows.append([fields, f"{legacy_ns:.0f}", f"{current_ns:.0f}", f"{legacy_ns / current_ns:.1f}x"])
+    print_table("Derivación de la clave de caché (ns/petición)",
+                ["campos", "json+md5", "actual", "mejora"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compresión del listado de administrador: CPU por respuesta frente a bytes ahorrados con gzip y zstd
+a varios niveles, y acierto de caché precomprimido frente a recomprimir en cada petición.
+
+Uso: python -m benchmarks.bench_compression
+"""
+import gzip
+from src.handlers.cache_handler import CacheHandler
+from src.handlers.compression_handler import CompressionHandler, zstandard
+from src.controllers.order import OrderController
+from src.models.user import User
+from src.utils.serialization import encode_body
+from .bench_serialization import build_service
+from .common import make_request, measure, print_table
+
+
+def codecs():
+    for level in (1, 6, 9):
+        yield f"gzip-{level}", lambda raw, level=level: gzip.compress(raw, compresslevel=level, mtime=0)
+    if zstandard is not None:
+        for level in (1, 3, 9, 19):
+            compressor = zstandard.ZstdCompressor(level=level)
+            yield f"zstd-{level}", compressor.compress
+
+
+def admin_request(accept_encoding: str):
+    request = make_request(path="/orders?limit=10000", headers={"Accept-Encoding": accept_encoding})
+    request.set_authenticated_user(User(username="admin", password="admin123", is_admin=True))
+    return request
+
+
+def main():
+    rows = []
+    for total in (100, 10_000):
+        service = build_service(total)
+        raw = encode_body(service._get_orders(admin_request("gzip"), limit=total).body)
+        iterations = max(5, 2_000 // total)
+        for name, compress in codecs():
+            compressed = compress(raw)
+            ns = measure(lambda: compress(raw), iterations)
+            rows.append([total, name, f"{len(raw):,}", f"{len(compressed):,}",
+                         f"{1 - len(compressed) / len(raw):.1%}", f"{ns / 1000:,.1f}",
+                         f"{len(raw) / ns * 1000:,.0f}"])
+    print_table("Compresión de GET /orders (administrador)",
+                ["órdenes", "códec", "bytes", "comprimido", "ahorro", "µs", "MB/s"], rows)
+    if zstandard is None:
+        print("zstandard no está instalado: sólo se mide gzip\n")
+
+    rows = []
+    for coding in ("gzip", "zstd") if zstandard is not None else ("gzip",):
+        request = admin_request(coding)
+        precompressed = CompressionHandler()
+        cache = CacheHandler()
+        precompressed.set_next(cache)
+        cache.set_next(OrderController(build_service(10_000)))
+        precompressed.handle(request)
+
+        recompress = CompressionHandler()
+        recompress.set_next(OrderController(build_service(10_000)))
+        hit_ns = measure(lambda: precompressed.handle(request), 20)
+        miss_ns = measure(lambda: recompress.handle(request), 5)
+        rows.append([coding, f"{miss_ns / 1000:,.1f}", f"{hit_ns / 1000:,.1f}"])
+    print_table("10.000 órdenes por petición (µs)",
+                ["códec", "sin caché: consultar y comprimir", "acierto precomprimido"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Cliente que sondea GET /orders de un administrador: acierto de caché serializado completo
+frente a If-None-Match con 304 sin cuerpo.
+
+Uso: python -m benchmarks.bench_conditional
+"""
+from src.handlers.cache_handler import CacheHandler
+from src.controllers.order import OrderController
+from src.models.user import User
+from src.utils.http_parser import serialize_response
+from .bench_serialization import build_service
+from .common import make_request, measure, print_table
+
+
+def main():
+    rows = []
+    for total in (10, 1_000, 10_000):
+        controller = OrderController(build_service(total))
+        handler = CacheHandler()
+        handler.subscribe(controller.order_service.invalidation)
+        handler.set_next(controller)
+
+        request = make_request(path=f"/orders?limit={total}")
+        request.set_authenticated_user(User(username="admin", password="admin123", is_admin=True))
+        first = handler.handle(request)
+        conditional = make_request(path=f"/orders?limit={total}",
+                                   headers={"If-None-Match": first.headers["ETag"]})
+        conditional.authenticated_user = request.authenticated_user
+
+        iterations = max(20, 20_000 // total)
+        full_bytes = len(serialize_response(handler.handle(request), keep_alive=True))
+        short_bytes = len(serialize_response(handler.handle(conditional), keep_alive=True))
+        full_ns = measure(lambda: serialize_response(handler.handle(request), keep_alive=True), iterations)
+        short_ns = measure(lambda: serialize_response(handler.handle(conditional), keep_alive=True), iterations)
+        rows.append([total, f"{full_ns / 1000:,.1f}", f"{short_ns / 1000:,.1f}", f"{full_bytes:,}", short_bytes])
+
+    print_table("Sondeo de GET /orders (µs/petición, bytes en el cable)",
+                ["órdenes", "200 desde caché", "304", "bytes 200", "bytes 304"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Sobrecoste de la instrumentación por handler: cadena sin instrumentar, instrumentada,
+con gancho de spans y de nuevo desactivada (debe igualar a la original).
+
+Uso: python -m benchmarks.bench_instrumentation
+"""
+import contextlib
+from src.models.server import Server
+from src.utils.instrumentation import Instrumentation
+from .common import ConstantController, PassThroughHandler, make_request, measure, print_table
+
+
+@contextlib.contextmanager
+def noop_span(name, attributes=None):
+    yield None
+
+
+def build_server(handlers: int) -> Server:
+    server = Server(compiled=True)
+    server.controller = ConstantController()
+    for _ in range(handlers):
+        server.add_middleware(PassThroughHandler())
+    return server
+
+
+def main(iterations: int = 50_000, rounds: int = 5):
+    request = make_request()
+    rows = []
+    for handlers in (1, 5, 10):
+        plain = build_server(handlers)
+        server = build_server(handlers)
+        server.enable_instrumentation()
+        enabled = measure(lambda: server.process_request(request), iterations // 5)
+        server.enable_instrumentation(Instrumentation(span_hook=noop_span))
+        with_spans = measure(lambda: server.process_request(request), iterations // 5)
+        server.disable_instrumentation()
+        # Rondas alternas: el ruido de la máquina afecta por igual a las dos cadenas
+        baseline = disabled = float("inf")
+        for _ in range(rounds):
+            baseline = min(baseline, measure(lambda: plain.process_request(request), iterations))
+            disabled = min(disabled, measure(lambda: server.process_request(request), iterations))
+        rows.append([handlers, f"{baseline:.0f}", f"{enabled:.0f}", f"{with_spans:.0f}",
+                     f"{disabled:.0f}", f"{(disabled - baseline) / baseline:+.1%}"])
+    print_table("Instrumentación de la cadena (ns/petición)",
+                ["handlers", "sin instrumentar", "activada", "con spans", "desactivada", "Δ desactivada"],
+                rows)
+
+
+if __name__ == "__main__":
+    main()
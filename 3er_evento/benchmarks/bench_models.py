@@ -0,0 +1,80 @@
+"""
+Memoria por objeto y coste de creación de los modelos con __slots__ frente a las mismas
+dataclasses con __dict__ por instancia (versión anterior).
+
+Uso: python -m benchmarks.bench_models
+"""
+import dataclasses
+import time
+import tracemalloc
+from datetime import datetime
+from src.enum.status_code import StatusCode
+from src.models.order import Order
+from src.models.request import Request
+from src.models.response import Response
+from src.models.user import User
+from .common import print_table
+
+
+def without_slots(model: type) -> type:
+    # Reconstruye el modelo como dataclass con __dict__, como era antes
+    fields = [(field.name, field.type, dataclasses.field(default=field.default, init=field.init))
+              if field.default is not dataclasses.MISSING else (field.name, field.type)
+              for field in dataclasses.fields(model)]
+    methods = {name: value for name, value in vars(model).items()
+               if callable(value) and not name.startswith("__") or name in ("__post_init__", "__setattr__")}
+    return dataclasses.make_dataclass(f"Legacy{model.__name__}", fields, namespace=methods)
+
+
+# Valores de campo compartidos: así se mide el objeto en sí y no sus campos
+CREATED_AT = datetime(2024, 1, 1)
+ITEMS = ["item1"]
+HEADERS = {"Content-Type": "application/json"}
+BODY = {}
+
+FACTORIES = {
+    Order: lambda cls: cls(id="1", user_id="user1", items=ITEMS, total=10.0, created_at=CREATED_AT),
+    User: lambda cls: cls(username="user1", password="x"),
+    Request: lambda cls: cls(method="GET", path="/orders", headers=HEADERS, body=BODY,
+                             ip_address="127.0.0.1", timestamp=CREATED_AT),
+    Response: lambda cls: cls(status_code=StatusCode.OK, headers=HEADERS, body=BODY),
+}
+
+
+def bytes_per_object(factory, cls, count: int) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [factory(cls) for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def ns_per_object(factory, cls, count: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        for _ in range(count):
+            factory(cls)
+        best = min(best, (time.perf_counter_ns() - start) / count)
+    return best
+
+
+def main(count: int = 100_000):
+    rows = []
+    for model, factory in FACTORIES.items():
+        legacy = without_slots(model)
+        rows.append([
+            model.__name__,
+            f"{bytes_per_object(factory, legacy, count):.0f}",
+            f"{bytes_per_object(factory, model, count):.0f}",
+            f"{ns_per_object(factory, legacy, count):.0f}",
+            f"{ns_per_object(factory, model, count):.0f}",
+        ])
+    print_table(f"Modelos: {count:,} instancias",
+                ["modelo", "B/obj __dict__", "B/obj slots", "ns/obj __dict__", "ns/obj slots"], rows)
+
+
+if __name__ == "__main__":
+    main()
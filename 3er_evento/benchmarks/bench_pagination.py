@@ -0,0 +1,53 @@
+"""
+Latencia y memoria de GET /orders paginado para un administrador con 1M de órdenes.
+
+Se mide la respuesta del servicio y su serialización completa con el mismo camino que la
+respuesta HTTP (serialization.encode_body), con el pico de memoria de tracemalloc.
+
+Uso: python -m benchmarks.bench_pagination [órdenes]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from src.models.order import Order
+from src.models.user import User
+from src.repositories.in_memory_order_repository import InMemoryOrderRepository
+from src.services.order_service import OrderService
+from src.utils.serialization import encode_body
+from .common import make_request, print_table
+
+
+def build_service(total: int) -> OrderService:
+    start = datetime(2024, 1, 1)
+    repository = InMemoryOrderRepository(
+        Order(id=str(i), user_id=f"user{i % 1000}", items=["item1", "item2"], total=10.0,
+              created_at=start + timedelta(milliseconds=i))
+        for i in range(total)
+    )
+    return OrderService(repository)
+
+
+def main(total: int = 1_000_000):
+    service = build_service(total)
+    request = make_request()
+    request.set_authenticated_user(User(username="admin", password="admin123", is_admin=True))
+
+    rows = []
+    for limit in (10, 100, 1_000, 10_000):
+        # Se pide una página a partir de un cursor, como haría un cliente que pagina
+        after = service._get_orders(request, limit=1)
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = service._get_orders(request, limit=limit, after=after.body["next_cursor"])
+        written = len(encode_body(response.body))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append([limit, f"{elapsed * 1000:.2f}", f"{peak / 1024:.0f}", f"{written / 1024:.0f}"])
+    print_table(f"GET /orders paginado sobre {total:,} órdenes",
+                ["límite", "ms", "pico KiB", "JSON KiB"], rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
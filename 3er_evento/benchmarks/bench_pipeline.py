@@ -0,0 +1,32 @@
+"""
+Compara el despacho enlazado (set_next + _pass_to_next por salto) con el pipeline compilado.
+
+Uso: python -m benchmarks.bench_pipeline
+"""
+from src.models.server import Server
+from .common import PassThroughHandler, ConstantController, make_request, measure, print_table
+
+
+def build_server(handlers: int, compiled: bool) -> Server:
+    server = Server(compiled=compiled)
+    server.controller = ConstantController()
+    for _ in range(handlers):
+        server.add_middleware(PassThroughHandler())
+    return server
+
+
+def main(iterations: int = 20000):
+    request = make_request()
+    rows = []
+    for handlers in (1, 5, 20):
+        linked = build_server(handlers, compiled=False)
+        compiled = build_server(handlers, compiled=True)
+        linked_ns = measure(lambda: linked.process_request(request), iterations)
+        compiled_ns = measure(lambda: compiled.process_request(request), iterations)
+        rows.append([handlers, f"{linked_ns:.0f}", f"{compiled_ns:.0f}", f"{linked_ns / compiled_ns:.2f}x"])
+    print_table("Despacho de la cadena (ns/petición)",
+                ["handlers", "enlazado", "compilado", "mejora"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Escalado del supervisor pre-fork: peticiones/s según el número de trabajadores.
+
+La carga la generan varios procesos cliente (uno por núcleo) para que el cliente no sea el cuello
+de botella. En una máquina con N núcleos el rendimiento debería crecer casi linealmente hasta N
+trabajadores, siempre que queden núcleos libres para los clientes.
+
+Uso: python -m benchmarks.bench_prefork [--reuse-port]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from src.models.prefork_server import PreforkServer
+from .common import print_table
+from .load_async import percentile
+from .load_http import build_server, run
+
+
+def client_process(port: int, connections: int, total: int, results):
+    throughput, latencies, errors = asyncio.run(run("127.0.0.1", port, "/orders", connections, total, 1))
+    results.put((len(latencies), latencies, errors))
+
+
+def measure_workers(workers: int, reuse_port: bool, clients: int, total: int) -> list:
+    supervisor = PreforkServer(build_server(), port=0, workers=workers, reuse_port=reuse_port)
+    supervisor.start()
+    try:
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client_process,
+                                             args=(supervisor.port, 16, total // clients, results))
+                     for _ in range(clients)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+    finally:
+        supervisor.stop()
+
+    requests = sum(count for count, _, _ in collected)
+    latencies = [latency for _, samples, _ in collected for latency in samples]
+    errors = sum(count for _, _, count in collected)
+    return [workers, f"{requests / elapsed:.0f}", f"{percentile(latencies, 0.50) * 1000:.2f}",
+            f"{percentile(latencies, 0.99) * 1000:.2f}", errors]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reuse-port", action="store_true")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--workers", default=None, help="niveles separados por comas, p. ej. 1,2,4")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    clients = max(1, cores // 2)
+    if args.workers:
+        levels = [int(level) for level in args.workers.split(",")]
+    else:
+        levels = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    rows = [measure_workers(workers, args.reuse_port, clients, args.requests) for workers in levels]
+    print_table(f"PreforkServer ({'SO_REUSEPORT' if args.reuse_port else 'accept compartido'}, "
+                f"{cores} núcleos, {clients} procesos cliente)",
+                ["trabajadores", "peticiones/s", "p50 ms", "p99 ms", "errores"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Coste de los caminos de rechazo (401/403/400/429): respuestas preconstruidas compartidas
+frente a construir un Response nuevo en cada petición (anterior).
+
+Uso: python -m benchmarks.bench_rejections
+"""
+import tracemalloc
+from src.enum.status_code import StatusCode
+from src.handlers.authentication_handler import AuthenticationHandler
+from src.handlers.authorization_handler import AuthorizationHandler
+from src.handlers.brute_force_protection_handler import BruteForceProtectionHandler
+from src.handlers.data_validation_handler import DataValidationHandler
+from src.models.response import Response
+from src.utils.extract_basic import ExtractBasic
+from .common import make_request, measure, print_table
+
+
+def fresh_unauthorized(request):
+    return Response(status_code=StatusCode.UNAUTHORIZED, headers={},
+                    body={"error": "Credenciales requeridas", "code": StatusCode.UNAUTHORIZED})
+
+
+def allocated_per_call(handle, request, calls: int = 10_000) -> float:
+    results = [None] * calls
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for index in range(calls):
+        results[index] = handle(request)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / calls
+
+
+def main(iterations: int = 100_000):
+    unauthenticated = make_request()
+    unauthenticated.user_credentials = None
+    brute_force = BruteForceProtectionHandler(clock=lambda: 1000.0)
+    brute_force.blocked_ips["10.0.0.1"] = 1100.0
+
+    cases = [
+        ("Response nuevo (anterior)", fresh_unauthorized, unauthenticated),
+        ("401 autenticación", AuthenticationHandler(ExtractBasic()).handle, unauthenticated),
+        ("401 autorización", AuthorizationHandler().handle, unauthenticated),
+        ("400 validación", DataValidationHandler().handle, make_request(headers={"X": "../etc"})),
+        ("429 fuerza bruta", brute_force.handle, make_request(ip_address="10.0.0.1")),
+    ]
+    rows = [[name, f"{measure(lambda: handle(request), iterations):.0f}",
+             f"{allocated_per_call(handle, request):.1f}"]
+            for name, handle, request in cases]
+    print_table("Peticiones rechazadas", ["camino", "ns/petición", "B retenidos/petición"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Despacho de rutas: comprobación lineal tipo if/elif frente al trie por método del Router.
+
+Uso: python -m benchmarks.bench_router
+"""
+from src.utils.router import Router
+from .common import measure, print_table
+
+
+def build_routes(resources: int) -> list:
+    routes = []
+    for i in range(resources):
+        routes.append(("GET", f"/resource{i}", f"list{i}"))
+        routes.append(("POST", f"/resource{i}", f"create{i}"))
+        routes.append(("GET", f"/resource{i}/{{item_id}}", f"get{i}"))
+        routes.append(("DELETE", f"/resource{i}/{{item_id}}", f"delete{i}"))
+    return routes
+
+
+def linear_match(routes: list, method: str, path: str):
+    for route_method, pattern, handler in routes:
+        if route_method != method:
+            continue
+        prefix = pattern.split("{")[0]
+        if "{" in pattern and path.startswith(prefix) and "/" not in path[len(prefix):]:
+            return handler, {"item_id": path.split("/")[-1]}
+        if path == pattern:
+            return handler, {}
+    return None
+
+
+def main(iterations: int = 20_000):
+    rows = []
+    for resources in (1, 25, 100):
+        routes = build_routes(resources)
+        router = Router()
+        for method, pattern, handler in routes:
+            router.add_route(method, pattern, handler)
+        # La última ruta registrada es el peor caso para la búsqueda lineal
+        path = f"/resource{resources - 1}/1234"
+        assert linear_match(routes, "DELETE", path) == router.match("DELETE", path)
+        linear_ns = measure(lambda: linear_match(routes, "DELETE", path), iterations)
+        trie_ns = measure(lambda: router.match("DELETE", path), iterations)
+        rows.append([len(routes), f"{linear_ns:.0f}", f"{trie_ns:.0f}"])
+    print_table("Despacho de rutas (ns/petición)", ["rutas", "lineal", "trie"], rows)
+
+
+if __name__ == "__main__":
+    main()
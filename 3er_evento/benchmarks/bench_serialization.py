@@ -0,0 +1,57 @@
+"""
+Serialización de respuestas de órdenes: json.dumps de dicts nuevos en cada petición (anterior)
+frente a bytes cacheados por orden empalmados, con la biblioteca estándar y con orjson.
+
+Uso: python -m benchmarks.bench_serialization
+"""
+import json
+from datetime import datetime, timedelta
+from src.models.order import Order
+from src.models.user import User
+from src.repositories.in_memory_order_repository import InMemoryOrderRepository
+from src.services.order_service import OrderService
+from src.utils import serialization
+from src.utils.pagination import json_default
+from .common import make_request, measure, print_table
+
+
+def build_service(total: int) -> OrderService:
+    start = datetime(2024, 1, 1)
+    return OrderService(InMemoryOrderRepository(
+        Order(id=str(i), user_id=f"user{i % 10}", items=["item1", "item2"], total=10.0,
+              created_at=start + timedelta(milliseconds=i))
+        for i in range(total)
+    ), max_page_size=10_000)
+
+
+def main():
+    request = make_request()
+    request.set_authenticated_user(User(username="admin", password="admin123", is_admin=True))
+    fast_json = serialization.orjson
+
+    rows = []
+    for total in (1, 100, 10_000):
+        service = build_service(total)
+        iterations = max(20, 20_000 // total)
+
+        def legacy():
+            body = service._get_orders(request, limit=total).body
+            return json.dumps({**body, "orders": [order.to_json() for order in body["orders"].orders]},
+                              default=json_default).encode()
+
+        def cached():
+            return serialization.encode_body(service._get_orders(request, limit=total).body)
+
+        legacy_ns = measure(legacy, iterations)
+        serialization.orjson = None
+        stdlib_ns = measure(cached, iterations)
+        serialization.orjson = fast_json
+        fast_ns = measure(cached, iterations) if fast_json is not None else float("nan")
+        rows.append([total, f"{legacy_ns / 1000:,.1f}", f"{stdlib_ns / 1000:,.1f}", f"{fast_ns / 1000:,.1f}"])
+
+    print_table("GET /orders serializado (µs/respuesta)",
+                ["órdenes", "dicts + json", "bytes cacheados", "bytes cacheados + orjson"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Rendimiento sostenido de creación de órdenes sobre SQLite (WAL): commit por inserción
+frente al commit agrupado del SQLiteOrderRepository, con distintos ajustes de durabilidad.
+
+Uso: python -m benchmarks.bench_sqlite
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from src.models.order import Order
+from src.repositories.sqlite_order_repository import SQLiteOrderRepository, SCHEMA, INSERT_ORDER
+from .common import print_table
+
+
+def new_order(user: int) -> Order:
+    return Order(id=str(uuid.uuid4()), user_id=f"user{user}", items=["item1", "item2"],
+                 total=10.0, created_at=datetime.now())
+
+
+def run_writers(add, writers: int, per_writer: int) -> float:
+    def work(worker: int):
+        for _ in range(per_writer):
+            add(new_order(worker))
+
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return writers * per_writer / (time.perf_counter() - start)
+
+
+def commit_per_insert(path: str, synchronous: str, writers: int, per_writer: int) -> float:
+    lock = threading.Lock()
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(f"PRAGMA synchronous={synchronous}")
+    connection.executescript(SCHEMA)
+    helper = SQLiteOrderRepository.__new__(SQLiteOrderRepository)
+
+    def add(order: Order):
+        with lock, connection:
+            connection.execute(INSERT_ORDER, helper._to_row(order))
+
+    rate = run_writers(add, writers, per_writer)
+    connection.close()
+    return rate
+
+
+def group_commit(path: str, synchronous: str, wait: bool, writers: int, per_writer: int) -> float:
+    repository = SQLiteOrderRepository(path, synchronous=synchronous, wait_for_commit=wait)
+    start = time.perf_counter()
+    run_writers(repository.add, writers, per_writer)
+    repository.flush()
+    rate = writers * per_writer / (time.perf_counter() - start)
+    repository.close()
+    return rate
+
+
+def main(writers: int = 16, per_writer: int = 2000):
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for synchronous in ("NORMAL", "FULL"):
+            path = os.path.join(directory, f"per-insert-{synchronous}.db")
+            rows.append(["commit por inserción", synchronous,
+                         f"{commit_per_insert(path, synchronous, writers, per_writer // 10):,.0f}"])
+            for wait in (True, False):
+                path = os.path.join(directory, f"group-{synchronous}-{wait}.db")
+                label = "agrupado, espera commit" if wait else "agrupado, write-behind"
+                rows.append([label, synchronous,
+                             f"{group_commit(path, synchronous, wait, writers, per_writer):,.0f}"])
+    print_table(f"Órdenes creadas por segundo ({writers} hilos escritores)",
+                ["modo", "synchronous", "órdenes/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Estampida sobre una clave fría: llamadas al controlador con y sin single-flight en CacheHandler.
+
+Uso: python -m benchmarks.bench_stampede
+"""
+import threading
+import time
+from typing import Optional
+from src.handlers.cache_handler import CacheHandler
+from src.interface.request_handler import RequestHandler
+from src.models.request import Request
+from src.models.response import Response
+from src.models.user import User
+from src.enum.status_code import StatusCode
+from .common import make_request, print_table
+
+
+class SlowController(RequestHandler):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def handle(self, request: Request) -> Optional[Response]:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return Response(status_code=StatusCode.OK, headers={}, body={"orders": []})
+
+
+class UncoalescedCacheHandler(CacheHandler):
+    # Comportamiento anterior: cada fallo llama al siguiente handler por su cuenta
+    def handle(self, request: Request) -> Optional[Response]:
+        cache_key = self._generate_cache_key(request)
+        cached = self._lookup(cache_key)
+        if cached is not None:
+            return cached[0]
+        return self._fetch(cache_key, request)
+
+
+def stampede(handler_class, clients: int, delay: float = 0.02):
+    handler = handler_class()
+    controller = SlowController(delay)
+    handler.set_next(controller)
+    request = make_request()
+    request.set_authenticated_user(User(username="user1", password="x"))
+    barrier = threading.Barrier(clients)
+
+    def client():
+        barrier.wait()
+        handler.handle(request)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return controller.calls, (time.perf_counter() - start) * 1000
+
+
+def main():
+    rows = []
+    for clients in (10, 100, 500):
+        legacy_calls, legacy_ms = stampede(UncoalescedCacheHandler, clients)
+        flight_calls, flight_ms = stampede(CacheHandler, clients)
+        rows.append([clients, legacy_calls, f"{legacy_ms:.1f}", flight_calls, f"{flight_ms:.1f}"])
+    print_table("Estampida sobre una clave fría (controlador de 20 ms)",
+                ["clientes", "llamadas sin", "ms sin", "llamadas con", "ms con"], rows)
+
+
+if __name__ == "__main__":
+    main()
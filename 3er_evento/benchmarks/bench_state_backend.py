@@ -0,0 +1,32 @@
+"""
+Coste de lectura (sin bloqueo) y escritura de los backends de estado compartido.
+
+Uso: python -m benchmarks.bench_state_backend
+"""
+import os
+import tempfile
+from src.backends.memory_backend import InMemoryStateBackend
+from src.backends.shared_memory_backend import SharedMemoryStateBackend
+from .common import measure, print_table
+
+
+def main(iterations: int = 50_000):
+    with tempfile.TemporaryDirectory() as directory:
+        backends = [
+            ("memoria local", InMemoryStateBackend()),
+            ("memoria compartida", SharedMemoryStateBackend(os.path.join(directory, "state.bin"))),
+        ]
+        rows = []
+        for name, backend in backends:
+            backend.set("bruteforce:blocked:10.0.0.1", b"123.0", ex=60)
+            hit_ns = measure(lambda: backend.get("bruteforce:blocked:10.0.0.1"), iterations)
+            miss_ns = measure(lambda: backend.get("bruteforce:blocked:10.0.0.2"), iterations)
+            set_ns = measure(lambda: backend.set("cache:key", b"x" * 512, ex=60), iterations)
+            incr_ns = measure(lambda: backend.incr("bruteforce:failed:10.0.0.3"), iterations)
+            rows.append([name, f"{hit_ns:.0f}", f"{miss_ns:.0f}", f"{set_ns:.0f}", f"{incr_ns:.0f}"])
+        print_table("Backends de estado (ns/operación)",
+                    ["backend", "get acierto", "get fallo", "set 512 B", "incr"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Rendimiento del escáner de contenido peligroso: diez re.search por valor (anterior)
+frente a una única alternancia precompilada, y coste de validar cuerpos anidados
+de pedidos masivos según su tamaño.
+
+Uso: python -m benchmarks.bench_validation
+"""
+import re
+import time
+from src.handlers.data_validation_handler import DataValidationHandler
+from .common import make_request, print_table
+
+
+LEGACY_PATTERNS = [
+    r'<script.*?>.*?</script>', r'javascript:', r'on\w+\s*=', r'SELECT.*FROM', r'DROP\s+TABLE',
+    r'INSERT\s+INTO', r'DELETE\s+FROM', r'\.\./.*', r'exec\(', r'eval\(',
+]
+
+CLEAN = [
+    "application/json", "Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/128.0",
+    "gzip, deflate, br", "es-CO,es;q=0.9,en;q=0.8", "keep-alive", "no-cache",
+    "Pizza Margherita con extra de queso", "Basic user1:password123",
+]
+
+MALICIOUS = [
+    "<script>alert('xss')</script>", "javascript:alert(document.cookie)", "<img onerror=steal()>",
+    "1 UNION SELECT password FROM users", "'; DROP TABLE orders; --", "../../../../etc/passwd",
+]
+
+
+def legacy_contains(content: str) -> bool:
+    content_lower = content.lower()
+    for pattern in LEGACY_PATTERNS:
+        if re.search(pattern, content_lower, re.IGNORECASE):
+            return True
+    return False
+
+
+def throughput(check, corpus: list, rounds: int = 2000) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for value in corpus:
+            check(value)
+    return rounds * len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    handler = DataValidationHandler()
+    rows = []
+    for name, corpus in (("limpio", CLEAN), ("malicioso", MALICIOUS), ("mixto", CLEAN * 9 + MALICIOUS)):
+        legacy = throughput(legacy_contains, corpus)
+        compiled = throughput(handler._contains_dangerous_content, corpus)
+        rows.append([name, f"{legacy:,.0f}", f"{compiled:,.0f}", f"{compiled / legacy:.1f}x"])
+    print_table("Valores escaneados por segundo",
+                ["corpus", "10 re.search", "alternancia", "mejora"], rows)
+
+    rows = []
+    bulk_handler = DataValidationHandler(max_items=10_000_000)
+    for items in (1_000, 10_000, 100_000):
+        body = {"items": [{"name": f"item {i}", "quantity": i, "notes": ["sin cebolla"]} for i in range(items)]}
+        request = make_request(method="POST", body=body)
+        start = time.perf_counter()
+        assert bulk_handler._scan_and_sanitize_body(request) is None
+        elapsed = time.perf_counter() - start
+        rows.append([items, f"{elapsed * 1000:.1f}", f"{elapsed / items * 1e9:.0f}"])
+    print_table("Validación de cuerpos anidados",
+                ["items", "ms", "ns/item"], rows)
+
+
+if __name__ == "__main__":
+    main()
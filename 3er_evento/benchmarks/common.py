@@ -0,0 +1,54 @@
+import time
+from datetime import datetime
+from typing import Callable, Optional
+from src.models.request import Request
+from src.models.response import Response
+from src.enum.status_code import StatusCode
+from src.interface.request_handler import RequestHandler
+
+
+class PassThroughHandler(RequestHandler):
+    def handle(self, request: Request) -> Optional[Response]:
+        return self._pass_to_next(request)
+
+
+class ConstantController(RequestHandler):
+    def __init__(self):
+        super().__init__()
+        self.response = Response(status_code=StatusCode.OK, headers={}, body={})
+
+    def handle(self, request: Request) -> Optional[Response]:
+        return self.response
+
+
+def make_request(method: str = "GET", path: str = "/orders", headers=None, body=None,
+                 ip_address: str = "127.0.0.1", username: str = "user1",
+                 password: str = "password123") -> Request:
+    return Request(
+        method=method,
+        path=path,
+        headers=headers if headers is not None else {},
+        body=body if body is not None else {},
+        ip_address=ip_address,
+        timestamp=datetime.now(),
+        user_credentials={"username": username, "password": password}
+    )
+
+
+def measure(fn: Callable[[], object], iterations: int, repeat: int = 5) -> float:
+    """Devuelve el mejor tiempo por iteración en nanosegundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / iterations)
+    return best
+
+
+def print_table(title: str, header: list, rows: list):
+    print(title)
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header] + rows:
+        print("  ".join(str(cell).rjust(width) for cell, width in zip(row, widths)))
+    print()
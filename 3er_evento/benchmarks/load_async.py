@@ -0,0 +1,66 @@
+"""
+Prueba de carga del AsyncServer: latencia p50/p99 según el número de peticiones en vuelo.
+
+Cada petición atraviesa un handler asíncrono que simula 5 ms de E/S y la cadena
+síncrona habitual (autenticación + controlador), que se ejecuta en el executor.
+
+Uso: python -m benchmarks.load_async
+"""
+import asyncio
+import time
+from src.models.async_server import AsyncServer
+from src.interface.async_request_handler import AsyncRequestHandler
+from src.handlers.authentication_handler import AuthenticationHandler
+from src.utils.extract_basic import ExtractBasic
+from .common import make_request, print_table
+
+
+class SimulatedIOHandler(AsyncRequestHandler):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    async def handle(self, request):
+        await asyncio.sleep(self.delay)
+        return await self._pass_to_next(request)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_level(server: AsyncServer, concurrency: int, total: int) -> tuple:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int):
+        async with semaphore:
+            request = make_request(method="GET", ip_address=f"10.0.{index % 250}.{index % 200}")
+            start = time.perf_counter()
+            await server.process_request(request)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, percentile(latencies, 0.50), percentile(latencies, 0.99)
+
+
+async def main():
+    server = AsyncServer(max_workers=64)
+    server.add_middleware(SimulatedIOHandler(0.005))
+    server.add_middleware(AuthenticationHandler(ExtractBasic()))
+
+    rows = []
+    for concurrency in (1, 10, 100, 1000, 5000):
+        total = max(200, concurrency * 4)
+        throughput, p50, p99 = await run_level(server, concurrency, total)
+        rows.append([concurrency, f"{throughput:.0f}", f"{p50 * 1000:.2f}", f"{p99 * 1000:.2f}"])
+    server.shutdown()
+    print_table("AsyncServer: latencia frente a concurrencia",
+                ["en vuelo", "peticiones/s", "p50 ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
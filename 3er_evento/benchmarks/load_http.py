@@ -0,0 +1,124 @@
+"""
+Generador de carga HTTP/1.1 para el HttpServer: peticiones/s y percentiles de latencia.
+
+Por defecto arranca en un proceso aparte la cadena de main.py detrás de HttpServer en un puerto
+libre de localhost; con --port se apunta a un servidor ya en marcha. Cada conexión es keep-alive
+y envía --pipeline peticiones seguidas antes de leer sus respuestas.
+
+Uso: python -m benchmarks.load_http [--connections 50] [--requests 20000] [--pipeline 1]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+from src.models.server import Server
+from src.models.http_server import HttpServer
+from src.handlers.authentication_handler import AuthenticationHandler
+from src.handlers.authorization_handler import AuthorizationHandler
+from src.handlers.data_validation_handler import DataValidationHandler
+from src.handlers.brute_force_protection_handler import BruteForceProtectionHandler
+from src.handlers.cache_handler import CacheHandler
+from src.utils.extract_basic import ExtractBasic
+from .common import print_table
+from .load_async import percentile
+
+
+def build_server() -> Server:
+    server = Server(compiled=True)
+    server.add_middleware(BruteForceProtectionHandler(max_attempts=3, block_duration=120))
+    server.add_middleware(AuthenticationHandler(ExtractBasic()))
+    server.add_middleware(AuthorizationHandler())
+    server.add_middleware(DataValidationHandler())
+    server.add_middleware(CacheHandler())
+    return server
+
+
+def serve(host: str, ports):
+    http_server = HttpServer(build_server(), host=host, port=0)
+
+    async def main():
+        await http_server.start()
+        ports.put(http_server.port)
+        await http_server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line[:15].lower() == b"content-length:":
+            length = int(line[15:])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host: str, port: int, payload: bytes, pipeline: int, batches: int,
+                 latencies: list, errors: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    for _ in range(batches):
+        start = time.perf_counter()
+        writer.write(payload * pipeline)
+        for _ in range(pipeline):
+            if await read_response(reader) >= 400:
+                errors.append(1)
+        # Todas las respuestas de un lote comparten la latencia de la última
+        latencies.extend([time.perf_counter() - start] * pipeline)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(host: str, port: int, path: str, connections: int, total: int, pipeline: int):
+    payload = (f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+               f"Authorization: Basic user1:password123\r\n\r\n").encode()
+    batches = max(1, total // (connections * pipeline))
+    latencies, errors = [], []
+
+    # Calienta la caché de verificación de contraseñas antes de medir
+    await client(host, port, payload, 1, 1, [], [])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, payload, pipeline, batches, latencies, errors)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--path", default="/orders")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--pipeline", type=int, default=1)
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        ports = multiprocessing.Queue()
+        process = multiprocessing.Process(target=serve, args=(args.host, ports), daemon=True)
+        process.start()
+        port = ports.get(timeout=10)
+
+    try:
+        throughput, latencies, errors = asyncio.run(
+            run(args.host, port, args.path, args.connections, args.requests, args.pipeline))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+
+    print_table(f"HttpServer: {args.connections} conexiones, pipeline {args.pipeline}",
+                ["peticiones", "peticiones/s", "p50 ms", "p90 ms", "p99 ms", "errores"],
+                [[len(latencies), f"{throughput:.0f}",
+                  f"{percentile(latencies, 0.50) * 1000:.2f}",
+                  f"{percentile(latencies, 0.90) * 1000:.2f}",
+                  f"{percentile(latencies, 0.99) * 1000:.2f}", errors]])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from src.models.server import Server
+from src.models.http_server import HttpServer
 from src.handlers.authentication_handler import AuthenticationHandler
 from src.handlers.authorization_handler import AuthorizationHandler
 from src.handlers.data_validation_handler import DataValidationHandler
@@ -17,4 +18,6 @@ if __name__ == "__main__":
     server.add_middleware(AuthenticationHandler(ExtractBasic()))
     server.add_middleware(AuthorizationHandler())
     server.add_middleware(DataValidationHandler())
-    server.add_middleware(CacheHandler())
\ No newline at end of file
+    server.add_middleware(CacheHandler())
+
+    HttpServer(server, host="127.0.0.1", port=8080).run()
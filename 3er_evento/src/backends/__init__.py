@@ -0,0 +1,2 @@
+from .memory_backend import InMemoryStateBackend
+from .shared_memory_backend import SharedMemoryStateBackend
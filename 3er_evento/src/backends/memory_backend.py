@@ -0,0 +1,53 @@
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from ..interface.state_backend import StateBackend
+
+
+class InMemoryStateBackend(StateBackend):
+    # Sustituto local de Redis: mismo contrato, estado sólo dentro del proceso
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self.clock():
+            with self._lock:
+                if self._data.get(key) is entry:
+                    del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None, nx: bool = False) -> bool:
+        expires_at = self.clock() + ex if ex else None
+        with self._lock:
+            if nx and self.get(key) is not None:
+                return False
+            self._data[key] = (value, expires_at)
+        return True
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            return 1 if self._data.pop(key, None) is not None else 0
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value = self.get(key)
+            expires_at = self._data[key][1] if value is not None else None
+            count = int(value or 0) + amount
+            self._data[key] = (str(count).encode(), expires_at)
+            return count
+
+    def expire(self, key: str, seconds: float) -> bool:
+        with self._lock:
+            value = self.get(key)
+            if value is None:
+                return False
+            self._data[key] = (value, self.clock() + seconds)
+            return True
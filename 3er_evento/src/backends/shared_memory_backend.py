@@ -0,0 +1,194 @@
+"""
+Estado compartido entre procesos sobre un fichero mapeado en memoria.
+
+Tabla hash de ranuras de tamaño fijo con sondeo lineal acotado. Cada ranura lleva un
+contador de versión (seqlock): los escritores lo dejan impar mientras escriben, y los
+lectores releen sin bloquear hasta ver la misma versión par antes y después de copiar.
+Las escrituras se serializan con lockf sobre el rango de ranuras afectado.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from ..interface.state_backend import StateBackend
+
+
+# versión, digest de la clave, expiración (0 = sin expiración), longitud del valor
+SLOT_HEADER = struct.Struct("<I16sdI")
+SLOT_VERSION = struct.Struct("<I")
+EMPTY_DIGEST = bytes(16)
+MAX_READ_RETRIES = 1000
+
+# Fracción de ranuras reservada por prefijo de clave. La expulsión por caducidad más próxima no cruza
+# particiones: el tráfico de caché no puede desalojar los bloqueos de fuerza bruta
+DEFAULT_PARTITIONS: Dict[str, float] = {"bruteforce:": 0.125}
+
+
+class SharedMemoryStateBackend(StateBackend):
+
+    def __init__(self, path: str, slots: int = 65536, value_size: int = 4096, probe_length: int = 8,
+                 clock: Callable[[], float] = time.time,
+                 partitions: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.slots = slots
+        self.value_size = value_size
+        self.probe_length = min(probe_length, slots)
+        self.clock = clock
+        # Todos los procesos que comparten el fichero deben usar las mismas particiones
+        self._partitions: List[Tuple[str, int, int]] = []
+        start = 0
+        for prefix, fraction in (DEFAULT_PARTITIONS if partitions is None else partitions).items():
+            size = max(self.probe_length, int(slots * fraction))
+            self._partitions.append((prefix, start, size))
+            start += size
+        if slots - start < self.probe_length:
+            raise ValueError("Las particiones no dejan ranuras para el resto de claves")
+        self._default_partition = (start, slots - start)
+        self.slot_size = (SLOT_HEADER.size + value_size + 7) // 8 * 8
+
+        size = slots * self.slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._thread_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        digest, window = self._locate(key)
+        now = self.clock()
+        for index in window:
+            slot = self._read_slot(index, digest)
+            if slot is not None:
+                expires_at, value = slot
+                return value if not expires_at or expires_at > now else None
+        return None
+
+    def set(self, key: str, value: bytes, ex: Optional[float] = None, nx: bool = False) -> bool:
+        if len(value) > self.value_size:
+            return False
+
+        digest, window = self._locate(key)
+        now = self.clock()
+        with self._write_lock(window):
+            if nx and self._find_live(digest, window, now)[1] is not None:
+                return False
+            index, _ = self._find_for_write(digest, window, now)
+            self._write_slot(index, digest, now + ex if ex else 0.0, value)
+        return True
+
+    def delete(self, key: str) -> int:
+        digest, window = self._locate(key)
+        with self._write_lock(window):
+            index, live = self._find_live(digest, window, self.clock())
+            if live is None:
+                return 0
+            self._write_slot(index, EMPTY_DIGEST, 0.0, b"")
+            return 1
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        digest, window = self._locate(key)
+        now = self.clock()
+        with self._write_lock(window):
+            index, live = self._find_live(digest, window, now)
+            if live is None:
+                index, _ = self._find_for_write(digest, window, now)
+                expires_at, count = 0.0, amount
+            else:
+                expires_at, value = live
+                count = int(value or 0) + amount
+            self._write_slot(index, digest, expires_at, str(count).encode())
+            return count
+
+    def expire(self, key: str, seconds: float) -> bool:
+        digest, window = self._locate(key)
+        now = self.clock()
+        with self._write_lock(window):
+            index, live = self._find_live(digest, window, now)
+            if live is None:
+                return False
+            self._write_slot(index, digest, now + seconds, live[1])
+            return True
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    def _digest(self, key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    def _locate(self, key: str) -> Tuple[bytes, range]:
+        digest = self._digest(key)
+        partition_start, partition_size = self._default_partition
+        for prefix, start, size in self._partitions:
+            if key.startswith(prefix):
+                partition_start, partition_size = start, size
+                break
+        # La ventana de sondeo nunca da la vuelta: así se puede bloquear como un único rango
+        start = partition_start + int.from_bytes(digest[:8], "little") % (partition_size - self.probe_length + 1)
+        return digest, range(start, start + self.probe_length)
+
+    def _read_slot(self, index: int, digest: bytes) -> Optional[Tuple[float, bytes]]:
+        # Lectura sin bloqueo: se reintenta si un escritor modificó la ranura mientras se copiaba
+        offset = index * self.slot_size
+        for _ in range(MAX_READ_RETRIES):
+            version, slot_digest, expires_at, length = SLOT_HEADER.unpack_from(self._map, offset)
+            if version & 1:
+                continue
+            if slot_digest != digest:
+                return None
+            start = offset + SLOT_HEADER.size
+            value = self._map[start:start + min(length, self.value_size)]
+            if SLOT_VERSION.unpack_from(self._map, offset)[0] == version:
+                return expires_at, value
+        return None
+
+    def _find_live(self, digest: bytes, window: range,
+                   now: float) -> Tuple[int, Optional[Tuple[float, bytes]]]:
+        for index in window:
+            slot = self._read_slot(index, digest)
+            if slot is not None:
+                expires_at, _ = slot
+                if not expires_at or expires_at > now:
+                    return index, slot
+                return index, None
+        return -1, None
+
+    def _find_for_write(self, digest: bytes, window: range, now: float) -> Tuple[int, bool]:
+        # Misma clave, ranura libre o caducada; si no hay, se expulsa la que caduca antes
+        free, victim, victim_expiry = None, None, float("inf")
+        for index in window:
+            _, slot_digest, expires_at, _ = SLOT_HEADER.unpack_from(self._map, index * self.slot_size)
+            if slot_digest == digest:
+                return index, True
+            if free is None and (slot_digest == EMPTY_DIGEST or (expires_at and expires_at <= now)):
+                free = index
+            effective_expiry = expires_at or float("inf")
+            if victim is None or effective_expiry < victim_expiry:
+                victim, victim_expiry = index, effective_expiry
+        return (free if free is not None else victim), False
+
+    def _write_slot(self, index: int, digest: bytes, expires_at: float, value: bytes):
+        offset = index * self.slot_size
+        version = SLOT_VERSION.unpack_from(self._map, offset)[0]
+        writing = (version + 1) & 0xFFFFFFFF
+        SLOT_VERSION.pack_into(self._map, offset, writing)
+        SLOT_HEADER.pack_into(self._map, offset, writing, digest, expires_at, len(value))
+        start = offset + SLOT_HEADER.size
+        self._map[start:start + len(value)] = value
+        SLOT_VERSION.pack_into(self._map, offset, (writing + 1) & 0xFFFFFFFF)
+
+    @contextmanager
+    def _write_lock(self, window: range) -> Iterator[None]:
+        # lockf excluye a otros procesos sobre las ranuras de la ventana; el lock local, a otros hilos
+        start, length = window.start * self.slot_size, len(window) * self.slot_size
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, start)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
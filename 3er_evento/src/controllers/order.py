@@ -1,60 +1,41 @@
-from typing import Optional
+from typing import Optional, Callable, Dict, Tuple
+from urllib.parse import parse_qs
 from ..models.request import Request
 from ..models.response import Response
 from ..enum.status_code import StatusCode
 from ..services.order_service import OrderService
 from ..interface.request_handler import RequestHandler
+from ..utils.router import Router, route
 
 
 class OrderController(RequestHandler):
     order_service: OrderService
 
-    def __init__(self):
+    def __init__(self, order_service: Optional[OrderService] = None):
         super().__init__()
-        self.order_service = OrderService()
+        self.order_service = order_service if order_service is not None else OrderService()
+        self.router = Router()
+        self.router.register(self)
 
-    def match(self, request: str, path: str) -> callable:
-        if request == "POST" and path == "/orders":
-            return self.order_service._create_order
-        elif request == "GET" and path == "/orders":
-            return self.order_service._get_orders
-        elif request == "GET" and path.startswith("/orders/"):
-            return self.order_service._get_order
-        elif request == "DELETE" and path.startswith("/orders/"):
-            return lambda: self.order_service._delete_order
-        else:
-            return None
+    def match(self, method: str, path: str) -> Optional[Tuple[Callable, Dict[str, str]]]:
+        return self.router.match(method, path.partition("?")[0])
 
     def handle(self, request: Request) -> Optional[Response]:
 
-        request_method = request.method.upper()
-
-        path = request.path
+        path, _, query = request.path.partition("?")
 
         try:
-            if request_method == "POST" and path == "/orders":
-                items = request.body.get("items", [])
-                total = request.body.get("total", 0.0)
-                return self.order_service._create_order(request, items, total)
-            
-            elif request_method == "GET" and path == "/orders":
-                return self.order_service._get_orders(request)
-            
-            elif request_method == "GET" and path.startswith("/orders/"):
-                order_id = path.split("/")[-1]
-                return self.order_service._get_order(request, order_id)
-            
-            elif request_method == "DELETE" and path.startswith("/orders/"):
-                # Extract order ID from path
-                order_id = path.split("/")[-1]
-                return self.order_service._delete_order(request, order_id)
-            
-            return Response(
-                status_code=StatusCode.NOT_FOUND,
-                headers={},
-                body={"error": "Endpoint no encontrado",
-                      "code": StatusCode.NOT_FOUND}
-            )
+            matched = self.router.match(request.method, path)
+            if matched is None:
+                return Response(
+                    status_code=StatusCode.NOT_FOUND,
+                    headers={},
+                    body={"error": "Endpoint no encontrado",
+                          "code": StatusCode.NOT_FOUND}
+                )
+
+            endpoint, params = matched
+            return endpoint(request, query, **params)
 
         except Exception as e:
             return Response(
@@ -63,3 +44,32 @@ class OrderController(RequestHandler):
                 body={"error": "Error interno del servidor",
                       "code": StatusCode.SERVER_ERROR}
             )
+
+    @route("POST", "/orders")
+    def create_order(self, request: Request, query: str) -> Response:
+        items = request.body.get("items", [])
+        total = request.body.get("total", 0.0)
+        return self.order_service._create_order(request, items, total)
+
+    @route("GET", "/orders")
+    def list_orders(self, request: Request, query: str) -> Response:
+        params = parse_qs(query)
+        limit = params.get("limit", [None])[0]
+        after = params.get("after", [None])[0]
+        if limit is not None and not (limit.isascii() and limit.isdigit()):
+            return Response(
+                status_code=StatusCode.BAD_REQUEST,
+                headers={},
+                body={"error": "El límite debe ser un entero",
+                      "code": "INVALID_LIMIT"}
+            )
+        return self.order_service._get_orders(
+            request, int(limit) if limit is not None else None, after)
+
+    @route("GET", "/orders/{order_id}")
+    def get_order(self, request: Request, query: str, order_id: str) -> Response:
+        return self.order_service._get_order(request, order_id)
+
+    @route("DELETE", "/orders/{order_id}")
+    def delete_order(self, request: Request, query: str, order_id: str) -> Response:
+        return self.order_service._delete_order(request, order_id)
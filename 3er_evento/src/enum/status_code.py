@@ -4,6 +4,7 @@ class StatusCode(Enum):
     OK = 200
     CREATED = 201
     SUCCESS = 200
+    NOT_MODIFIED = 304
     NOT_FOUND = 404
     SERVER_ERROR = 500
     UNAUTHORIZED = 401
@@ -11,4 +12,5 @@ class StatusCode(Enum):
     BAD_REQUEST = 400
     NO_RESPONSE = 0
     TOO_MANY_REQUESTS = 429
-    CONFLICT = 409
\ No newline at end of file
+    CONFLICT = 409
+    PAYLOAD_TOO_LARGE = 413
\ No newline at end of file
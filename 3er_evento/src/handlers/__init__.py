@@ -2,4 +2,5 @@ from .authentication_handler import AuthenticationHandler
 from .authorization_handler import AuthorizationHandler
 from .brute_force_protection_handler import BruteForceProtectionHandler
 from .cache_handler import CacheHandler
+from .compression_handler import CompressionHandler
 from .data_validation_handler import DataValidationHandler
\ No newline at end of file
@@ -1,12 +1,23 @@
 from typing import Optional, Dict
 from ..models.request import Request
-from ..models.response import Response
+from ..models.response import Response, shared_response
 from ..services.auth_service import AuthService
 from ..enum.status_code import StatusCode
 from ..interface.request_handler import RequestHandler
 from ..interface.extraction_method import ExtractionMethod
 
 
+CREDENTIALS_REQUIRED = shared_response(
+    StatusCode.UNAUTHORIZED,
+    {"error": "Credenciales requeridas", "code": StatusCode.UNAUTHORIZED}
+)
+
+INVALID_CREDENTIALS = shared_response(
+    StatusCode.UNAUTHORIZED,
+    {"error": "Credenciales inválidas", "code": StatusCode.UNAUTHORIZED}
+)
+
+
 class AuthenticationHandler(RequestHandler):
     extraction_method: ExtractionMethod
 
@@ -18,16 +29,11 @@ class AuthenticationHandler(RequestHandler):
     def handle(self, request: Request) -> Optional[Response]:
         credentials = self.extraction_method.extract(request)
         
-        if not credentials and hasattr(request, 'user_credentials') and request.user_credentials:
+        if not credentials and request.user_credentials:
             credentials = request.user_credentials
 
         if not credentials:
-            return Response(
-                status_code=StatusCode.UNAUTHORIZED,
-                headers={},
-                body={"error": "Credenciales requeridas",
-                      "code": StatusCode.UNAUTHORIZED}
-            )
+            return CREDENTIALS_REQUIRED
 
         user = self.auth_service.authenticate(
             credentials.get("username"),
@@ -35,12 +41,7 @@ class AuthenticationHandler(RequestHandler):
         )
 
         if not user:
-            return Response(
-                status_code=StatusCode.UNAUTHORIZED,
-                headers={},
-                body={"error": "Credenciales inválidas",
-                      "code": StatusCode.UNAUTHORIZED}
-            )
+            return INVALID_CREDENTIALS
 
         request.set_authenticated_user(user)
 
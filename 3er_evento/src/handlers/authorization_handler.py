@@ -1,12 +1,29 @@
-from typing import Optional
+from typing import Optional, Iterable, FrozenSet, Tuple
 from ..interface.request_handler import RequestHandler
 from ..models.request import Request
-from ..models.response import Response
+from ..models.response import Response, shared_response
+from ..models.user import User
 from ..enum.status_code import StatusCode
+from ..utils.permission_table import PermissionTable
+
+
+NOT_AUTHENTICATED = shared_response(
+    StatusCode.UNAUTHORIZED,
+    {"error": "Usuario no autenticado", "code": StatusCode.UNAUTHORIZED}
+)
+
+INSUFFICIENT_PERMISSIONS = shared_response(
+    StatusCode.FORBIDDEN,
+    {"error": "Permisos insuficientes", "code": StatusCode.FORBIDDEN}
+)
+
+USER_ROLES = frozenset({"user"})
+ADMIN_ROLES = frozenset({"user", "admin"})
 
 
 class AuthorizationHandler(RequestHandler):
-    def __init__(self, routes_requiring_admin = None):
+    def __init__(self, routes_requiring_admin = None,
+                 rules: Iterable[Tuple[str, str, Optional[str]]] = ()):
         super().__init__()
         if routes_requiring_admin is None:
             self.admin_required_paths = [
@@ -17,30 +34,31 @@ class AuthorizationHandler(RequestHandler):
             ]
         else:
             self.admin_required_paths = routes_requiring_admin
+        
+        # Reglas (método, patrón, rol): "*" vale como método o como segmento del patrón
+        self.permissions = PermissionTable()
+        self.permissions.add_rule("DELETE", "/", "admin")
+        for admin_path in self.admin_required_paths:
+            self.permissions.add_rule("*", admin_path, "admin")
+        for method, pattern, role in rules:
+            self.permissions.add_rule(method, pattern, role)
     
     def handle(self, request: Request) -> Optional[Response]:
-        if not hasattr(request, 'authenticated_user') or not request.authenticated_user:
-            return Response(
-                status_code=StatusCode.UNAUTHORIZED,
-                headers={},
-                body={"error": "Usuario no autenticado", "code": StatusCode.UNAUTHORIZED}
-            )
+        if not request.authenticated_user:
+            return NOT_AUTHENTICATED
         
         user = request.authenticated_user
         
-        if self._requires_admin_permission(request.path, request.method):
-            if not user.is_admin:
-                return Response(
-                    status_code=StatusCode.FORBIDDEN,
-                    headers={},
-                    body={"error": "Permisos insuficientes", "code": StatusCode.FORBIDDEN}
-                )
+        required_role = self.permissions.required_role(request.method, request.path)
+        if required_role is not None:
+            if required_role not in self._roles_of(user):
+                return INSUFFICIENT_PERMISSIONS
         
         
         return self._pass_to_next(request)
     
     def _requires_admin_permission(self, path: str, method: str) -> bool:
-        if method.upper() == "DELETE":
-            return True
-            
-        return any(admin_path in path for admin_path in self.admin_required_paths)
+        return self.permissions.required_role(method, path) == "admin"
+    
+    def _roles_of(self, user: User) -> FrozenSet[str]:
+        return ADMIN_ROLES if user.is_admin else USER_ROLES
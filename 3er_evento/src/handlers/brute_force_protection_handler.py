@@ -1,37 +1,75 @@
-from typing import Optional, Dict
-from datetime import datetime, timedelta
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
 from ..interface.request_handler import RequestHandler
 from ..models.request import Request
-from ..models.response import Response
+from ..models.response import Response, shared_response
 from ..enum.status_code import StatusCode
+from ..interface.state_backend import StateBackend
+
+
+class AttemptRing:
+    # Últimos max_attempts fallos de una IP en un buffer circular de marcas monotónicas
+    __slots__ = ("times", "position")
+
+    def __init__(self, size: int):
+        self.times = array("d", [float("-inf")]) * size
+        self.position = 0
+
+    def record(self, timestamp: float):
+        self.times[self.position] = timestamp
+        self.position = (self.position + 1) % len(self.times)
+
+    def oldest(self) -> float:
+        return self.times[self.position]
+
+    def newest(self) -> float:
+        return self.times[self.position - 1]
 
 
 class BruteForceProtectionHandler(RequestHandler):
     
-    def __init__(self, max_attempts: int = 5, block_duration: int = 300):
+    def __init__(self, max_attempts: int = 5, block_duration: int = 300, attempt_window: int = 900,
+                 max_tracked_ips: int = 100000, clock: Callable[[], float] = time.monotonic,
+                 state_backend: Optional[StateBackend] = None,
+                 wall_clock: Callable[[], float] = time.time):
         super().__init__()
         self.max_attempts = max_attempts
         self.block_duration = block_duration
-        self.failed_attempts: Dict[str, list] = {} 
-        self.blocked_ips: Dict[str, datetime] = {} 
+        self.attempt_window = attempt_window
+        self.max_tracked_ips = max_tracked_ips
+        self.clock = clock
+        # Con un backend compartido, todos los workers ven los mismos contadores y bloqueos
+        self.state_backend = state_backend
+        # Lo que se guarda en el backend usa reloj de pared: los monotónicos no se comparan entre hosts
+        self.wall_clock = wall_clock
+        # Ambos diccionarios quedan ordenados por antigüedad: el barrido sólo mira el principio
+        self.failed_attempts: "OrderedDict[str, AttemptRing]" = OrderedDict()
+        self.blocked_ips: "OrderedDict[str, float]" = OrderedDict()
+        # Respuestas 429 preconstruidas por segundos restantes; como mucho block_duration + 1
+        self._blocked_responses: Dict[int, Response] = {}
+        # Las escrituras en los diccionarios van bajo el cerrojo; la consulta de bloqueo no lo toma
+        self._lock = threading.Lock()
     
     def handle(self, request: Request) -> Optional[Response]:
         ip_address = request.ip_address
-        current_time = datetime.now()
+        current_time = self.clock()
         
-        if self._is_ip_blocked(ip_address, current_time):
-            remaining_time = self._get_remaining_block_time(ip_address, current_time)
-            return Response(
-                status_code=StatusCode.TOO_MANY_REQUESTS,
-                headers={"Retry-After": str(remaining_time)},
-                body={
-                    "error": "Demasiados intentos fallidos. IP bloqueada temporalmente",
-                    "code": "IP_BLOCKED",
-                    "retry_after": remaining_time
-                }
-            )
+        # El barrido es oportunista: si otro hilo tiene el cerrojo, se deja para la siguiente petición
+        if self.state_backend is None and self._lock.acquire(blocking=False):
+            try:
+                self._sweep(current_time)
+            finally:
+                self._lock.release()
         
-        self._cleanup_old_attempts(ip_address, current_time)
+        if self.state_backend is not None:
+            remaining = self._shared_block_remaining(ip_address)
+            if remaining is not None:
+                return self._blocked_response(remaining)
+        elif self._is_ip_blocked(ip_address, current_time):
+            return self._blocked_response(self._get_remaining_block_time(ip_address, current_time))
         
         response: Response = self._pass_to_next(request)
         
@@ -40,56 +78,105 @@ class BruteForceProtectionHandler(RequestHandler):
         
         return response
     
-    def _is_ip_blocked(self, ip_address: str, current_time: datetime) -> bool:
-        if ip_address in self.blocked_ips:
-            block_until = self.blocked_ips[ip_address]
-            if current_time < block_until:
-                return True
-            else:
-                del self.blocked_ips[ip_address]
+    def _blocked_response(self, remaining_time: int) -> Response:
+        response = self._blocked_responses.get(remaining_time)
+        if response is None:
+            response = shared_response(
+                StatusCode.TOO_MANY_REQUESTS,
+                {
+                    "error": "Demasiados intentos fallidos. IP bloqueada temporalmente",
+                    "code": "IP_BLOCKED",
+                    "retry_after": remaining_time
+                },
+                headers={"Retry-After": str(remaining_time)}
+            )
+            # Con un backend compartido otro worker puede usar otra duración: se acota igualmente
+            if len(self._blocked_responses) <= self.block_duration:
+                self._blocked_responses[remaining_time] = response
+        return response
+    
+    def _is_ip_blocked(self, ip_address: str, current_time: float) -> bool:
+        block_until = self.blocked_ips.get(ip_address)
+        if block_until is None:
+            return False
+        if current_time < block_until:
+            return True
         
+        with self._lock:
+            if self.blocked_ips.get(ip_address) == block_until:
+                del self.blocked_ips[ip_address]
         return False
     
-    def _get_remaining_block_time(self, ip_address: str, current_time: datetime) -> int:
-        if ip_address in self.blocked_ips:
-            block_until = self.blocked_ips[ip_address]
-            remaining = (block_until - current_time).total_seconds()
-            return max(0, int(remaining))
-        return 0
+    def _get_remaining_block_time(self, ip_address: str, current_time: float) -> int:
+        block_until = self.blocked_ips.get(ip_address)
+        if block_until is None:
+            return 0
+        return max(0, int(block_until - current_time))
     
-    def _cleanup_old_attempts(self, ip_address: str, current_time: datetime):
-        if ip_address not in self.failed_attempts:
-            return
-        
-        cutoff_time = current_time - timedelta(hours=1)
-        self.failed_attempts[ip_address] = [
-            attempt_time for attempt_time in self.failed_attempts[ip_address]
-            if attempt_time > cutoff_time
-        ]
-        
-        if not self.failed_attempts[ip_address]:
+    def _sweep(self, current_time: float, batch: int = 2):
+        # Barrido amortizado: por cada petición se descartan como mucho `batch` IPs inactivas
+        cutoff_time = current_time - self.attempt_window
+        for _ in range(batch):
+            if not self.failed_attempts:
+                break
+            ip_address, attempts = next(iter(self.failed_attempts.items()))
+            if attempts.newest() > cutoff_time:
+                break
             del self.failed_attempts[ip_address]
+        
+        for _ in range(batch):
+            if not self.blocked_ips:
+                break
+            ip_address, block_until = next(iter(self.blocked_ips.items()))
+            if block_until > current_time:
+                break
+            del self.blocked_ips[ip_address]
     
-    def _record_failed_attempt(self, ip_address: str, current_time: datetime):
-        if ip_address not in self.failed_attempts:
-            self.failed_attempts[ip_address] = []
+    def _record_failed_attempt(self, ip_address: str, current_time: float):
+        if self.state_backend is not None:
+            self._record_shared_failed_attempt(ip_address, current_time)
+            return
         
-        self.failed_attempts[ip_address].append(current_time)
+        with self._lock:
+            self._record_local_failed_attempt(ip_address, current_time)
+    
+    def _record_local_failed_attempt(self, ip_address: str, current_time: float):
+        attempts = self.failed_attempts.get(ip_address)
+        if attempts is None:
+            attempts = self.failed_attempts[ip_address] = AttemptRing(self.max_attempts)
+            if len(self.failed_attempts) > self.max_tracked_ips:
+                self.failed_attempts.popitem(last=False)
+        else:
+            self.failed_attempts.move_to_end(ip_address)
         
-        recent_attempts = self._count_recent_attempts(ip_address, current_time)
+        attempts.record(current_time)
         
-        if recent_attempts >= self.max_attempts:
-            block_until = current_time + timedelta(seconds=self.block_duration)
-            self.blocked_ips[ip_address] = block_until
+        # El buffer guarda los últimos max_attempts fallos: si el más antiguo es reciente, lo son todos
+        if attempts.oldest() > current_time - self.attempt_window:
+            self.blocked_ips[ip_address] = current_time + self.block_duration
+            self.blocked_ips.move_to_end(ip_address)
     
-    def _count_recent_attempts(self, ip_address: str, current_time: datetime) -> int:
-        if ip_address not in self.failed_attempts:
-            return 0
-        
-        cutoff_time = current_time - timedelta(minutes=15)
-        recent_attempts = [
-            attempt_time for attempt_time in self.failed_attempts[ip_address]
-            if attempt_time > cutoff_time
-        ]
+    def _shared_block_remaining(self, ip_address: str) -> Optional[int]:
+        # La clave caduca con el bloqueo (ex=block_duration): que exista ya significa bloqueada.
+        # El valor sólo da los segundos de Retry-After
+        raw = self.state_backend.get(f"bruteforce:blocked:{ip_address}")
+        if raw is None:
+            return None
+        try:
+            remaining = float(raw) - self.wall_clock()
+        except ValueError:
+            remaining = self.block_duration
+        return min(max(0, int(remaining)), self.block_duration)
+    
+    def _record_shared_failed_attempt(self, ip_address: str, current_time: float):
+        # Ventana fija que empieza con el primer fallo: un INCR y un EXPIRE, como en Redis
+        attempts_key = f"bruteforce:failed:{ip_address}"
+        attempts = self.state_backend.incr(attempts_key)
+        if attempts == 1:
+            self.state_backend.expire(attempts_key, self.attempt_window)
         
-        return len(recent_attempts)
+        if attempts >= self.max_attempts:
+            block_until = self.wall_clock() + self.block_duration
+            self.state_backend.set(f"bruteforce:blocked:{ip_address}", repr(block_until).encode(),
+                                   ex=self.block_duration)
+            self.state_backend.delete(attempts_key)
@@ -3,94 +3,375 @@ Handler para manejo de caché de respuestas
 """
 import hashlib
 import json
-from typing import Optional, Dict
-from datetime import datetime, timedelta
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional, Hashable, Callable, Dict, Iterable, Set, Tuple
 from ..interface.request_handler import RequestHandler
 from ..models.request import Request
 from ..models.response import Response
+from ..enum.status_code import StatusCode
+from ..interface.state_backend import StateBackend
+from ..utils.lru_cache import LRUCache
+from ..utils.serialization import encode_body
+from ..utils.single_flight import SingleFlight
+from ..utils.invalidation import ALL_ORDERS_TAG, InvalidationBus, order_tag, user_tag
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class EncodingVariants(dict):
+    # Variantes codificadas de una respuesta cacheada: avisa del tamaño de cada una nueva
+    __slots__ = ("_charge",)
+
+    def __init__(self, charge: Callable[[int], None]):
+        super().__init__()
+        self._charge = charge
+
+    def __setitem__(self, coding: Optional[str], variant: Tuple[Optional[str], bytes]):
+        if coding not in self:
+            self._charge(len(variant[1]))
+        super().__setitem__(coding, variant)
 
 
 class CacheHandler(RequestHandler):
 
     
-    def __init__(self, cache_duration: int = 300):
+    def __init__(self, cache_duration: int = 300, max_entries: int = 10000,
+                 max_bytes: Optional[int] = None, hashed_keys: bool = False,
+                 state_backend: Optional[StateBackend] = None, stale_grace: float = 0,
+                 revalidate_executor: Optional[Executor] = None,
+                 clock: Callable[[], float] = time.time,
+                 invalidation: Optional[InvalidationBus] = None, etags: bool = True,
+                 flight_timeout: Optional[float] = 10):
         super().__init__()
         self.cache_duration = cache_duration
-        self.cache: Dict[str, Dict] = {}
+        # Pasado cache_duration, la entrada se sirve caducada durante stale_grace segundos
+        # mientras un hilo en segundo plano la revalida
+        self.stale_grace = stale_grace
+        # Reloj de pared: las marcas de frescura viajan al backend compartido entre procesos
+        self.clock = clock
+        # Un backend compartido necesita claves de texto estables entre procesos
+        self.hashed_keys = hashed_keys or state_backend is not None
+        self.state_backend = state_backend
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes,
+                              ttl=cache_duration + stale_grace)
+        self.flights = SingleFlight(wait_timeout=flight_timeout)
+        self.stale_served = 0
+        self.revalidations = 0
+        self._revalidate_executor = revalidate_executor
+        self._refreshing: Set[Hashable] = set()
+        self._refresh_lock = threading.Lock()
+        # Versión por etiqueta: invalidar le da una versión nueva y las entradas guardadas con otra
+        # dejan de servirse, sin índice de claves que mantener.
+        # Una versión sólo hace falta mientras vivan entradas guardadas antes de ella: caduca a los
+        # cache_duration + stale_grace segundos y la tabla no crece con cada orden borrada
+        self.invalidations = 0
+        self._tag_ttl = cache_duration + stale_grace
+        self._tag_versions: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._version_counter = 0
+        self._tag_lock = threading.Lock()
+        # Los ETag salen de esas versiones, así que sólo se emiten si la caché recibe las escrituras
+        self.etags = etags
+        self.not_modified = 0
+        # Con backend, los aciertos en él no pasan por la LRU local y se cuentan aparte
+        self.backend_hits = 0
+        self.backend_overflows = 0
+        self._subscribed = False
+        self._etag_epoch = self._load_etag_epoch()
+        if invalidation is not None:
+            self.subscribe(invalidation)
+    
+    def subscribe(self, invalidation: InvalidationBus):
+        invalidation.subscribe(self.invalidate_tags)
+        self._subscribed = True
+    
+    def invalidate_tags(self, tags: Iterable[str]):
+        with self._tag_lock:
+            now = self.clock()
+            for tag in tags:
+                # Versiones de un contador global: una etiqueta caducada y vuelta a invalidar no
+                # repite un valor que pueda seguir guardado en una entrada o en un ETag
+                if self.state_backend is not None:
+                    version = self.state_backend.incr("cache:tag-counter")
+                    self.state_backend.set(f"tag:{tag}", str(version).encode(), ex=self._tag_ttl)
+                else:
+                    self._version_counter += 1
+                    self._tag_versions[tag] = (self._version_counter, now)
+                    self._tag_versions.move_to_end(tag)
+                self.invalidations += 1
+            
+            # Ordenadas por última invalidación: las caducadas están al principio
+            versions = self._tag_versions
+            while versions and next(iter(versions.values()))[1] <= now - self._tag_ttl:
+                versions.popitem(last=False)
     
     def handle(self, request: Request) -> Optional[Response]:
         if request.method.upper() != "GET":
             return self._pass_to_next(request)
         
         cache_key = self._generate_cache_key(request)
+        tags = self._generate_tags(request)
         
-        cached_response = self._get_from_cache(cache_key)
-        if cached_response:
-            cached_response.is_from_cache = True
+        # GET condicional: si el cliente ya tiene la versión vigente, 304 sin llegar al controlador
+        if_none_match = request.headers.get("If-None-Match")
+        any_match = False
+        if if_none_match is not None and self.etags and self._subscribed:
+            # "*" sólo vale si existe una representación para este usuario: se resuelve con la respuesta,
+            # para que una orden inexistente o ajena siga dando 404 o 403
+            any_match = if_none_match.strip() == "*"
+            if not any_match:
+                etag = self._etag(cache_key, self._current_versions(tags))
+                if self._etag_matches(if_none_match, etag):
+                    return self._not_modified(etag)
+        
+        response = self._get_response(cache_key, request, tags)
+        if any_match and response is not None and 200 <= response.status_code.value < 300 \
+                and "ETag" in response.headers:
+            return self._not_modified(response.headers["ETag"])
+        return response
+    
+    def _get_response(self, cache_key: Hashable, request: Request,
+                      tags: Tuple[str, ...]) -> Optional[Response]:
+        cached = self._lookup(cache_key)
+        if cached is not None:
+            cached_response, stale = cached
+            if stale:
+                self._revalidate(cache_key, request, tags)
             return cached_response
         
+        # Las peticiones idénticas que fallan a la vez esperan a una sola llamada al siguiente handler
+        response, shared = self.flights.do(cache_key, lambda: self._fetch(cache_key, request, tags))
+        if shared and response is not None:
+            return self._copy(response)
+        return response
+    
+    def _not_modified(self, etag: str) -> Response:
+        with self._tag_lock:
+            self.not_modified += 1
+        return Response(status_code=StatusCode.NOT_MODIFIED, headers={"ETag": etag}, body={})
+    
+    def stats(self) -> Dict[str, int]:
+        stats = self.cache.stats()
+        stats["hits"] += self.backend_hits
+        stats.update(coalesced=self.flights.coalesced, flight_timeouts=self.flights.timeouts,
+                     stale_served=self.stale_served, backend_overflows=self.backend_overflows,
+                     revalidations=self.revalidations, invalidations=self.invalidations,
+                     not_modified=self.not_modified)
+        return stats
+    
+    def _fetch(self, cache_key: Hashable, request: Request, tags: Tuple[str, ...] = ()) -> Optional[Response]:
+        # Versiones leídas antes de llamar al siguiente handler: una escritura concurrente
+        # deja la entrada ya invalidada en lugar de guardarla como vigente
+        versions = self._current_versions(tags)
         response = self._pass_to_next(request)
         
         if response and response.status_code.value >= 200 and response.status_code.value < 300:
-            self._store_in_cache(cache_key, response)
+            if self.etags and self._subscribed:
+                response = response.with_header("ETag", self._etag(cache_key, versions))
+            self._store_in_cache(cache_key, response, versions)
         
         return response
     
-    def _generate_cache_key(self, request: Request) -> str:
-        cache_data = {
-            "method": request.method,
-            "path": request.path,
-            "body": request.body,
-            "user": request.authenticated_user.username if hasattr(request, 'authenticated_user') and request.authenticated_user else None
-        }
+    def _generate_tags(self, request: Request) -> Tuple[str, ...]:
+        path = request.path.partition("?")[0]
+        if path.startswith("/orders/"):
+            return (order_tag(path[len("/orders/"):]),)
+        user = request.authenticated_user
+        if user is None:
+            return ()
+        return (ALL_ORDERS_TAG,) if user.is_admin else (user_tag(user.username),)
+    
+    def _current_versions(self, tags: Tuple[str, ...]) -> Tuple[Tuple[str, int], ...]:
+        # Una etiqueta sin versión viva vale el periodo actual de _tag_ttl segundos, en negativo para no
+        # chocar con el contador. Pasado un periodo entero cambia: un ETag emitido antes de una invalidación
+        # ya caducada no vuelve a coincidir. A cambio, esas entradas duran como mucho hasta fin de periodo
+        unversioned = -int(self.clock() // max(self._tag_ttl, 1))
+        if self.state_backend is not None:
+            raw = [self.state_backend.get(f"tag:{tag}") for tag in tags]
+            return tuple((tag, int(value) if value is not None else unversioned)
+                         for tag, value in zip(tags, raw))
+        versions = self._tag_versions
+        result = []
+        for tag in tags:
+            entry = versions.get(tag)
+            result.append((tag, entry[0] if entry is not None else unversioned))
+        return tuple(result)
+    
+    def _etag(self, cache_key: Hashable, versions: Tuple[Tuple[str, int], ...]) -> str:
+        # Débil: identifica el contenido, no los bytes (la compresión puede cambiarlos).
+        # La clave entra en el ETag para que dos usuarios o rutas con las mismas versiones no coincidan
+        key_hash = zlib.crc32(str(cache_key).encode())
+        return f'W/"{self._etag_epoch}-{key_hash:08x}-{".".join(str(version) for _, version in versions)}"'
+    
+    def _etag_matches(self, if_none_match: str, etag: str) -> bool:
+        opaque = etag[2:]
+        return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+    
+    def _load_etag_epoch(self) -> str:
+        # Las versiones en memoria vuelven a cero al reiniciar: la época evita reutilizar ETags de otro proceso.
+        # Con backend compartido las versiones son comunes y la época también
+        if self.state_backend is None:
+            return uuid.uuid4().hex[:8]
+        epoch = self.state_backend.get("cache:etag-epoch")
+        if epoch is None:
+            # Varios procesos pueden arrancar a la vez: gana el primero y todos leen la época guardada
+            self.state_backend.set("cache:etag-epoch", uuid.uuid4().hex[:8].encode(), nx=True)
+            epoch = self.state_backend.get("cache:etag-epoch")
+        return epoch.decode()
+    
+    def _is_current(self, versions: Tuple[Tuple[str, int], ...]) -> bool:
+        return not versions or self._current_versions(tuple(tag for tag, _ in versions)) == versions
+    
+    def _revalidate(self, cache_key: Hashable, request: Request, tags: Tuple[str, ...]):
+        with self._refresh_lock:
+            self.stale_served += 1
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+            self.revalidations += 1
+            if self._revalidate_executor is None:
+                self._revalidate_executor = ThreadPoolExecutor(max_workers=2,
+                                                               thread_name_prefix="cache-revalidate")
+        self._revalidate_executor.submit(self._refresh, cache_key, request, tags)
+    
+    def _refresh(self, cache_key: Hashable, request: Request, tags: Tuple[str, ...]):
+        try:
+            self.flights.do(cache_key, lambda: self._fetch(cache_key, request, tags))
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(cache_key)
+    
+    def _generate_cache_key(self, request: Request) -> Hashable:
+        user = request.authenticated_user
+        username = user.username if user else None
+        
+        # Con cuerpo, siempre digest: congelar el cuerpo en tuplas cuesta más que serializarlo y además
+        # la tupla se vuelve a hashear en la LRU, en SingleFlight y en el ETag; el str cachea su hash.
+        # JSON distingue tipos, así que {"a": 1}, {"a": 1.0} y {"a": true} no comparten clave
+        if self.hashed_keys or request.body:
+            return self._digest(request.method, request.path, username, request.body)
         
-        cache_string = json.dumps(cache_data, sort_keys=True)
-        return hashlib.md5(cache_string.encode()).hexdigest()
+        # Sin cuerpo, la tupla es lo más barato y el propio dict de la caché la hashea
+        return (request.method, request.path, username, None)
+    
+    def _digest(self, method: str, path: str, username: Optional[str], body: dict) -> str:
+        canonical = f"{method}\0{path}\0{username}".encode()
+        if body:
+            canonical += b"\0" + self._canonical_body(body)
+        if xxhash is not None:
+            return xxhash.xxh3_128_hexdigest(canonical)
+        return hashlib.md5(canonical).hexdigest()
+    
+    def _canonical_body(self, body: dict) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(body, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # Enteros de más de 64 bits y otros valores que orjson no admite
+                pass
+        return json.dumps(body, sort_keys=True, default=str).encode()
     
     def _get_from_cache(self, cache_key: str) -> Optional[Response]:
-        if cache_key not in self.cache:
-            return None
-        
-        cached_item = self.cache[cache_key]
-        cached_time = cached_item["timestamp"]
-        current_time = datetime.now()
+        cached = self._lookup(cache_key)
+        return cached[0] if cached is not None else None
+    
+    def _lookup(self, cache_key: Hashable) -> Optional[Tuple[Response, bool]]:
+        # Devuelve (copia de la respuesta, caducada) o None si no hay entrada utilizable
+        decoded = None
+        if self.state_backend is not None:
+            raw = self.state_backend.get(f"cache:{cache_key}")
+            if raw is not None:
+                decoded = self._decode_response(raw)
+                if not self._is_current(decoded[2]):
+                    decoded = None
+        if decoded is not None:
+            cached_response, fresh_until, versions = decoded
+            with self._tag_lock:
+                self.backend_hits += 1
+        else:
+            # Sin backend, o con backend pero la respuesta no cabía en su ranura y quedó en la LRU local
+            entry = self.cache.get(cache_key)
+            if entry is None:
+                return None
+            stored_response, fresh_until, versions = entry
+            if not self._is_current(versions):
+                return None
+            cached_response = self._copy(stored_response)
+            cached_response.is_from_cache = True
         
-        if current_time - cached_time > timedelta(seconds=self.cache_duration):
-            del self.cache[cache_key]
+        stale = self.clock() >= fresh_until
+        if stale and not self.stale_grace:
             return None
+        return cached_response, stale
+    
+    def _store_in_cache(self, cache_key: str, response: Response,
+                        versions: Tuple[Tuple[str, int], ...] = ()):
+        fresh_until = self.clock() + self.cache_duration
+        if self.state_backend is not None:
+            stored = self.state_backend.set(f"cache:{cache_key}",
+                                            self._encode_response(response, fresh_until, versions),
+                                            ex=self.cache_duration + self.stale_grace)
+            if stored:
+                return
+            # Mayor que la ranura del backend: se guarda sólo en este proceso en lugar de perderse.
+            # La versión anterior del backend, si la hay, se borra para que no tape a la local
+            self.state_backend.delete(f"cache:{cache_key}")
+            with self._tag_lock:
+                self.backend_overflows += 1
         
-        cached_response = cached_item["response"]
-        return Response(
-            status_code=cached_response.status_code,
-            headers=cached_response.headers.copy(),
-            body=cached_response.body.copy() if isinstance(cached_response.body, dict) else cached_response.body,
-            is_from_cache=True
-        )
+        cached_response = self._copy(response)
+        cached_response.is_from_cache = False
+        entry = (cached_response, fresh_until, versions)
+        # Las variantes comprimidas quedan en la entrada: los aciertos las sirven sin recomprimir.
+        # Sus bytes se cargan a la entrada al añadirse, para que max_bytes los cuente
+        cached_response.encodings = EncodingVariants(lambda size: self.cache.charge(cache_key, entry, size))
+        if not response.shared:
+            response.encodings = cached_response.encodings
+        
+        self.cache.set(cache_key, entry, size=self._estimate_size(cached_response))
     
-    def _store_in_cache(self, cache_key: str, response: Response):
-        cached_response = Response(
+    def _copy(self, response: Response) -> Response:
+        return Response(
             status_code=response.status_code,
             headers=response.headers.copy(),
-            body=response.body.copy() if isinstance(response.body, dict) else response.body
+            body=response.body.copy() if isinstance(response.body, dict) else response.body,
+            is_from_cache=response.is_from_cache,
+            encodings=response.encodings
         )
-        
-        self.cache[cache_key] = {
-            "response": cached_response,
-            "timestamp": datetime.now()
-        }
-        
-        if len(self.cache) > 100:
-            self._cleanup_old_cache()
     
-    def _cleanup_old_cache(self):
-
-        current_time = datetime.now()
-        keys_to_remove = []
-        
-        for key, cached_item in self.cache.items():
-            cached_time = cached_item["timestamp"]
-            if current_time - cached_time > timedelta(seconds=self.cache_duration):
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.cache[key]
\ No newline at end of file
+    def _estimate_size(self, response: Response) -> int:
+        return len(encode_body(response.body)) + sum(
+            len(name) + len(value) for name, value in response.headers.items()
+        )
+    
+    def _encode_response(self, response: Response, fresh_until: float,
+                         versions: Tuple[Tuple[str, int], ...] = ()) -> bytes:
+        return b"".join([
+            b'{"status_code":', str(response.status_code.value).encode(),
+            b',"fresh_until":', repr(fresh_until).encode(),
+            b',"tags":', encode_body(versions),
+            b',"headers":', encode_body(response.headers),
+            b',"body":', encode_body(response.body), b"}"
+        ])
+    
+    def _decode_response(self, raw: bytes) -> Tuple[Response, float, Tuple[Tuple[str, int], ...]]:
+        data = json.loads(raw)
+        response = Response(
+            status_code=StatusCode(data["status_code"]),
+            headers=data["headers"],
+            body=data["body"],
+            is_from_cache=True
+        )
+        return response, data["fresh_until"], tuple((tag, version) for tag, version in data["tags"])
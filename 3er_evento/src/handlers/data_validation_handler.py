@@ -1,81 +1,126 @@
+import logging
 import re
 from typing import Optional, Dict, Any
 from ..interface.request_handler import RequestHandler
 from ..models.request import Request
-from ..models.response import Response
+from ..models.response import Response, shared_response
 from ..enum.status_code import StatusCode
 
+logger = logging.getLogger(__name__)
+
+# Se compilan con re.IGNORECASE, también los que se pasan al handler
+DANGEROUS_PATTERNS = {
+    "xss_script": r'<script.*?>.*?</script>',     # Scripts XSS
+    "javascript_url": r'javascript:',             # JavaScript URLs
+    "event_handler": r'on\w+\s*=',                # Event handlers
+    "sql_select": r'select.*from',                # SQL injection básica
+    "sql_drop_table": r'drop\s+table',            # SQL injection
+    "sql_insert": r'insert\s+into',               # SQL injection
+    "sql_delete": r'delete\s+from',               # SQL injection
+    "path_traversal": r'\.\./',                   # Directory traversal
+    "code_exec": r'exec\(',                       # Code execution
+    "code_eval": r'eval\(',                       # Code evaluation
+}
+
+CONTROL_CHARACTERS = re.compile(r'[\x00-\x1F\x7F]')
+
 
 class DataValidationHandler(RequestHandler):
     
-    def __init__(self):
+    def __init__(self, dangerous_patterns: Optional[Dict[str, str]] = None,
+                 max_depth: int = 32, max_items: int = 100000):
         super().__init__()
-        self.dangerous_patterns = [
-            r'<script.*?>.*?</script>',  # Scripts XSS
-            r'javascript:',              # JavaScript URLs
-            r'on\w+\s*=',               # Event handlers
-            r'SELECT.*FROM',            # SQL injection básica
-            r'DROP\s+TABLE',            # SQL injection
-            r'INSERT\s+INTO',           # SQL injection
-            r'DELETE\s+FROM',           # SQL injection
-            r'\.\./.*',                 # Directory traversal
-            r'exec\(',                  # Code execution
-            r'eval\(',                  # Code evaluation
-        ]
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.dangerous_patterns = dict(dangerous_patterns or DANGEROUS_PATTERNS)
+        self._rules = {name: re.compile(pattern, re.IGNORECASE)
+                       for name, pattern in self.dangerous_patterns.items()}
+        # Una sola alternancia sin grupos de captura: cada valor se recorre una vez.
+        # Las reglas individuales sólo se consultan cuando hay coincidencia, para saber cuál fue.
+        self._scanner = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.dangerous_patterns.values()),
+            re.IGNORECASE
+        )
+        # Respuestas 400 preconstruidas: rechazar no construye nada nuevo. La regla que saltó
+        # sólo va al log; en la respuesta le diría al cliente qué tiene que esquivar
+        self._invalid_headers = shared_response(
+            StatusCode.BAD_REQUEST,
+            {"error": "Headers inválidos", "code": "INVALID_HEADERS"}
+        )
+        self._invalid_data = shared_response(
+            StatusCode.BAD_REQUEST,
+            {"error": "Datos de entrada inválidos", "code": "INVALID_DATA"}
+        )
     
     def handle(self, request: Request) -> Optional[Response]:
         
-        if not self._validate_headers(request.headers):
-            return Response(
-                status_code=StatusCode.BAD_REQUEST,
-                headers={},
-                body={"error": "Headers inválidos", "code": "INVALID_HEADERS"}
-            )
+        rule = self._scan_headers(request.headers)
+        if rule:
+            logger.info("Headers rechazados de %s: regla %s", request.ip_address, rule)
+            return self._invalid_headers
         
-        if not self._validate_and_sanitize_body(request):
-            return Response(
-                status_code=StatusCode.BAD_REQUEST,
-                headers={},
-                body={"error": "Datos de entrada inválidos", "code": "INVALID_DATA"}
-            )
+        rule = self._scan_and_sanitize_body(request)
+        if rule:
+            logger.info("Cuerpo rechazado de %s: regla %s", request.ip_address, rule)
+            return self._invalid_data
         
         return self._pass_to_next(request)
     
     def _validate_headers(self, headers: Dict[str, str]) -> bool:
-
-        for _, header_value in headers.items():
-            if self._contains_dangerous_content(header_value):
-                return False
-        return True
+        return self._scan_headers(headers) is None
     
     def _validate_and_sanitize_body(self, request: Request) -> bool:
+        return self._scan_and_sanitize_body(request) is None
+    
+    def _scan_headers(self, headers: Dict[str, str]) -> Optional[str]:
+
+        for header_value in headers.values():
+            rule = self._match_dangerous_content(header_value)
+            if rule:
+                return rule
+        return None
+    
+    def _scan_and_sanitize_body(self, request: Request) -> Optional[str]:
 
         if not request.body:
-            return True
+            return None
         
-        sanitized_body = {}
+        # Recorrido iterativo con pila explícita; sólo se reescriben los valores que cambian
+        stack = [(request.body, 1)]
+        visited = 0
         
-        for key, value in request.body.items():
-            if isinstance(value, str):
-                if self._contains_dangerous_content(value):
-                    return False
+        while stack:
+            container, depth = stack.pop()
+            if depth > self.max_depth:
+                return "max_depth_exceeded"
+            
+            entries = container.items() if isinstance(container, dict) else enumerate(container)
+            for key, value in entries:
+                visited += 1
+                if visited > self.max_items:
+                    return "max_items_exceeded"
                 
-                sanitized_value = self._sanitize_string(value)
-                sanitized_body[key] = sanitized_value
-            else:
-                sanitized_body[key] = value
+                if isinstance(value, str):
+                    rule = self._match_dangerous_content(value)
+                    if rule:
+                        return rule
+                    
+                    sanitized_value = self._sanitize_string(value)
+                    if sanitized_value != value:
+                        container[key] = sanitized_value
+                elif isinstance(value, (dict, list)):
+                    stack.append((value, depth + 1))
         
-        request.body = sanitized_body
-        return True
+        return None
     
-    def _contains_dangerous_content(self, content: str) -> bool:
-        content_lower = content.lower()
-        
-        for pattern in self.dangerous_patterns:
-            if re.search(pattern, content_lower, re.IGNORECASE):
-                return True
+    def _match_dangerous_content(self, content: str) -> Optional[str]:
+        if not self._scanner.search(content):
+            return None
         
-        return False
+        return next(name for name, rule in self._rules.items() if rule.search(content))
+    
+    def _contains_dangerous_content(self, content: str) -> bool:
+        return self._scanner.search(content) is not None
     
     def _sanitize_string(self, value: str) -> str:
 
@@ -85,6 +130,6 @@ class DataValidationHandler(RequestHandler):
         value = value.replace('"', "&quot;")
         value = value.replace("'", "&#x27;")
         
-        value = re.sub(r'[\x00-\x1F\x7F]', '', value)
+        value = CONTROL_CHARACTERS.sub('', value)
         
         return value.strip()
@@ -0,0 +1,50 @@
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Optional
+from ..models import Request, Response
+from .request_handler import RequestHandler
+
+
+class AsyncRequestHandler(ABC):
+
+    def __init__(self):
+        self._next_handler: Optional['AsyncRequestHandler'] = None
+
+    def set_next(self, handler: 'AsyncRequestHandler') -> 'AsyncRequestHandler':
+        self._next_handler = handler
+        return handler
+
+    @abstractmethod
+    async def handle(self, request: Request) -> Optional[Response]:
+        pass
+
+    async def _pass_to_next(self, request: Request) -> Optional[Response]:
+        if self._next_handler:
+            return await self._next_handler.handle(request)
+        return None
+
+
+class SyncHandlerAdapter(AsyncRequestHandler):
+    # Ejecuta un tramo de handlers síncronos en un executor para no bloquear el event loop
+
+    def __init__(self, handler: RequestHandler, executor: Optional[Executor] = None):
+        super().__init__()
+        self.handler = handler
+        self.executor = executor
+
+    async def handle(self, request: Request) -> Optional[Response]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.handler.handle, request)
+
+
+class AsyncBridgeHandler(RequestHandler):
+    # Permite que un handler síncrono, desde un hilo del executor, continúe la cadena asíncrona
+
+    def __init__(self, handler: AsyncRequestHandler, loop: asyncio.AbstractEventLoop):
+        super().__init__()
+        self.handler = handler
+        self.loop = loop
+
+    def handle(self, request: Request) -> Optional[Response]:
+        return asyncio.run_coroutine_threadsafe(self.handler.handle(request), self.loop).result()
@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from ..models.order import Order
+
+
+class OrderRepository(ABC):
+
+    @abstractmethod
+    def add(self, order: Order):
+        pass
+
+    @abstractmethod
+    def get(self, order_id: str) -> Optional[Order]:
+        pass
+
+    @abstractmethod
+    def delete(self, order_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    def by_user(self, user_id: str) -> Iterator[Order]:
+        # Órdenes del usuario en orden de created_at
+        pass
+
+    @abstractmethod
+    def all(self) -> Iterator[Order]:
+        # Todas las órdenes en orden de created_at
+        pass
+
+    @abstractmethod
+    def page(self, user_id: Optional[str], after: Optional[Tuple[datetime, str]],
+             limit: int) -> Tuple[List[Order], bool]:
+        # Hasta `limit` órdenes posteriores a la clave (created_at, id) `after`,
+        # de un usuario o de todos si user_id es None, y si quedan más
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def __contains__(self, order_id: str) -> bool:
+        return self.get(order_id) is not None
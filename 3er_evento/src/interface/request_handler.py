@@ -10,7 +10,14 @@ class RequestHandler(ABC):
     
     def set_next(self, handler: 'RequestHandler') -> 'RequestHandler':
         self._next_handler = handler
+        # Un enlace compilado previo deja de ser válido
+        self.__dict__.pop("_pass_to_next", None)
         return handler
+
+    def compile_next(self):
+        # Enlaza directamente con el handle del siguiente: sin comprobaciones por petición
+        if self._next_handler is not None:
+            self._pass_to_next = self._next_handler.handle
     
     @abstractmethod
     def handle(self, request: Request) -> Optional[Response]:
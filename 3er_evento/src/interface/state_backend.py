@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class StateBackend(ABC):
+    # Subconjunto de la API de Redis que usan los handlers: un cliente redis.Redis también la cumple
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ex: Optional[float] = None, nx: bool = False) -> bool:
+        # nx: sólo si la clave no existe; devuelve si se escribió
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> int:
+        pass
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1) -> int:
+        pass
+
+    @abstractmethod
+    def expire(self, key: str, seconds: float) -> bool:
+        pass
@@ -2,4 +2,5 @@ from .order import Order
 from .user import User
 from .request import Request
 from .response import Response
-from .server import Server
\ No newline at end of file
+from .server import Server
+from .async_server import AsyncServer
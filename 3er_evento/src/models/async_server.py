@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional, Callable, Awaitable
+from ..interface.async_request_handler import AsyncRequestHandler, SyncHandlerAdapter, AsyncBridgeHandler
+from .request import Request
+from .response import Response
+from ..controllers.order import OrderController
+from .server import subscribe_cache
+
+
+class AsyncServer:
+
+    middlewares: list
+
+    controller: object
+
+    def __init__(self, controller=None, executor: Optional[Executor] = None, max_workers: int = 64):
+        self.middlewares = []
+        self.controller = controller if controller is not None else OrderController()
+        self.max_workers = max_workers
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix="async-server")
+        # Un executor propio por cada tramo síncrono posterior a un handler asíncrono: el hilo de un tramo
+        # que espera al resto de la cadena nunca ocupa un hilo que ese resto necesite
+        self._segment_executors: list = []
+        self._pipeline: Optional[Callable[[Request], Awaitable[Optional[Response]]]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def add_middleware(self, middleware):
+        self.middlewares.append(middleware)
+        self._pipeline = None
+        subscribe_cache(middleware, self.controller)
+
+    def compile(self, loop: asyncio.AbstractEventLoop) -> Callable[[Request], Awaitable[Optional[Response]]]:
+        # Agrupa los handlers síncronos consecutivos en un solo tramo que corre en un hilo del executor
+        segments = []
+        for handler in self.middlewares + [self.controller]:
+            is_async = isinstance(handler, AsyncRequestHandler)
+            if segments and segments[-1][0] == is_async:
+                segments[-1][1].append(handler)
+            else:
+                segments.append((is_async, [handler]))
+
+        sync_segments = sum(1 for is_async, _ in segments if not is_async)
+        next_handler: Optional[AsyncRequestHandler] = None
+        for is_async, group in reversed(segments):
+            for handler, following in zip(group, group[1:]):
+                handler.set_next(following)
+            if is_async:
+                if next_handler is not None:
+                    group[-1].set_next(next_handler)
+                next_handler = group[0]
+            else:
+                if next_handler is not None:
+                    group[-1].set_next(AsyncBridgeHandler(next_handler, loop))
+                sync_segments -= 1
+                next_handler = SyncHandlerAdapter(group[0], self._segment_executor(sync_segments))
+
+        return next_handler.handle
+
+    async def process_request(self, request: Request) -> Response:
+        loop = asyncio.get_running_loop()
+        if self._pipeline is None or self._loop is not loop:
+            self._pipeline = self.compile(loop)
+            self._loop = loop
+        return await self._pipeline(request)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        for executor in self._segment_executors:
+            executor.shutdown(wait=True)
+
+    def _segment_executor(self, depth: int) -> Executor:
+        if depth == 0:
+            return self.executor
+        while len(self._segment_executors) < depth:
+            self._segment_executors.append(ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=f"async-server-{len(self._segment_executors) + 1}"))
+        return self._segment_executors[depth - 1]
@@ -0,0 +1,108 @@
+"""
+Front-end HTTP/1.1 sobre asyncio: keep-alive y pipelining delante de un Server o AsyncServer
+"""
+import asyncio
+import socket
+from concurrent.futures import Executor
+from typing import Optional
+from .request import Request
+from .response import Response
+from ..enum.status_code import StatusCode
+from ..utils.http_parser import HttpParseError, HttpRequestParser, error_response, serialize_response
+
+
+class HttpServer:
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 8080,
+                 keep_alive_timeout: float = 5.0, max_header_bytes: int = 65536,
+                 max_body_bytes: int = 1 << 20, read_size: int = 65536,
+                 sock: Optional[socket.socket] = None, executor: Optional[Executor] = None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_header_bytes = max_header_bytes
+        self.max_body_bytes = max_body_bytes
+        self.read_size = read_size
+        # Socket ya enlazado (p. ej. heredado del supervisor pre-fork); si no, se enlaza host:port
+        self.sock = sock
+        # AsyncServer devuelve una corrutina; un Server síncrono corre en el executor (None: el del loop)
+        # para que un PBKDF2 o un flush de SQLite no detengan al resto de conexiones
+        self._is_async = asyncio.iscoroutinefunction(app.process_request)
+        self.executor = executor
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> asyncio.AbstractServer:
+        if self.sock is not None:
+            self._server = await asyncio.start_server(self._handle_connection, sock=self.sock)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Con port=0 el sistema asigna uno libre
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self):
+        server = self._server or await self.start()
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def run(self):
+        asyncio.run(self.serve_forever())
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        parser = HttpRequestParser(peer[0] if peer else "", self.max_header_bytes, self.max_body_bytes)
+        keep_alive = True
+        try:
+            while keep_alive:
+                try:
+                    data = await asyncio.wait_for(reader.read(self.read_size), self.keep_alive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not data:
+                    break
+
+                error = None
+                try:
+                    requests = parser.feed(data)
+                except HttpParseError as parse_error:
+                    requests, error = parse_error.requests, parse_error
+
+                # Pipelining: las respuestas salen en el orden de las peticiones y se vacían juntas
+                for request, keep_alive in requests:
+                    response = await self._dispatch(request)
+                    writer.write(serialize_response(response, keep_alive))
+                    if not keep_alive:
+                        break
+                if error is not None and keep_alive:
+                    writer.write(serialize_response(error_response(error), keep_alive=False))
+                    keep_alive = False
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, request: Request) -> Optional[Response]:
+        try:
+            if self._is_async:
+                return await self.app.process_request(request)
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.app.process_request, request)
+        except Exception:
+            return Response(
+                status_code=StatusCode.SERVER_ERROR,
+                headers={},
+                body={"error": "Error interno del servidor",
+                      "code": StatusCode.SERVER_ERROR}
+            )
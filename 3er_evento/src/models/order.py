@@ -1,10 +1,9 @@
-
 from dataclasses import dataclass
 from datetime import datetime
 from ..enum.order import OrderStatus
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     id: str
     user_id: str
@@ -13,6 +12,10 @@ class Order:
     created_at: datetime
     status: OrderStatus = OrderStatus.PENDING
 
+    def state(self) -> tuple:
+        # Copia de todo lo que sale en to_json: items se copia para que un append in situ la cambie
+        return (self.id, self.user_id, tuple(self.items), self.total, self.status, self.created_at)
+
     def to_json(self) -> dict:
         return {
             "id": self.id,
@@ -0,0 +1,215 @@
+"""
+Supervisor pre-fork: un socket de escucha, N procesos trabajadores con HttpServer, reinicio de caídos y reinicio escalonado
+"""
+import asyncio
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import time
+import traceback
+from typing import Dict, Optional
+from .http_server import HttpServer
+
+
+logger = logging.getLogger(__name__)
+
+class PreforkServer:
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 8080,
+                 workers: Optional[int] = None, reuse_port: bool = False,
+                 ready_timeout: float = 10.0, stop_timeout: float = 10.0,
+                 restart_delay: float = 0.5, max_restart_delay: float = 30.0, **http_options):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        # reuse_port: cada trabajador abre su propio socket con SO_REUSEPORT y el kernel reparte
+        # las conexiones; si no, todos aceptan sobre el socket compartido heredado del padre
+        self.reuse_port = reuse_port
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.restart_delay = restart_delay
+        # Fallos seguidos al arrancar trabajadores: la espera se duplica hasta max_restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.failures = 0
+        self._next_spawn_at = 0.0
+        self.http_options = http_options
+        self.pids: Dict[int, float] = {}
+        self._socket: Optional[socket.socket] = None
+        self._stopping = False
+        self._reload = False
+
+    def start(self):
+        self._socket = self._bind(listen=not self.reuse_port)
+        self.port = self._socket.getsockname()[1]
+
+        # La cadena se construye una sola vez en el padre; los hijos la comparten copy-on-write.
+        # gc.freeze evita que las pasadas del GC en los hijos escriban en esas páginas.
+        if getattr(self.app, "compiled", False):
+            self.app.compile()
+        gc.collect()
+        gc.freeze()
+
+        self._fill()
+
+    def serve_forever(self, poll_interval: float = 0.2):
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+        if self._socket is None:
+            self.start()
+        try:
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    self.rolling_restart()
+                self.reap()
+                time.sleep(poll_interval)
+        finally:
+            self.stop()
+
+    def reap(self) -> int:
+        # Recoge los trabajadores terminados y arranca sus reemplazos
+        for pid in list(self.pids):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if not done:
+                continue
+            started_at = self.pids.pop(pid)
+            # Un trabajador que cae nada más arrancar no debe provocar un bucle de reinicios
+            if time.monotonic() - started_at < self.restart_delay:
+                self._back_off()
+        if self._stopping:
+            return 0
+        return self._fill()
+
+    def rolling_restart(self):
+        # Sustituye los trabajadores de uno en uno: el nuevo ya acepta conexiones antes de parar el viejo
+        for pid in list(self.pids):
+            if self._spawn() is None:
+                # El viejo sigue atendiendo: reap completará el reemplazo tras la espera
+                self._back_off()
+                return
+            self.pids.pop(pid, None)
+            self._terminate(pid)
+
+    def stop(self):
+        self._stopping = True
+        for pid in list(self.pids):
+            self._terminate(pid)
+        self.pids.clear()
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        gc.unfreeze()
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+    def _request_reload(self, signum, frame):
+        self._reload = True
+
+    def _bind(self, listen: bool) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        if listen:
+            sock.listen(socket.SOMAXCONN)
+        sock.setblocking(False)
+        return sock
+
+    def _fill(self) -> int:
+        # Arranca trabajadores hasta completar self.workers, salvo durante la espera tras un fallo
+        started = 0
+        while len(self.pids) < self.workers and time.monotonic() >= self._next_spawn_at:
+            if self._spawn() is None:
+                self._back_off()
+                break
+            started += 1
+        return started
+
+    def _back_off(self):
+        self.failures += 1
+        delay = min(self.restart_delay * 2 ** (self.failures - 1), self.max_restart_delay)
+        self._next_spawn_at = time.monotonic() + delay
+        logger.warning("Reintento de arranque de trabajadores en %.2f s (fallo %d)", delay, self.failures)
+
+    def _spawn(self) -> Optional[int]:
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 1
+            try:
+                asyncio.run(self._run_worker(ready_write))
+                code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+
+        os.close(ready_write)
+        try:
+            ready, _, _ = select.select([ready_read], [], [], self.ready_timeout)
+            started = bool(ready) and bool(os.read(ready_read, 1))
+        finally:
+            os.close(ready_read)
+        if not started:
+            # Se recoge aquí: si no, quedaría como zombi fuera de self.pids
+            self._kill(pid)
+            logger.error("El trabajador %d no llegó a aceptar conexiones", pid)
+            return None
+        self.failures = 0
+        self.pids[pid] = time.monotonic()
+        return pid
+
+    async def _run_worker(self, ready_write: int):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        sock = self._socket
+        if self.reuse_port:
+            sock.close()
+            sock = self._bind(listen=True)
+
+        http_server = HttpServer(self.app, sock=sock, **self.http_options)
+        await http_server.start()
+        stopped = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+        os.write(ready_write, b"1")
+        os.close(ready_write)
+
+        await stopped.wait()
+        await http_server.close()
+
+    def _terminate(self, pid: int):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + self.stop_timeout
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if done:
+                return
+            time.sleep(0.01)
+        self._kill(pid)
+
+    def _kill(self, pid: int):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
@@ -4,7 +4,7 @@ from datetime import datetime
 from ..models.user import User
 
 
-@dataclass
+@dataclass(slots=True)
 class Request:
     method: str
     path: str
@@ -13,6 +13,7 @@ class Request:
     ip_address: str
     timestamp: datetime
     user_credentials: Optional[Dict[str, str]] = None
+    authenticated_user: Optional[User] = None
     
     def __post_init__(self):
         if self.timestamp is None:
@@ -1,15 +1,45 @@
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 from ..enum.status_code import StatusCode
 
 
-@dataclass
+# Cabeceras por defecto compartidas y de solo lectura: with_header las copia antes de escribir
+DEFAULT_HEADERS: Mapping[str, str] = MappingProxyType({"Content-Type": "application/json"})
+
+
+@dataclass(slots=True)
 class Response:
     status_code: StatusCode
     headers: Dict[str, str]
     body: Dict[str, Any]
     is_from_cache: bool = False
+    # Respuesta preconstruida que se reutiliza entre peticiones: nunca se modifica
+    shared: bool = field(default=False, repr=False, compare=False)
+    # Cuerpo ya serializado (y quizá comprimido) que se escribe tal cual en lugar de codificar body
+    payload: Optional[bytes] = field(default=None, repr=False, compare=False)
+    # Variantes serializadas por Accept-Encoding negociado, compartidas con la entrada de la caché
+    encodings: Optional[Dict[Optional[str], Tuple[Optional[str], bytes]]] = field(
+        default=None, repr=False, compare=False)
     
     def __post_init__(self):
         if not self.headers:
-            self.headers = {"Content-Type": "application/json"}
\ No newline at end of file
+            self.headers = DEFAULT_HEADERS
+
+    def with_header(self, name: str, value: str) -> 'Response':
+        # Copia al escribir: una respuesta compartida devuelve una copia y sus cabeceras se duplican
+        response = self
+        if self.shared:
+            response = Response(status_code=self.status_code, headers=self.headers,
+                                body=self.body, is_from_cache=self.is_from_cache)
+        if type(response.headers) is not dict:
+            response.headers = dict(response.headers)
+        response.headers[name] = value
+        return response
+
+
+def shared_response(status_code: StatusCode, body: Dict[str, Any],
+                    headers: Mapping[str, str] = DEFAULT_HEADERS) -> Response:
+    # Respuesta inmutable para los caminos de rechazo: se construye una vez y se devuelve tal cual
+    return Response(status_code=status_code, headers=MappingProxyType(dict(headers)),
+                    body=MappingProxyType(body), shared=True)
@@ -1,11 +1,19 @@
 
-from typing import Optional
+from typing import Optional, Callable
 from ..interface.request_handler import RequestHandler
 from .request import Request
 from .response import Response
 from ..controllers.order import OrderController
+from ..utils.instrumentation import Instrumentation
 
 
+def subscribe_cache(middleware: RequestHandler, controller: RequestHandler):
+    # Las escrituras del servicio de órdenes invalidan las respuestas cacheadas que dependían de ellas.
+    # Gancho por atributo: importar CacheHandler aquí cerraría un ciclo de imports con los handlers
+    subscribe = getattr(middleware, "subscribe", None)
+    if subscribe is not None and isinstance(controller, OrderController):
+        subscribe(controller.order_service.invalidation)
+
 
 class Server:
 
@@ -13,14 +21,44 @@ class Server:
 
     controller: RequestHandler
 
-    def __init__(self):
+    def __init__(self, compiled: bool = False):
         self.middlewares = []
         self.controller = OrderController()
+        self.compiled = compiled
+        self._pipeline: Optional[Callable[[Request], Optional[Response]]] = None
+        self.instrumentation: Optional[Instrumentation] = None
 
     def add_middleware(self, middleware: RequestHandler):
         if self.middlewares:
             self.middlewares[-1].set_next(middleware)
         self.middlewares.append(middleware)
+        self._pipeline = None
+        subscribe_cache(middleware, self.controller)
+        if self.instrumentation is not None:
+            self.instrumentation.attach(self.middlewares + [self.controller])
+
+    def enable_instrumentation(self, instrumentation: Optional[Instrumentation] = None) -> Instrumentation:
+        # Opcional: desactivada, la cadena no lleva ningún envoltorio
+        self.instrumentation = instrumentation or Instrumentation()
+        self.instrumentation.attach(self.middlewares + [self.controller])
+        self._pipeline = None
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        if self.instrumentation is not None:
+            self.instrumentation.detach()
+            self.instrumentation = None
+        self._pipeline = None
+
+    def compile(self) -> Callable[[Request], Optional[Response]]:
+        # Congela la cadena una sola vez: cada handler queda enlazado al handle del siguiente
+        chain = self.middlewares + [self.controller]
+        for handler, next_handler in zip(chain, chain[1:]):
+            handler.set_next(next_handler)
+            if isinstance(handler, RequestHandler):
+                handler.compile_next()
+        self._pipeline = chain[0].handle
+        return self._pipeline
 
     def execute_middleware_chain(self, request: Request) -> Optional[Response]:
         if not self.middlewares:
@@ -33,6 +71,10 @@ class Server:
 
     def process_request(self, request: Request) -> Response:
 
+      if self.compiled:
+          pipeline = self._pipeline or self.compile()
+          return pipeline(request)
+
       if not self.middlewares:
           return self.handle_request(request)
       # Siempre el controlador se ejecuta al final
@@ -0,0 +1,36 @@
+"""
+Servidor que reparte process_request entre los hilos de un pool
+"""
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+from .request import Request
+from .response import Response
+from .server import Server
+
+
+class ThreadedServer(Server):
+
+    def __init__(self, max_workers: int = 32, executor: Optional[Executor] = None):
+        # Siempre compilado: la cadena se enlaza una vez y los hilos no la vuelven a tocar
+        super().__init__(compiled=True)
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix="threaded-server")
+        self._compile_lock = threading.Lock()
+
+    def submit(self, request: Request) -> Future:
+        self._ensure_compiled()
+        return self.executor.submit(self._pipeline, request)
+
+    def map(self, requests: Iterable[Request]) -> Iterator[Optional[Response]]:
+        self._ensure_compiled()
+        return self.executor.map(self._pipeline, requests)
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+    def _ensure_compiled(self):
+        if self._pipeline is None:
+            with self._compile_lock:
+                if self._pipeline is None:
+                    self.compile()
@@ -0,0 +1 @@
+from .in_memory_order_repository import InMemoryOrderRepository
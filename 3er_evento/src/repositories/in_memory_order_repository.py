@@ -0,0 +1,87 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from ..interface.order_repository import OrderRepository
+from ..models.order import Order
+from ..utils.sorted_keys import SortedKeyList
+
+
+OrderKey = Tuple[datetime, str]
+
+
+class InMemoryOrderRepository(OrderRepository):
+    # Índice hash por id (get en O(1)), índice secundario por user_id e índice ordenado por
+    # (created_at, id). Los índices ordenados son listas por tramos: insertar y borrar cuestan
+    # O(log n) más el desplazamiento de un tramo, no el de toda la lista
+
+    def __init__(self, orders: Iterable[Order] = ()):
+        self._by_id: Dict[str, Order] = {}
+        self._by_created_at = SortedKeyList()
+        self._by_user: Dict[str, SortedKeyList] = {}
+        # Escrituras y lecturas de varios índices bajo el cerrojo; get, len e in no lo necesitan
+        self._lock = threading.RLock()
+        for order in orders:
+            self.add(order)
+
+    def add(self, order: Order):
+        with self._lock:
+            if order.id in self._by_id:
+                self.delete(order.id)
+
+            key = (order.created_at, order.id)
+            self._by_id[order.id] = order
+            self._by_created_at.add(key)
+            user_keys = self._by_user.get(order.user_id)
+            if user_keys is None:
+                user_keys = self._by_user[order.user_id] = SortedKeyList()
+            user_keys.add(key)
+
+    def get(self, order_id: str) -> Optional[Order]:
+        return self._by_id.get(order_id)
+
+    def delete(self, order_id: str) -> bool:
+        with self._lock:
+            order = self._by_id.pop(order_id, None)
+            if order is None:
+                return False
+
+            key = (order.created_at, order.id)
+            self._by_created_at.remove(key)
+            user_keys = self._by_user[order.user_id]
+            user_keys.remove(key)
+            if not user_keys:
+                del self._by_user[order.user_id]
+            return True
+
+    def by_user(self, user_id: str) -> Iterator[Order]:
+        with self._lock:
+            keys = list(self._by_user.get(user_id, ()))
+        return self._resolve(keys)
+
+    def all(self) -> Iterator[Order]:
+        with self._lock:
+            keys = list(self._by_created_at)
+        return self._resolve(keys)
+
+    def page(self, user_id: Optional[str], after: Optional[OrderKey],
+             limit: int) -> Tuple[List[Order], bool]:
+        with self._lock:
+            keys = self._by_created_at if user_id is None else self._by_user.get(user_id)
+            if keys is None:
+                return [], False
+            # Una clave de más para saber si hay otra página
+            found = keys.after(after or None, limit + 1)
+            return [self._by_id[key[1]] for key in found[:limit]], len(found) > limit
+
+    def _resolve(self, keys: List[OrderKey]) -> Iterator[Order]:
+        # Recorre una copia de las claves: las órdenes borradas después de copiarla se omiten
+        for key in keys:
+            order = self._by_id.get(key[1])
+            if order is not None:
+                yield order
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._by_id
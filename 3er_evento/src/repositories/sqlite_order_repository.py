@@ -0,0 +1,287 @@
+"""
+Repositorio de órdenes persistente sobre SQLite en modo WAL, con commit agrupado de inserciones
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..enum.order import OrderStatus
+from ..interface.order_repository import OrderRepository
+from ..models.order import Order
+
+
+OrderKey = Tuple[datetime, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    items TEXT NOT NULL,
+    total REAL NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_created_at ON orders (created_at, id);
+CREATE INDEX IF NOT EXISTS orders_user_created_at ON orders (user_id, created_at, id);
+"""
+
+# Sentencias constantes: sqlite3 las mantiene preparadas en la caché de cada conexión
+INSERT_ORDER = "INSERT OR REPLACE INTO orders (id, user_id, items, total, status, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+SELECT_ORDER = "SELECT id, user_id, items, total, status, created_at FROM orders WHERE id = ?"
+DELETE_ORDER = "DELETE FROM orders WHERE id = ?"
+COUNT_ORDERS = "SELECT COUNT(*) FROM orders"
+SELECT_ALL = "SELECT id, user_id, items, total, status, created_at FROM orders ORDER BY created_at, id"
+SELECT_BY_USER = ("SELECT id, user_id, items, total, status, created_at FROM orders "
+                  "WHERE user_id = ? ORDER BY created_at, id")
+PAGE_ALL = ("SELECT id, user_id, items, total, status, created_at FROM orders "
+            "WHERE (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?")
+PAGE_BY_USER = ("SELECT id, user_id, items, total, status, created_at FROM orders "
+                "WHERE user_id = ? AND (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?")
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+logger = logging.getLogger(__name__)
+
+
+class OrderCommitError(Exception):
+    # El lote que contenía la orden no pudo confirmarse: la orden no se ha guardado
+    pass
+
+
+class SQLiteOrderRepository(OrderRepository):
+
+    def __init__(self, path: str, synchronous: str = "NORMAL", wait_for_commit: bool = False,
+                 batch_size: int = 1000, flush_interval: float = 0.0, pool_size: int = 8,
+                 max_retries: int = 5, retry_backoff: float = 0.05):
+        if synchronous.upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous debe ser uno de {SYNCHRONOUS_MODES}")
+
+        self.path = path
+        self.synchronous = synchronous.upper()
+        self.wait_for_commit = wait_for_commit
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pool_size = pool_size
+        # Errores de SQLite (p. ej. SQLITE_BUSY con varios workers): el escritor reintenta el lote con
+        # espera exponencial y, agotados los intentos, lo descarta despertando a quien esperaba
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._lock = threading.Lock()
+        self._committed = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._full = threading.Event()
+        self._pending: Dict[str, Order] = {}
+        self._flushing: Dict[str, Order] = {}
+        self._batch = 0
+        self._committed_batch = 0
+        # Un lote reintentado se fusiona con el siguiente: los fallos se recuerdan por orden
+        self._failed_orders: Dict[str, Exception] = {}
+        self._closed = False
+        self._pid = None
+
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def add(self, order: Order):
+        self._ensure_writer()
+        with self._lock:
+            self._pending[order.id] = order
+            batch = self._batch
+            if len(self._pending) == 1:
+                self._wake.set()
+            if len(self._pending) >= self.batch_size:
+                self._full.set()
+
+        if self.wait_for_commit:
+            # Commit agrupado: la petición espera a que su lote completo quede confirmado
+            with self._lock:
+                while self._committed_batch <= batch:
+                    self._committed.wait()
+                error = self._failed_orders.pop(order.id, None)
+            if error is not None:
+                raise OrderCommitError(f"No se pudo guardar la orden {order.id}") from error
+
+    def get(self, order_id: str) -> Optional[Order]:
+        with self._lock:
+            order = self._pending.get(order_id) or self._flushing.get(order_id)
+        if order is not None:
+            return order
+
+        with self._connection() as connection:
+            row = connection.execute(SELECT_ORDER, (order_id,)).fetchone()
+        return self._to_order(row) if row else None
+
+    def delete(self, order_id: str) -> bool:
+        self.flush()
+        with self._connection() as connection:
+            with connection:
+                deleted = connection.execute(DELETE_ORDER, (order_id,)).rowcount
+        return deleted > 0
+
+    def by_user(self, user_id: str) -> Iterator[Order]:
+        self.flush()
+        with self._connection() as connection:
+            rows = connection.execute(SELECT_BY_USER, (user_id,)).fetchall()
+        return (self._to_order(row) for row in rows)
+
+    def all(self) -> Iterator[Order]:
+        self.flush()
+        with self._connection() as connection:
+            rows = connection.execute(SELECT_ALL).fetchall()
+        return (self._to_order(row) for row in rows)
+
+    def page(self, user_id: Optional[str], after: Optional[OrderKey],
+             limit: int) -> Tuple[List[Order], bool]:
+        self.flush()
+        created_at, order_id = (self._format_datetime(after[0]), after[1]) if after else ("", "")
+        with self._connection() as connection:
+            if user_id is None:
+                rows = connection.execute(PAGE_ALL, (created_at, order_id, limit + 1)).fetchall()
+            else:
+                rows = connection.execute(PAGE_BY_USER, (user_id, created_at, order_id, limit + 1)).fetchall()
+        return [self._to_order(row) for row in rows[:limit]], len(rows) > limit
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._connection() as connection:
+            return connection.execute(COUNT_ORDERS).fetchone()[0]
+
+    def flush(self):
+        # Confirma en una sola transacción todas las inserciones acumuladas
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._flushing, self._pending = self._pending, {}
+                batch = self._batch
+                self._batch += 1
+
+            try:
+                rows = [self._to_row(order) for order in self._flushing.values()]
+                with self._connection() as connection:
+                    with connection:
+                        connection.executemany(INSERT_ORDER, rows)
+            except sqlite3.Error:
+                # El lote vuelve a quedar pendiente para el siguiente intento
+                with self._lock:
+                    self._pending = {**self._flushing, **self._pending}
+                    self._flushing = {}
+                raise
+            except Exception as error:
+                # Una orden que no se puede convertir a fila no se arregla reintentando
+                self._fail_batch(batch, error)
+                raise
+
+            with self._lock:
+                self._flushing = {}
+                self._committed_batch = batch + 1
+                self._committed.notify_all()
+
+    def _fail_batch(self, batch: int, error: Exception):
+        with self._lock:
+            logger.error("Lote %d descartado (%d órdenes): %s", batch, len(self._flushing), error)
+            if self.wait_for_commit:
+                self._failed_orders.update(dict.fromkeys(self._flushing, error))
+            self._flushing = {}
+            self._committed_batch = batch + 1
+            self._committed.notify_all()
+
+    def _fail_pending(self, error: Exception):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._flushing, self._pending = self._pending, {}
+                batch = self._batch
+                self._batch += 1
+            self._fail_batch(batch, error)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._full.set()
+        if self._pid == os.getpid():
+            self._writer.join()
+        self.flush()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def _ensure_writer(self):
+        # Pool y escritor son por proceso: tras un fork se crean de nuevo en el hijo
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pool = queue.LifoQueue(maxsize=self.pool_size)
+            self._writer = threading.Thread(target=self._run_writer, name="sqlite-group-commit", daemon=True)
+            self._pid = os.getpid()
+            self._writer.start()
+
+    def _run_writer(self):
+        # Se despierta con la primera inserción pendiente; las que llegan mientras se confirma
+        # un lote forman el siguiente. flush_interval > 0 añade una espera para agrupar más.
+        failures = 0
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            try:
+                self.flush()
+                failures = 0
+            except sqlite3.Error as error:
+                failures += 1
+                if failures > self.max_retries:
+                    self._fail_pending(error)
+                    failures = 0
+                    continue
+                logger.warning("Fallo al confirmar el lote (intento %d): %s", failures, error)
+                time.sleep(self.retry_backoff * 2 ** (failures - 1))
+                self._wake.set()
+            except Exception:
+                # El lote ya se descartó en flush y sus esperas se despertaron con el error
+                failures = 0
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        self._ensure_writer()
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            yield connection
+        finally:
+            try:
+                self._pool.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64,
+                                     isolation_level="DEFERRED")
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        return connection
+
+    def _to_row(self, order: Order) -> tuple:
+        return (order.id, order.user_id, json.dumps(order.items), order.total,
+                order.status.value, self._format_datetime(order.created_at))
+
+    def _to_order(self, row: tuple) -> Order:
+        order_id, user_id, items, total, status, created_at = row
+        return Order(id=order_id, user_id=user_id, items=json.loads(items), total=total,
+                     created_at=datetime.fromisoformat(created_at), status=OrderStatus(status))
+
+    def _format_datetime(self, value: datetime) -> str:
+        # Ancho fijo para que el orden de texto coincida con el cronológico
+        return value.isoformat(timespec="microseconds")
@@ -1,34 +1,77 @@
+import hashlib
+import hmac
+import os
+import threading
 from typing import Optional, Dict
 from ..models.user import User
+from ..utils.lru_cache import LRUCache
+from ..utils.password_hasher import PasswordHasher
+
+
+# Usuarios semilla con la contraseña ya derivada, como estarían guardados en una base de datos
+DEFAULT_USERS = [
+    ("admin", "pbkdf2_sha256$100000$e89a07bece0e6ee7f25122152dd8f85a$0967f3b0e9a8e694ac86ca6b4ac08553aad3610bf159436b9593522af2cafc6f", True),
+    ("user1", "pbkdf2_sha256$100000$af794071382c8787c948ab204093d240$129d31b2757af827890c1d7afb2c46e41e57447e2800ed756d71c7160cfd283d", False),
+    ("user2", "pbkdf2_sha256$100000$0f001ce37169cfcb8750fba1774a54a5$b4f12b4da739c3223cfafd27c2a4d2221a0d774eb2e4943309bc28f973cf202c", False),
+    ("manager", "pbkdf2_sha256$100000$62bc774f3810ff77ae20907be42f629b$3426f229bbad21053b97855e9a9ce556059145d46083a8628f5fad1bb5607a47", True),
+]
 
 
 class AuthService:
 
-    def __init__(self):
-        self.users_db = [
-            User(username="admin", password="admin123", is_admin=True),
-            User(username="user1", password="password123", is_admin=False),
-            User(username="user2", password="mypassword", is_admin=False),
-            User(username="manager", password="manager456", is_admin=True),
-        ]
+    def __init__(self, hasher: Optional[PasswordHasher] = None, cache_size: int = 10000,
+                 cache_ttl: float = 30):
+        self.hasher = hasher or PasswordHasher()
+        self.users_db: Dict[str, User] = {
+            username: User(username=username, password=password_hash, is_admin=is_admin)
+            for username, password_hash, is_admin in DEFAULT_USERS
+        }
+        # Credenciales verificadas recientemente, indexadas por un HMAC con clave propia del proceso
+        self.verification_cache = LRUCache(max_entries=cache_size, ttl=cache_ttl)
+        self._cache_secret = os.urandom(32)
+        self._users_lock = threading.Lock()
+        self._dummy_hash: Optional[str] = None
 
     def authenticate(self, username: str, password: str) -> Optional[User]:
         if not username or not password:
             return None
 
-        user : User = next((u for u in self.users_db if u.username == username), None)
-        if not user or  user.password != password:
+        user = self.users_db.get(username)
+        if not user:
+            # Mismo coste que una contraseña incorrecta: el tiempo de respuesta no delata qué usuarios existen
+            self.hasher.verify(password, self._get_dummy_hash())
             return None
+
+        credential_digest = hmac.new(self._cache_secret, f"{username}\0{password}".encode(),
+                                     hashlib.sha256).digest()
+        # El valor guardado es el hash vigente: si la contraseña cambia, la entrada deja de valer
+        if self.verification_cache.get(credential_digest) == user.password:
+            return user
+
+        if not self.hasher.verify(password, user.password):
+            return None
+
+        self.verification_cache.set(credential_digest, user.password)
         authenticated_user = user
         return authenticated_user
 
+    def _get_dummy_hash(self) -> str:
+        # Se deriva con el hasher configurado para que cueste las mismas iteraciones que uno real
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hasher.hash(os.urandom(16).hex())
+        return self._dummy_hash
+
     def create_user(self, username: str, password: str, is_admin: bool = False) -> bool:
 
         if username in self.users_db:
             return False
         
-        user = User(username=username, password=password, is_admin=is_admin)
-        self.users_db.append(user)
+        user = User(username=username, password=self.hasher.hash(password), is_admin=is_admin)
+        # Comprobar y dar de alta de forma atómica: dos altas simultáneas no se pisan
+        with self._users_lock:
+            if username in self.users_db:
+                return False
+            self.users_db[username] = user
         return True
 
     def validate_credentials_format(self, username: str, password: str) -> bool:
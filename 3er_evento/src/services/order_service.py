@@ -5,20 +5,35 @@ from ..models.request import Request
 from ..models.response import Response
 from ..models.order import Order
 from ..enum.status_code import StatusCode
-from ..interface.request_handler import RequestHandler
+from ..interface.order_repository import OrderRepository
+from ..repositories.in_memory_order_repository import InMemoryOrderRepository
+from ..utils.pagination import OrderPage, OrderView, encode_cursor, decode_cursor
+from ..utils.invalidation import ALL_ORDERS_TAG, InvalidationBus, order_tag, user_tag
 
 
 class OrderService():
 
-    def __init__(self):
-        self.orders_db = [
-            Order(id="1", user_id="user1", items=[
-                  "item1", "item2"], total=100.0, created_at=datetime.now()),
-            Order(id="2", user_id="user2", items=[
-                  "item3"], total=50.0, created_at=datetime.now()),
-            Order(id="3", user_id="user1", items=[
-                  "item4", "item5"], total=150.0, created_at=datetime.now()),
-        ]
+    orders_db: OrderRepository
+
+    def __init__(self, repository: Optional[OrderRepository] = None,
+                 default_page_size: int = 100, max_page_size: int = 10000,
+                 invalidation: Optional[InvalidationBus] = None):
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+        # Cada escritura publica las etiquetas afectadas para que las cachés suscritas las descarten
+        self.invalidation = invalidation if invalidation is not None else InvalidationBus()
+
+        if repository is None:
+            repository = InMemoryOrderRepository([
+                Order(id="1", user_id="user1", items=[
+                      "item1", "item2"], total=100.0, created_at=datetime.now()),
+                Order(id="2", user_id="user2", items=[
+                      "item3"], total=50.0, created_at=datetime.now()),
+                Order(id="3", user_id="user1", items=[
+                      "item4", "item5"], total=150.0, created_at=datetime.now()),
+            ])
+
+        self.orders_db = repository
 
     def _create_order(self, request: Request, items: list, total: float) -> Response:
         user = request.authenticated_user
@@ -40,48 +55,62 @@ class OrderService():
             created_at=datetime.now(),
         )
 
-        self.orders_db.append(order)
+        self.orders_db.add(order)
+        self.invalidation.publish(user_tag(order.user_id), ALL_ORDERS_TAG)
 
         return Response(
             status_code=StatusCode.CREATED,
             headers={"Location": f"/orders/{order_id}"},
             body={
                 "message": "Orden creada exitosamente",
-                "order": order.to_json()
+                "order": OrderView(order)
             }
         )
 
-    def _get_orders(self, request: Request) -> Response:
+    def _get_orders(self, request: Request, limit: Optional[int] = None,
+                    after: Optional[str] = None) -> Response:
 
         user = request.authenticated_user
 
-        if user.is_admin:
-            user_orders = list(self.orders_db)
-        else:
-            user_orders = [order for order in self.orders_db if order.user_id == user.username]
+        limit = self.default_page_size if limit is None else limit
+        if limit < 1 or limit > self.max_page_size:
+            return Response(
+                status_code=StatusCode.BAD_REQUEST,
+                headers={},
+                body={"error": f"El límite debe estar entre 1 y {self.max_page_size}",
+                      "code": "INVALID_LIMIT"}
+            )
 
-        orders_data = []
-        for order in user_orders:
-            orders_data.append({
-                "id": order.id,
-                "user_id": order.user_id,
-                "items": order.items,
-                "total": order.total,
-                "status": order.status,
-                "created_at": order.created_at.isoformat()
-            })
+        after_key = None
+        if after:
+            after_key = decode_cursor(after)
+            if after_key is None:
+                return Response(
+                    status_code=StatusCode.BAD_REQUEST,
+                    headers={},
+                    body={"error": "Cursor inválido", "code": "INVALID_CURSOR"}
+                )
 
+        orders, has_more = self.orders_db.page(
+            None if user.is_admin else user.username, after_key, limit)
+        page = OrderPage(orders)
 
         return Response(
             status_code=StatusCode.OK,
             headers={},
-            body={"orders": orders_data, "count": len(orders_data)}
+            body={
+                "orders": page,
+                "count": len(page),
+                "next_cursor": encode_cursor(orders[-1]) if has_more else None
+            }
         )
 
     def _get_order(self, request: Request, order_id: str) -> Response:
         user = request.authenticated_user
 
-        if order_id not in [order.id for order in self.orders_db]:
+        order = self.orders_db.get(order_id)
+
+        if order is None:
             return Response(
                 status_code=StatusCode.NOT_FOUND,
                 headers={},
@@ -89,8 +118,6 @@ class OrderService():
                       "code": StatusCode.NOT_FOUND}
             )
 
-        order = next(order for order in self.orders_db if order.id == order_id)
-
         if not user.is_admin and order.user_id != user.username:
             return Response(
                 status_code=StatusCode.FORBIDDEN,
@@ -102,16 +129,7 @@ class OrderService():
         return Response(
             status_code=StatusCode.OK,
             headers={},
-            body={
-                "order": {
-                    "id": order.id,
-                    "user_id": order.user_id,
-                    "items": order.items,
-                    "total": order.total,
-                    "status": order.status,
-                    "created_at": order.created_at.isoformat()
-                }
-            }
+            body={"order": OrderView(order)}
         )
 
     def _delete_order(self, request: Request, order_id: str) -> Response:
@@ -125,7 +143,8 @@ class OrderService():
                       "code": StatusCode.FORBIDDEN}
             )
 
-        if order_id not in [order.id for order in self.orders_db]:
+        order = self.orders_db.get(order_id)
+        if order is None or not self.orders_db.delete(order_id):
             return Response(
                 status_code=StatusCode.NOT_FOUND,
                 headers={},
@@ -133,7 +152,7 @@ class OrderService():
                       "code": StatusCode.NOT_FOUND}
             )
 
-        self.orders_db = [order for order in self.orders_db if order.id != order_id]
+        self.invalidation.publish(order_tag(order_id), user_tag(order.user_id), ALL_ORDERS_TAG)
 
         return Response(
             status_code=StatusCode.OK,
@@ -0,0 +1,176 @@
+"""
+Parser incremental de HTTP/1.1 sobre un único buffer, con cortes por memoryview y serialización de respuestas
+"""
+import json
+from datetime import datetime
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+from ..models.request import Request
+from ..models.response import Response
+from ..enum.status_code import StatusCode
+from .serialization import encode_body
+
+
+HEADER_END = b"\r\n\r\n"
+
+
+class HttpParseError(Exception):
+
+    def __init__(self, status_code: StatusCode, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        # Peticiones completas que precedían al error en el mismo buffer: se responden antes del error
+        self.requests: List[Tuple[Request, bool]] = []
+
+
+class HttpRequestParser:
+    # Acumula los bytes de una conexión y devuelve todas las peticiones completas que contengan;
+    # los bytes consumidos se descartan una vez por lectura, no una vez por petición
+
+    def __init__(self, ip_address: str, max_header_bytes: int = 65536, max_body_bytes: int = 1 << 20):
+        self.ip_address = ip_address
+        self.max_header_bytes = max_header_bytes
+        self.max_body_bytes = max_body_bytes
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[Request, bool]]:
+        self._buffer += data
+        parsed = []
+        try:
+            self._parse_all(parsed)
+        except HttpParseError as error:
+            error.requests = parsed
+            raise
+        return parsed
+
+    def _parse_all(self, parsed: List[Tuple[Request, bool]]):
+        start = 0
+        with memoryview(self._buffer) as view:
+            while True:
+                header_end = self._buffer.find(HEADER_END, start)
+                if header_end < 0:
+                    if len(self._buffer) - start > self.max_header_bytes:
+                        raise HttpParseError(StatusCode.BAD_REQUEST, "Cabeceras demasiado grandes")
+                    break
+                if header_end - start > self.max_header_bytes:
+                    raise HttpParseError(StatusCode.BAD_REQUEST, "Cabeceras demasiado grandes")
+
+                method, target, version, headers = self._parse_head(view[start:header_end])
+                body_start = header_end + len(HEADER_END)
+                length = self._content_length(headers)
+                if len(self._buffer) - body_start < length:
+                    break
+
+                body = self._parse_body(view[body_start:body_start + length]) if length else {}
+                keep_alive = self._keep_alive(version, headers)
+                parsed.append((Request(method=method, path=target, headers=headers, body=body,
+                                       ip_address=self.ip_address, timestamp=datetime.now()),
+                               keep_alive))
+                start = body_start + length
+                if not keep_alive:
+                    break
+
+        if start:
+            del self._buffer[:start]
+
+    def _parse_head(self, head: memoryview) -> Tuple[str, str, str, Dict[str, str]]:
+        # latin-1 decodifica cualquier byte sin copiar antes el corte a un bytes intermedio
+        lines = str(head, "latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HttpParseError(StatusCode.BAD_REQUEST, "Línea de petición inválida")
+        if not method.isalpha() or not method.isupper() or not version.startswith("HTTP/1."):
+            raise HttpParseError(StatusCode.BAD_REQUEST, "Línea de petición inválida")
+
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(":")
+            if not separator or not name or name != name.strip():
+                raise HttpParseError(StatusCode.BAD_REQUEST, "Cabecera inválida")
+            headers[canonical_header(name)] = value.strip()
+        return method, target, version, headers
+
+    def _content_length(self, headers: Dict[str, str]) -> int:
+        if "Transfer-Encoding" in headers:
+            raise HttpParseError(StatusCode.BAD_REQUEST, "Transfer-Encoding no soportado")
+        value = headers.get("Content-Length")
+        if value is None:
+            return 0
+        # isdigit() solo también acepta dígitos Unicode como "²", que int() rechaza
+        if not (value.isascii() and value.isdigit()):
+            raise HttpParseError(StatusCode.BAD_REQUEST, "Content-Length inválido")
+        length = int(value)
+        if length > self.max_body_bytes:
+            raise HttpParseError(StatusCode.PAYLOAD_TOO_LARGE, "Cuerpo demasiado grande")
+        return length
+
+    def _parse_body(self, body: memoryview) -> dict:
+        try:
+            data = json.loads(str(body, "utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            raise HttpParseError(StatusCode.BAD_REQUEST, "El cuerpo debe ser JSON")
+        if not isinstance(data, dict):
+            raise HttpParseError(StatusCode.BAD_REQUEST, "El cuerpo debe ser un objeto JSON")
+        return data
+
+    def _keep_alive(self, version: str, headers: Dict[str, str]) -> bool:
+        connection = headers.get("Connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+_canonical_headers: Dict[str, str] = {}
+
+
+def canonical_header(name: str) -> str:
+    # Los handlers consultan las cabeceras como "Authorization"; los clientes pueden enviarlas en minúsculas
+    canonical = _canonical_headers.get(name)
+    if canonical is None:
+        canonical = name.title()
+        if len(_canonical_headers) < 1024:
+            _canonical_headers[name] = canonical
+    return canonical
+
+
+_status_lines: Dict[int, bytes] = {}
+
+
+def status_line(code: int) -> bytes:
+    line = _status_lines.get(code)
+    if line is None:
+        try:
+            reason = HTTPStatus(code).phrase
+        except ValueError:
+            reason = "Unknown"
+        line = _status_lines[code] = f"HTTP/1.1 {code} {reason}\r\n".encode()
+    return line
+
+
+def serialize_response(response: Optional[Response], keep_alive: bool) -> bytes:
+    if response is None:
+        response = Response(status_code=StatusCode.SERVER_ERROR, headers={},
+                            body={"error": "Sin respuesta", "code": StatusCode.SERVER_ERROR})
+
+    # 304 no lleva cuerpo ni Content-Length: el cliente reutiliza la representación que ya tiene
+    not_modified = response.status_code is StatusCode.NOT_MODIFIED
+    if not_modified:
+        body = b""
+    else:
+        body = response.payload if response.payload is not None else encode_body(response.body)
+    head = [status_line(response.status_code.value)]
+    for name, value in response.headers.items():
+        if name not in ("Content-Length", "Connection"):
+            head.append(f"{name}: {value}\r\n".encode("latin-1"))
+    if not not_modified:
+        head.append(b"Content-Length: %d\r\n" % len(body))
+    head.append(b"Connection: keep-alive\r\n\r\n" if keep_alive else b"Connection: close\r\n\r\n")
+    head.append(body)
+    return b"".join(head)
+
+
+def error_response(error: HttpParseError) -> Response:
+    return Response(status_code=error.status_code, headers={},
+                    body={"error": error.message, "code": error.status_code})
@@ -0,0 +1,188 @@
+"""
+Instrumentación opcional de la cadena: histogramas de latencia por handler, cortocircuitos,
+aciertos de caché y un gancho de spans al estilo OpenTelemetry
+"""
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    # Server importa este módulo: los modelos sólo hacen falta para las anotaciones
+    from ..models.request import Request
+    from ..models.response import Response
+
+
+class LatencyHistogram:
+    # Cubetas logarítmicas con 4 subdivisiones por potencia de dos: error relativo ≤ 25 %
+
+    def __init__(self):
+        self.counts = array("Q", [0]) * 252
+        self.count = 0
+        self.total_ns = 0
+
+    def record(self, ns: int):
+        bits = ns.bit_length()
+        index = ns if bits < 4 else 8 + (bits - 4) * 4 + ((ns >> (bits - 3)) & 3)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ns += ns
+
+    def percentile(self, fraction: float) -> int:
+        # Devuelve el límite superior de la cubeta donde cae el percentil
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * fraction + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self._upper_bound(index)
+        return self._upper_bound(len(self.counts) - 1)
+
+    def _upper_bound(self, index: int) -> int:
+        if index < 8:
+            return index + 1
+        bits, sub = divmod(index - 8, 4)
+        return (5 + sub) << (bits + 1)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) / 1e6,
+            "p90_ms": self.percentile(0.90) / 1e6,
+            "p99_ms": self.percentile(0.99) / 1e6,
+        }
+
+
+class HandlerStats:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        # inclusive: el handler y todo lo que hay detrás; self: sólo el propio handler
+        self.inclusive = LatencyHistogram()
+        self.exclusive = LatencyHistogram()
+        self.short_circuits: Counter = Counter()
+        self.cache_hits = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "inclusive": self.inclusive.snapshot(),
+            "self": self.exclusive.snapshot(),
+            "short_circuits": dict(self.short_circuits),
+            "cache_hits": self.cache_hits,
+        }
+
+
+class Instrumentation:
+    # Envuelve el handle de cada handler con un atributo de instancia; al desconectarse se borra
+    # y la cadena vuelve a llamar al método de la clase, sin ningún coste residual
+
+    def __init__(self, span_hook: Optional[Callable[..., ContextManager]] = None,
+                 clock: Callable[[], int] = time.perf_counter_ns):
+        # span_hook(nombre, attributes={...}) devuelve un context manager, como
+        # tracer.start_as_current_span de OpenTelemetry
+        self.span_hook = span_hook
+        self.clock = clock
+        self.stats: Dict[str, HandlerStats] = {}
+        self.requests = 0
+        self._handlers: List[Any] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def attach(self, handlers: Iterable[Any]):
+        self.detach()
+        self.stats = {}
+        handlers = list(handlers)
+        for position, handler in enumerate(handlers):
+            name = type(handler).__name__
+            if name in self.stats:
+                name = f"{name}#{sum(1 for key in self.stats if key.split('#')[0] == name) + 1}"
+            stats = self.stats[name] = HandlerStats(name)
+            handler.handle = self._wrap(handler.handle, stats, is_head=position == 0,
+                                        is_tail=position == len(handlers) - 1)
+            self._handlers.append(handler)
+
+    def detach(self):
+        for handler in self._handlers:
+            handler.__dict__.pop("handle", None)
+        self._handlers = []
+
+    def reset(self):
+        with self._lock:
+            for stats in self.stats.values():
+                stats.reset()
+            self.requests = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            handlers = {name: stats.snapshot() for name, stats in self.stats.items()}
+            cache_hits = sum(stats.cache_hits for stats in self.stats.values())
+            requests = self.requests
+        return {
+            "requests": requests,
+            "cache_hit_ratio": cache_hits / requests if requests else 0.0,
+            "handlers": handlers,
+        }
+
+    def _wrap(self, handle: Callable[['Request'], Optional['Response']], stats: HandlerStats,
+              is_head: bool, is_tail: bool) -> Callable[['Request'], Optional['Response']]:
+        local = self._local
+        clock = self.clock
+        lock = self._lock
+        span_hook = self.span_hook
+        inclusive = stats.inclusive
+        exclusive = stats.exclusive
+
+        def measured(request: 'Request'):
+            # Por hilo: [ns de los handlers siguientes, entradas en handlers instrumentados],
+            # para separar el tiempo propio y saber si la petición se cortó aquí
+            state = local.__dict__.get("state")
+            if state is None:
+                state = local.state = [0, 0]
+            outer_child_ns = state[0]
+            state[0] = 0
+            state[1] = entries = state[1] + 1
+            start = clock()
+            try:
+                response = handle(request)
+            finally:
+                elapsed = clock() - start
+                child_ns = state[0]
+                state[0] = outer_child_ns + elapsed
+
+            short_circuit = response is not None and not is_tail and state[1] == entries
+            with lock:
+                stats.calls += 1
+                inclusive.record(elapsed)
+                exclusive.record(elapsed - child_ns if elapsed > child_ns else 0)
+                if short_circuit:
+                    stats.short_circuits[response.status_code.value] += 1
+                    if response.is_from_cache:
+                        stats.cache_hits += 1
+                if is_head:
+                    self.requests += 1
+            return response, short_circuit
+
+        if span_hook is None:
+            def instrumented(request: 'Request') -> Optional['Response']:
+                return measured(request)[0]
+            return instrumented
+
+        def traced(request: 'Request') -> Optional['Response']:
+            attributes = {"http.method": request.method, "http.target": request.path}
+            with span_hook(stats.name, attributes=attributes) as span:
+                response, short_circuit = measured(request)
+                if response is not None and span is not None:
+                    span.set_attribute("http.status_code", response.status_code.value)
+                    span.set_attribute("handler.short_circuit", short_circuit)
+            return response
+
+        return traced
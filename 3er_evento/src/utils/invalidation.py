@@ -0,0 +1,40 @@
+"""
+Bus de invalidación por etiquetas: el servicio de órdenes publica qué datos cambiaron y las cachés suscritas
+descartan las respuestas que dependían de ellos
+"""
+import threading
+from typing import Callable, List, Tuple
+
+
+# Listados de administrador: dependen de las órdenes de todos los usuarios
+ALL_ORDERS_TAG = "orders:*"
+
+
+def user_tag(username: str) -> str:
+    return f"user:{username}"
+
+
+def order_tag(order_id: str) -> str:
+    return f"order:{order_id}"
+
+
+class InvalidationBus:
+
+    def __init__(self):
+        self._listeners: List[Callable[[Tuple[str, ...]], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[Tuple[str, ...]], None]):
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Tuple[str, ...]], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def publish(self, *tags: str):
+        # Síncrono: cuando la escritura responde, ninguna caché suscrita sirve ya el dato anterior
+        for listener in tuple(self._listeners):
+            listener(tags)
@@ -0,0 +1,158 @@
+"""
+Caché LRU acotada por entradas y bytes, con expiración perezosa mediante una rueda de tiempo
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    slot: int
+
+
+class LRUCache:
+
+    def __init__(self, max_entries: int = 10000, max_bytes: Optional[int] = None,
+                 ttl: float = 300, resolution: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.resolution = resolution
+        self.clock = clock
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._wheel: Dict[int, Set[Hashable]] = {}
+        self._cursor = int(clock() / resolution)
+        # Hasta un get reordena la lista LRU: todas las operaciones pasan por el mismo cerrojo
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > self.clock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        now = self.clock()
+        self._expire(now)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, size: int = 0, ttl: Optional[float] = None):
+        with self._lock:
+            self._set(key, value, size, ttl)
+
+    def _set(self, key: Hashable, value: Any, size: int, ttl: Optional[float]):
+        now = self.clock()
+        self._expire(now)
+
+        if key in self._entries:
+            self._remove(key)
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        slot = int(expires_at / self.resolution)
+        self._entries[key] = CacheEntry(value=value, size=size, expires_at=expires_at, slot=slot)
+        self._wheel.setdefault(slot, set()).add(key)
+        self.current_bytes += size
+        self._evict()
+
+    def charge(self, key: Hashable, value: Any, size: int):
+        # Suma size a una entrada que creció después de guardarse, si key sigue guardando ese valor
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.value is not value:
+                return
+            entry.size += size
+            self.current_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.current_bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._wheel.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+        bucket = self._wheel.get(entry.slot)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._wheel[entry.slot]
+
+    def _expire(self, now: float):
+        # Sólo se visitan las ranuras vencidas desde la última llamada: coste amortizado O(1)
+        slot = int(now / self.resolution)
+        if slot <= self._cursor:
+            return
+
+        if slot - self._cursor > len(self._wheel):
+            due = [s for s in self._wheel if s < slot]
+        else:
+            due = range(self._cursor, slot)
+
+        for s in due:
+            for key in self._wheel.pop(s, ()):
+                entry = self._entries.pop(key)
+                self.current_bytes -= entry.size
+                self.expirations += 1
+
+        self._cursor = slot
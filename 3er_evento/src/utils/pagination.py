@@ -0,0 +1,82 @@
+"""
+Paginación por cursor de órdenes y serialización perezosa de cada página
+"""
+import base64
+from datetime import datetime
+from enum import Enum
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # models -> Server -> OrderService -> este módulo: Order sólo hace falta para las anotaciones
+    from ..models.order import Order
+
+
+OrderKey = Tuple[datetime, str]
+
+
+def encode_cursor(order: 'Order') -> str:
+    raw = f"{order.created_at.isoformat()}|{order.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[OrderKey]:
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    # Las fechas de las órdenes son naive: un cursor con zona no es comparable con ellas (TypeError)
+    # y encode_cursor nunca lo genera
+    if created_at.tzinfo is not None:
+        return None
+    return created_at, order_id
+
+
+class OrderPage:
+    # Vista reiterable de una página: cada dict se genera al recorrerla, nunca se guarda la lista
+
+    def __init__(self, orders: List['Order']):
+        self.orders = orders
+
+    def __iter__(self) -> Iterator[dict]:
+        for order in self.orders:
+            yield order.to_json()
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+
+class OrderView(Mapping):
+    # Una orden en el cuerpo de la respuesta: se lee como su dict JSON y se serializa con sus bytes cacheados
+
+    def __init__(self, order: 'Order'):
+        self.order = order
+        self._data: Optional[dict] = None
+
+    def _json(self) -> dict:
+        if self._data is None:
+            self._data = self.order.to_json()
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self._json()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._json())
+
+    def __len__(self) -> int:
+        return len(self._json())
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, OrderPage):
+        return list(value)
+    if isinstance(value, Mapping):
+        # OrderView y los mapeos de solo lectura de las respuestas compartidas
+        return dict(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,31 @@
+import hashlib
+import hmac
+import os
+
+
+class PasswordHasher:
+    # PBKDF2-SHA256 con sal aleatoria; el formato guarda las iteraciones para poder subirlas luego
+    algorithm = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = 100000):
+        self.iterations = iterations
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, self.iterations)
+        return f"{self.algorithm}${self.iterations}${salt.hex()}${digest.hex()}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        try:
+            algorithm, iterations, salt, expected = encoded.split("$")
+        except ValueError:
+            return False
+        if algorithm != self.algorithm:
+            return False
+
+        try:
+            digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), int(iterations))
+        except ValueError:
+            # Sal o iteraciones corruptas en el hash guardado: se trata como contraseña incorrecta
+            return False
+        return hmac.compare_digest(digest.hex(), expected)
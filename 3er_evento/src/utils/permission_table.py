@@ -0,0 +1,68 @@
+"""
+Tabla de permisos compilada: trie de prefijos por segmentos del path, con comodines y roles
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+WILDCARD = "*"
+
+
+class PermissionNode:
+
+    def __init__(self):
+        self.children: Dict[str, 'PermissionNode'] = {}
+        # método (o "*") -> rol requerido; None permite a cualquier usuario autenticado
+        self.rules: Dict[str, Optional[str]] = {}
+
+
+class PermissionTable:
+    # Una regla sobre un prefijo cubre todo su subárbol; decide la regla más profunda y literal que coincida
+
+    def __init__(self):
+        self.root = PermissionNode()
+
+    def add_rule(self, method: str, pattern: str, role: Optional[str]):
+        node = self.root
+        for segment in self._segments(pattern):
+            node = node.children.setdefault(segment, PermissionNode())
+        node.rules[method.upper()] = role
+
+    def required_role(self, method: str, path: str) -> Optional[str]:
+        method = method.upper()
+        best: Tuple[int, int, int, int] = (-1, -1, -1, -1)
+        role: Optional[str] = None
+
+        # Cada nodo alcanzado va con el número de segmentos literales de su camino
+        frontier: List[Tuple[PermissionNode, int]] = [(self.root, 0)]
+        segments = self._segments(path.partition("?")[0])
+        for depth in range(len(segments) + 1):
+            for node, literals in frontier:
+                for rule_method in (method, WILDCARD):
+                    if rule_method not in node.rules:
+                        continue
+                    candidate_role = node.rules[rule_method]
+                    # Más profunda, luego con más literales, luego específica del método,
+                    # y a igualdad la más restrictiva
+                    rank = (depth, literals, rule_method == method, candidate_role is not None)
+                    if rank > best:
+                        best, role = rank, candidate_role
+            if depth == len(segments):
+                break
+
+            segment = segments[depth]
+            next_frontier = []
+            for node, literals in frontier:
+                child = node.children.get(segment)
+                if child is not None:
+                    next_frontier.append((child, literals + 1))
+                child = node.children.get(WILDCARD)
+                if child is not None:
+                    next_frontier.append((child, literals))
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        return role
+
+    def _segments(self, path: str) -> List[str]:
+        return [segment for segment in path.split("/") if segment]
@@ -0,0 +1,75 @@
+"""
+Enrutador declarativo: las rutas se compilan en un trie por método, indexado por segmentos del path
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def route(method: str, pattern: str) -> Callable:
+    # Marca un método de controlador como manejador de la ruta; Router.register lo recoge
+    def decorator(function: Callable) -> Callable:
+        function.__dict__.setdefault("_routes", []).append((method.upper(), pattern))
+        return function
+    return decorator
+
+
+class RouteNode:
+
+    def __init__(self):
+        self.static: Dict[str, 'RouteNode'] = {}
+        self.param_name: Optional[str] = None
+        self.param: Optional['RouteNode'] = None
+        self.handler: Optional[Callable] = None
+
+
+class Router:
+
+    def __init__(self):
+        self.trees: Dict[str, RouteNode] = {}
+
+    def add_route(self, method: str, pattern: str, handler: Callable):
+        node = self.trees.setdefault(method.upper(), RouteNode())
+        for segment in self._segments(pattern):
+            if segment.startswith("{") and segment.endswith("}"):
+                name = segment[1:-1]
+                if node.param is None:
+                    node.param, node.param_name = RouteNode(), name
+                elif node.param_name != name:
+                    raise ValueError(f"Parámetro en conflicto en {pattern}: {{{node.param_name}}} y {segment}")
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, RouteNode())
+
+        if node.handler is not None:
+            raise ValueError(f"Ruta duplicada: {method.upper()} {pattern}")
+        node.handler = handler
+
+    def register(self, controller: Any):
+        for name in dir(type(controller)):
+            for method, pattern in getattr(getattr(type(controller), name), "_routes", ()):
+                self.add_route(method, pattern, getattr(controller, name))
+
+    def match(self, method: str, path: str) -> Optional[Tuple[Callable, Dict[str, str]]]:
+        root = self.trees.get(method.upper())
+        if root is None:
+            return None
+
+        segments = self._segments(path)
+        # Los segmentos estáticos tienen prioridad; sólo se retrocede al parámetro si el camino estático no llega
+        stack: List[Tuple[RouteNode, int, Dict[str, str]]] = [(root, 0, {})]
+        while stack:
+            node, depth, params = stack.pop()
+            if depth == len(segments):
+                if node.handler is not None:
+                    return node.handler, params
+                continue
+
+            segment = segments[depth]
+            if node.param is not None:
+                stack.append((node.param, depth + 1, {**params, node.param_name: segment}))
+            child = node.static.get(segment)
+            if child is not None:
+                stack.append((child, depth + 1, params))
+        return None
+
+    def _segments(self, path: str) -> List[str]:
+        return [segment for segment in path.split("/") if segment]
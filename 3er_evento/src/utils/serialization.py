@@ -0,0 +1,76 @@
+"""
+Serialización JSON de respuestas: bytes cacheados por orden y orjson cuando está instalado
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+from ..models.order import Order
+from .pagination import OrderPage, OrderView, json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Un único encoder: json.dumps con argumentos crea uno nuevo en cada llamada
+_encoder = json.JSONEncoder(default=json_default, ensure_ascii=False, separators=(",", ":"))
+_keys: Dict[str, bytes] = {}
+# Bytes de las órdenes más leídas, acotados: guardarlos en cada orden residente duplicaba su memoria
+ORDER_CACHE_SIZE = 10_000
+_orders: "OrderedDict[str, Tuple[tuple, bytes]]" = OrderedDict()
+_orders_lock = threading.Lock()
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return _encoder.encode(value).encode()
+
+
+def encode_key(key: str) -> bytes:
+    encoded = _keys.get(key)
+    if encoded is None:
+        encoded = dumps(key) + b":"
+        if len(_keys) < 1024:
+            _keys[key] = encoded
+    return encoded
+
+
+def encode_order(order: Order) -> bytes:
+    state = order.state()
+    with _orders_lock:
+        cached = _orders.get(order.id)
+        if cached is not None and cached[0] == state:
+            _orders.move_to_end(order.id)
+            return cached[1]
+
+    encoded = dumps(order.to_json())
+    if ORDER_CACHE_SIZE > 0:
+        with _orders_lock:
+            _orders[order.id] = (state, encoded)
+            _orders.move_to_end(order.id)
+            while len(_orders) > ORDER_CACHE_SIZE:
+                _orders.popitem(last=False)
+    return encoded
+
+
+def encode_page(page: OrderPage) -> bytes:
+    return b"[" + b",".join([encode_order(order) for order in page.orders]) + b"]"
+
+
+def encode_body(body: Any) -> bytes:
+    # Las órdenes se empalman como bytes ya codificados; el resto del cuerpo se codifica normalmente
+    if not isinstance(body, dict) or not any(isinstance(value, (OrderPage, OrderView))
+                                             for value in body.values()):
+        return dumps(body)
+    return b"{" + b",".join([encode_key(key) + encode_value(value) for key, value in body.items()]) + b"}"
+
+
+def encode_value(value: Any) -> bytes:
+    if isinstance(value, OrderPage):
+        return encode_page(value)
+    if isinstance(value, OrderView):
+        return encode_order(value.order)
+    return dumps(value)
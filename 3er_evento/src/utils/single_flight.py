@@ -0,0 +1,62 @@
+"""
+Single-flight: las llamadas concurrentes con la misma clave comparten una única ejecución
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+
+    def __init__(self, wait_timeout: Optional[float] = None):
+        # Un líder atascado no debe retener indefinidamente los hilos de los que esperan:
+        # pasado wait_timeout cada uno ejecuta la función por su cuenta
+        self.wait_timeout = wait_timeout
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        # Devuelve (resultado, compartido): compartido es True si se esperó a la ejecución de otro hilo
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                with self._lock:
+                    self.timeouts += 1
+                return function(), False
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = function()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
@@ -0,0 +1,80 @@
+"""
+Lista ordenada por tramos: insertar y borrar en cualquier posición desplazan un tramo, no toda la lista
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Iterator, List, Optional
+
+
+class SortedKeyList:
+    # Misma idea que sortedcontainers.SortedList: tramos ordenados de hasta 2 * load claves y la
+    # clave máxima de cada tramo para localizarlo por bisección. Coste por operación:
+    # O(log n) para encontrar el tramo más O(load) de desplazamiento dentro de él
+
+    def __init__(self, load: int = 512):
+        self.load = load
+        self._buckets: List[list] = []
+        self._maxes: list = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def add(self, key: Any):
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            return
+
+        index = bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            # Lo habitual: una orden nueva es la más reciente y va al final del último tramo
+            index -= 1
+            self._buckets[index].append(key)
+            self._maxes[index] = key
+        else:
+            insort(self._buckets[index], key)
+
+        bucket = self._buckets[index]
+        if len(bucket) > 2 * self.load:
+            tail = bucket[self.load:]
+            del bucket[self.load:]
+            self._buckets.insert(index + 1, tail)
+            self._maxes[index] = bucket[-1]
+            self._maxes.insert(index + 1, tail[-1])
+
+    def remove(self, key: Any) -> bool:
+        index = bisect_left(self._maxes, key)
+        if index == len(self._maxes):
+            return False
+        bucket = self._buckets[index]
+        position = bisect_left(bucket, key)
+        if position == len(bucket) or bucket[position] != key:
+            return False
+
+        del bucket[position]
+        self._len -= 1
+        if not bucket:
+            del self._buckets[index]
+            del self._maxes[index]
+        elif position == len(bucket):
+            self._maxes[index] = bucket[-1]
+        return True
+
+    def after(self, key: Optional[Any], limit: int) -> list:
+        # Hasta `limit` claves estrictamente mayores que key (todas desde el principio si key es None)
+        index = 0 if key is None else bisect_right(self._maxes, key)
+        if index == len(self._buckets):
+            return []
+        bucket = self._buckets[index]
+        start = 0 if key is None else bisect_right(bucket, key)
+        result = bucket[start:start + limit]
+        for index in range(index + 1, len(self._buckets)):
+            if len(result) >= limit:
+                break
+            result.extend(self._buckets[index][:limit - len(result)])
+        return result
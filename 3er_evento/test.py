@@ -1,18 +1,83 @@
+import asyncio
+import base64
+import contextlib
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
 import pytest
+from typing import Dict, Optional, Tuple
 from datetime import datetime
 from src.models.server import Server
+from src.models.async_server import AsyncServer
+from src.models.http_server import HttpServer
+from src.models.prefork_server import PreforkServer
+from src.models.threaded_server import ThreadedServer
+from src.interface.async_request_handler import AsyncRequestHandler
+from src.interface.request_handler import RequestHandler
 from src.models.request import Request
-from src.models.response import Response
+from src.models.response import DEFAULT_HEADERS, Response
 from src.models.user import User
 from src.handlers.authentication_handler import AuthenticationHandler
 from src.handlers.authorization_handler import AuthorizationHandler
 from src.handlers.data_validation_handler import DataValidationHandler
 from src.handlers.brute_force_protection_handler import BruteForceProtectionHandler
 from src.handlers.cache_handler import CacheHandler
+from src.handlers.compression_handler import CompressionHandler
 from src.utils.extract_basic import ExtractBasic
+from src.utils.lru_cache import LRUCache
+from src.utils.sorted_keys import SortedKeyList
+from src.utils.single_flight import SingleFlight
+from src.utils.password_hasher import PasswordHasher
+from src.utils.router import Router, route
+from src.utils.permission_table import PermissionTable
+from src.utils.http_parser import HttpParseError, HttpRequestParser, serialize_response
+from src.utils.instrumentation import Instrumentation
+from src.utils import serialization
+from src.utils.pagination import json_default
+from src.services.auth_service import AuthService
+from src.backends.memory_backend import InMemoryStateBackend
+from src.backends.shared_memory_backend import SharedMemoryStateBackend
+from src.models.order import Order
+from src.repositories.in_memory_order_repository import InMemoryOrderRepository
+from src.repositories.sqlite_order_repository import OrderCommitError, SQLiteOrderRepository
+from src.controllers.order import OrderController
+from src.services.order_service import OrderService
+from src.enum.order import OrderStatus
 from src.enum.status_code import StatusCode
 
 
+@pytest.fixture
+def make_request():
+    # Fábrica común de peticiones: cada test indica sólo lo que le importa.
+    # user deja la petición ya autenticada; credentials (usuario, contraseña) la hace pasar por la autenticación
+    def factory(method: str = "GET", path: str = "/orders", body: Optional[dict] = None,
+                ip_address: str = "10.0.0.1", headers: Optional[Dict[str, str]] = None,
+                user: Optional[str] = None, credentials: Optional[Tuple[str, str]] = None) -> Request:
+        request = Request(
+            method=method,
+            path=path,
+            headers=headers or {},
+            body={} if body is None else body,
+            ip_address=ip_address,
+            timestamp=datetime.now(),
+            user_credentials={"username": credentials[0], "password": credentials[1]} if credentials else None
+        )
+        if user is not None:
+            request.set_authenticated_user(User(username=user, password="x"))
+        return request
+    return factory
+
+
 class Test:
     @pytest.fixture
     def server(self):
@@ -242,7 +307,7 @@ class Test:
         response = server2.process_request(test_request)
         
         assert response is not None
-        assert hasattr(test_request, 'authenticated_user')
+        assert test_request.authenticated_user is not None
 
 
 class TestMiddlewareIndividual:
@@ -263,7 +328,7 @@ class TestMiddlewareIndividual:
         response = handler.handle(request)
         
         assert response is None
-        assert hasattr(request, 'authenticated_user')
+        assert request.authenticated_user is not None
         assert request.authenticated_user.username == "user1"
 
     def test_authentication_handler_credenciales_invalidas(self):
@@ -433,9 +498,1776 @@ class TestScenarios:
         
         assert response.status_code == StatusCode.OK
         
-        assert hasattr(request, 'authenticated_user')
+        assert request.authenticated_user is not None
         assert request.authenticated_user.username == "user1"
 
 
+class TestCompiledPipeline:
+
+    @pytest.fixture
+    def compiled_server(self):
+        server = Server(compiled=True)
+        server.add_middleware(BruteForceProtectionHandler(max_attempts=3))
+        server.add_middleware(DataValidationHandler())
+        server.add_middleware(AuthenticationHandler(extraction_method=ExtractBasic()))
+        server.add_middleware(CacheHandler())
+        server.add_middleware(AuthorizationHandler())
+        return server
+
+    def test_pipeline_compilado_crea_orden(self, compiled_server):
+        request = Request(
+            method="POST",
+            path="/orders",
+            headers={},
+            body={"items": ["Pizza"], "total": 10.0},
+            ip_address="10.0.0.1",
+            timestamp=datetime.now(),
+            user_credentials={"username": "user1", "password": "password123"}
+        )
+
+        response = compiled_server.process_request(request)
+
+        assert response.status_code == StatusCode.CREATED
+        assert compiled_server._pipeline is not None
+
+    def test_pipeline_compilado_se_recompila_al_agregar_middleware(self, compiled_server):
+        request = Request(
+            method="POST",
+            path="/orders",
+            headers={},
+            body={"items": ["Pizza"], "total": 10.0},
+            ip_address="10.0.0.2",
+            timestamp=datetime.now(),
+            user_credentials={"username": "user1", "password": "password123"}
+        )
+        assert compiled_server.process_request(request).status_code == StatusCode.CREATED
+
+        class RejectAll(AuthorizationHandler):
+            def handle(self, request):
+                return Response(status_code=StatusCode.FORBIDDEN, headers={}, body={"error": "rechazado"})
+
+        compiled_server.add_middleware(RejectAll())
+
+        assert compiled_server._pipeline is None
+        assert compiled_server.process_request(request).status_code == StatusCode.FORBIDDEN
+
+
+class TestAsyncServer:
+
+    class SlowAsyncHandler(AsyncRequestHandler):
+        def __init__(self, delay: float):
+            super().__init__()
+            self.delay = delay
+
+        async def handle(self, request):
+            await asyncio.sleep(self.delay)
+            return await self._pass_to_next(request)
+
+    def test_cadena_sincrona_envuelta_en_executor(self, make_request):
+        server = AsyncServer()
+        server.add_middleware(BruteForceProtectionHandler(max_attempts=3))
+        server.add_middleware(DataValidationHandler())
+        server.add_middleware(AuthenticationHandler(extraction_method=ExtractBasic()))
+        server.add_middleware(AuthorizationHandler())
+
+        request = make_request("POST", body={"items": ["Pizza"], "total": 10.0}, ip_address="10.1.0.1",
+                               credentials=("user1", "password123"))
+        response = asyncio.run(server.process_request(request))
+        server.shutdown()
+
+        assert response.status_code == StatusCode.CREATED
+
+    def test_cadena_mixta_sincrona_y_asincrona(self, make_request):
+        server = AsyncServer()
+        server.add_middleware(DataValidationHandler())
+        server.add_middleware(self.SlowAsyncHandler(0))
+        server.add_middleware(AuthenticationHandler(extraction_method=ExtractBasic()))
+
+        request = make_request("POST", body={"items": ["Pizza"], "total": 10.0}, ip_address="10.1.0.2",
+                               credentials=("user1", "password123"))
+        response = asyncio.run(server.process_request(request))
+        server.shutdown()
+
+        assert response.status_code == StatusCode.CREATED
+
+    def test_mas_peticiones_que_hilos_sin_interbloqueo(self, make_request):
+        server = AsyncServer(max_workers=4)
+        server.add_middleware(DataValidationHandler())
+        server.add_middleware(self.SlowAsyncHandler(0.01))
+        server.add_middleware(AuthenticationHandler(extraction_method=ExtractBasic()))
+
+        async def run_all():
+            requests = (server.process_request(make_request("POST", body={"items": ["Pizza"], "total": 10.0},
+                                                            ip_address=f"10.1.2.{i}",
+                                                            credentials=("user1", "password123")))
+                        for i in range(16))
+            return await asyncio.wait_for(asyncio.gather(*requests), timeout=5)
+
+        responses = asyncio.run(run_all())
+        server.shutdown()
+
+        assert all(response.status_code == StatusCode.CREATED for response in responses)
+
+    def test_peticiones_concurrentes_no_se_bloquean(self, make_request):
+        server = AsyncServer()
+        server.add_middleware(self.SlowAsyncHandler(0.05))
+        server.add_middleware(AuthenticationHandler(extraction_method=ExtractBasic()))
+
+        async def run_all():
+            return await asyncio.gather(*(server.process_request(
+                make_request("POST", body={"items": ["Pizza"], "total": 10.0}, ip_address=f"10.1.1.{i}",
+                             credentials=("user1", "password123"))) for i in range(200)))
+
+        # Primera petición fuera de la medición: deja la credencial en la caché de verificación
+        asyncio.run(server.process_request(make_request("POST", body={"items": ["Pizza"], "total": 10.0},
+                                                        ip_address="10.1.1.255",
+                                                        credentials=("user1", "password123"))))
+
+        start = time.perf_counter()
+        responses = asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+
+        assert all(response.status_code == StatusCode.CREATED for response in responses)
+        assert elapsed < 200 * 0.05 / 4
+
+
+class TestLRUCache:
+
+    class FakeClock:
+        def __init__(self):
+            self.now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    def test_expulsa_la_entrada_menos_usada(self):
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_respeta_el_limite_de_bytes(self):
+        cache = LRUCache(max_entries=100, max_bytes=10)
+        cache.set("a", "x", size=6)
+        cache.set("b", "y", size=6)
+
+        assert "a" not in cache
+        assert cache.current_bytes == 6
+
+    def test_expiracion_perezosa_por_rueda_de_tiempo(self):
+        clock = self.FakeClock()
+        cache = LRUCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+
+        clock.now += 20
+        cache.get("b")
+
+        assert len(cache) == 1
+        assert cache.get("a") is None
+        assert cache.stats() == {"entries": 1, "bytes": 0, "hits": 1, "misses": 1,
+                                 "evictions": 0, "expirations": 1}
+
+    def test_cache_handler_expone_contadores(self):
+        handler = CacheHandler(max_entries=1)
+        handler._store_in_cache("k1", Response(status_code=StatusCode.OK, headers={}, body={}))
+        handler._store_in_cache("k2", Response(status_code=StatusCode.OK, headers={}, body={}))
+
+        assert handler._get_from_cache("k1") is None
+        assert handler._get_from_cache("k2").is_from_cache
+        assert handler.cache.stats()["evictions"] == 1
+
+
+class TestCacheKey:
+
+    def test_clave_independiente_del_orden_del_cuerpo(self, make_request):
+        handler = CacheHandler()
+        key_a = handler._generate_cache_key(make_request(body={"a": 1, "b": [1, {"c": 2}]}, user="user1"))
+        key_b = handler._generate_cache_key(make_request(body={"b": [1, {"c": 2}], "a": 1}, user="user1"))
+
+        assert key_a == key_b
+        assert hash(key_a) == hash(key_b)
+
+    def test_clave_distingue_usuarios_y_cuerpo_vacio(self, make_request):
+        handler = CacheHandler()
+        key_user1 = handler._generate_cache_key(make_request(body={}, user="user1"))
+        key_user2 = handler._generate_cache_key(make_request(body={}, user="user2"))
+
+        assert key_user1 != key_user2
+        assert key_user1 == ("GET", "/orders", "user1", None)
+
+    def test_clave_distingue_tipos_del_cuerpo(self, make_request):
+        handler = CacheHandler()
+        bodies = [{"a": {"x": 1}}, {"a": [["x", 1]]}, {"a": 1}, {"a": 1.0}, {"a": True}, {"a": "1"}]
+        keys = {handler._generate_cache_key(make_request(body=body, user="user1")) for body in bodies}
+
+        assert len(keys) == len(bodies)
+
+    def test_clave_con_digest(self, make_request):
+        handler = CacheHandler(hashed_keys=True)
+        key_a = handler._generate_cache_key(make_request(body={"a": 1, "b": 2}, user="user1"))
+        key_b = handler._generate_cache_key(make_request(body={"b": 2, "a": 1}, user="user1"))
+
+        assert isinstance(key_a, str)
+        assert key_a == key_b
+
+
+class TestDangerousContentScanner:
+
+    @pytest.mark.parametrize("value, rule", [
+        ("<SCRIPT>alert(1)</SCRIPT>", "xss_script"),
+        ("javascript:alert(1)", "javascript_url"),
+        ("img onerror = x", "event_handler"),
+        ("select * from users", "sql_select"),
+        ("../../etc/passwd", "path_traversal"),
+        ("Eval(code)", "code_eval"),
+        ("Pizza Margherita", None),
+    ])
+    def test_regla_detectada(self, value, rule):
+        handler = DataValidationHandler()
+
+        assert handler._match_dangerous_content(value) == rule
+
+    def test_patrones_propios_sin_distinguir_mayusculas(self):
+        handler = DataValidationHandler(dangerous_patterns={"union": r"UNION\s+SELECT"})
+
+        assert handler._match_dangerous_content("1 union select password") == "union"
+        assert handler._match_dangerous_content("1 UNION SELECT password") == "union"
+
+    def test_regla_del_header_va_al_log_y_no_a_la_respuesta(self, caplog):
+        handler = DataValidationHandler()
+        request = Request(
+            method="GET",
+            path="/orders",
+            headers={"User-Agent": "Mozilla", "X-Ref": "javascript:alert(1)"},
+            body={},
+            ip_address="10.4.0.1",
+            timestamp=datetime.now()
+        )
+
+        with caplog.at_level(logging.INFO):
+            response = handler.handle(request)
+
+        assert response.status_code == StatusCode.BAD_REQUEST
+        assert response.body == {"error": "Headers inválidos", "code": "INVALID_HEADERS"}
+        assert "javascript_url" in caplog.text
+
+
+class TestNestedBodyValidation:
+
+    def test_rechaza_contenido_anidado(self, make_request, caplog):
+        handler = DataValidationHandler()
+        request = make_request("POST", body={"items": [{"name": "Pizza", "notes": ["ok", "eval(x)"]}]})
+
+        with caplog.at_level(logging.INFO):
+            response = handler.handle(request)
+
+        assert response.status_code == StatusCode.BAD_REQUEST
+        assert "rule" not in response.body
+        assert "code_eval" in caplog.text
+
+    def test_sanitiza_en_sitio_sin_copiar(self, make_request):
+        handler = DataValidationHandler()
+        items = [{"name": " Pizza "}, "Soda"]
+        body = {"items": items, "total": 10.0}
+        request = make_request("POST", body=body)
+
+        assert handler.handle(request) is None
+        assert request.body is body
+        assert body["items"] is items
+        assert items == [{"name": "Pizza"}, "Soda"]
+
+    def test_limites_de_profundidad_y_tamano(self, make_request):
+        deep = {}
+        node = deep
+        for _ in range(10):
+            node["child"] = {}
+            node = node["child"]
+
+        assert DataValidationHandler(max_depth=5)._scan_and_sanitize_body(
+            make_request("POST", body=deep)) == "max_depth_exceeded"
+        assert DataValidationHandler(max_items=3)._scan_and_sanitize_body(
+            make_request("POST", body={"items": [1, 2, 3, 4]})) == "max_items_exceeded"
+
+
+class TestInMemoryOrderRepository:
+
+    def _order(self, order_id: str, user_id: str, minute: int) -> Order:
+        return Order(id=order_id, user_id=user_id, items=["item"], total=1.0,
+                     created_at=datetime(2024, 1, 1, 12, minute))
+
+    def test_indices_por_id_usuario_y_fecha(self):
+        repository = InMemoryOrderRepository([
+            self._order("b", "user1", 5),
+            self._order("a", "user2", 1),
+            self._order("c", "user1", 3),
+        ])
+
+        assert repository.get("a").user_id == "user2"
+        assert "z" not in repository
+        assert [order.id for order in repository.all()] == ["a", "c", "b"]
+        assert [order.id for order in repository.by_user("user1")] == ["c", "b"]
+
+    def test_eliminar_actualiza_todos_los_indices(self):
+        repository = InMemoryOrderRepository([self._order("a", "user1", 1), self._order("b", "user1", 2)])
+
+        assert repository.delete("a")
+        assert not repository.delete("a")
+        assert len(repository) == 1
+        assert [order.id for order in repository.by_user("user1")] == ["b"]
+        assert [order.id for order in repository.all()] == ["b"]
+
+
+class TestSortedKeyList:
+
+    def test_equivale_a_una_lista_ordenada(self):
+        import random
+        rng = random.Random(7)
+        keys, reference = SortedKeyList(load=4), []
+        for _ in range(2000):
+            key = rng.randrange(500)
+            if key in reference and rng.random() < 0.5:
+                assert keys.remove(key)
+                reference.remove(key)
+            elif key not in reference:
+                keys.add(key)
+                reference.append(key)
+                reference.sort()
+
+        assert list(keys) == reference and len(keys) == len(reference)
+        assert not keys.remove(-1)
+        for after in (None, -1, 0, 250, 499, 10_000):
+            start = 0 if after is None else sum(1 for key in reference if key <= after)
+            assert keys.after(after, 7) == reference[start:start + 7]
+
+
+class TestOrderPagination:
+
+    @pytest.fixture
+    def controller(self):
+        controller = OrderController()
+        controller.order_service = OrderService(InMemoryOrderRepository(
+            Order(id=f"o{i:02d}", user_id="user1" if i % 2 else "user2", items=["item"], total=1.0,
+                  created_at=datetime(2024, 1, 1, 12, i))
+            for i in range(25)
+        ))
+        return controller
+
+    def _get(self, controller, path: str, username: str = "admin", is_admin: bool = True) -> Response:
+        request = Request(
+            method="GET",
+            path=path,
+            headers={},
+            body={},
+            ip_address="10.6.0.1",
+            timestamp=datetime.now()
+        )
+        request.set_authenticated_user(User(username=username, password="x", is_admin=is_admin))
+        return controller.handle(request)
+
+    def test_recorre_todas_las_paginas_con_cursor(self, controller):
+        seen = []
+        path = "/orders?limit=10"
+        while True:
+            response = self._get(controller, path)
+            assert response.status_code == StatusCode.OK
+            seen.extend(order["id"] for order in response.body["orders"])
+            if response.body["next_cursor"] is None:
+                break
+            path = f"/orders?limit=10&after={response.body['next_cursor']}"
+
+        assert seen == [f"o{i:02d}" for i in range(25)]
+
+    def test_usuario_solo_pagina_sus_ordenes(self, controller):
+        response = self._get(controller, "/orders?limit=5", username="user1", is_admin=False)
+
+        orders = list(response.body["orders"])
+        assert response.body["count"] == 5
+        assert all(order["user_id"] == "user1" for order in orders)
+        assert orders[0]["status"] == "pending"
+
+    @pytest.mark.parametrize("path", [
+        "/orders?limit=0", "/orders?limit=abc", "/orders?limit=%C2%B2", "/orders?after=%%%",
+        "/orders?after=" + base64.urlsafe_b64encode(b"2024-01-01T12:05:00+00:00|o05").decode(),
+    ])
+    def test_parametros_invalidos(self, controller, path):
+        response = self._get(controller, path)
+
+        assert response.status_code == StatusCode.BAD_REQUEST
+
+
+class TestSQLiteOrderRepository:
+
+    def _order(self, order_id: str, user_id: str, minute: int) -> Order:
+        return Order(id=order_id, user_id=user_id, items=["item"], total=1.0,
+                     created_at=datetime(2024, 1, 1, 12, minute))
+
+    def test_lee_sus_propias_escrituras_y_persiste(self, tmp_path):
+        path = str(tmp_path / "orders.db")
+        repository = SQLiteOrderRepository(path)
+        repository.add(self._order("b", "user1", 2))
+        repository.add(self._order("a", "user1", 1))
+
+        assert repository.get("a").created_at == datetime(2024, 1, 1, 12, 1)
+        repository.close()
+
+        reopened = SQLiteOrderRepository(path)
+        assert len(reopened) == 2
+        assert [order.id for order in reopened.by_user("user1")] == ["a", "b"]
+        assert reopened.delete("a")
+        assert reopened.get("a") is None
+        reopened.close()
+
+    def test_paginacion_por_clave(self, tmp_path):
+        repository = SQLiteOrderRepository(str(tmp_path / "orders.db"))
+        for i in range(5):
+            repository.add(self._order(f"o{i}", "user1" if i % 2 else "user2", i))
+
+        orders, has_more = repository.page(None, None, 3)
+        assert [order.id for order in orders] == ["o0", "o1", "o2"] and has_more
+
+        orders, has_more = repository.page(None, (orders[-1].created_at, orders[-1].id), 3)
+        assert [order.id for order in orders] == ["o3", "o4"] and not has_more
+        repository.close()
+
+    def test_commit_agrupado_con_escritores_concurrentes(self, tmp_path):
+        repository = SQLiteOrderRepository(str(tmp_path / "orders.db"), wait_for_commit=True)
+
+        def writer(worker: int):
+            for i in range(50):
+                repository.add(self._order(f"w{worker}-{i}", f"user{worker}", i % 60))
+
+        threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert repository._committed_batch < 400
+        assert len(repository) == 400
+        repository.close()
+
+    def test_reintenta_errores_transitorios_de_sqlite(self, tmp_path):
+        repository = SQLiteOrderRepository(str(tmp_path / "orders.db"), wait_for_commit=True,
+                                           retry_backoff=0.001)
+        to_row, failures = repository._to_row, []
+
+        def busy_twice(order):
+            if len(failures) < 2:
+                failures.append(order.id)
+                raise sqlite3.OperationalError("database is locked")
+            return to_row(order)
+
+        repository._to_row = busy_twice
+        repository.add(self._order("a", "user1", 1))
+
+        assert len(failures) == 2
+        assert repository.get("a") is not None and len(repository) == 1
+        repository.close()
+
+    def test_lote_fallido_despierta_a_los_que_esperan(self, tmp_path):
+        repository = SQLiteOrderRepository(str(tmp_path / "orders.db"), wait_for_commit=True,
+                                           max_retries=1, retry_backoff=0.001)
+        to_row = repository._to_row
+
+        def always_busy(order):
+            raise sqlite3.OperationalError("database is locked")
+
+        repository._to_row = always_busy
+
+        with pytest.raises(OrderCommitError):
+            repository.add(self._order("a", "user1", 1))
+
+        bad = self._order("b", "user1", 2)
+        bad.items = [object()]
+        repository._to_row = to_row
+        with pytest.raises(OrderCommitError):
+            repository.add(bad)
+
+        # El escritor sigue vivo tras ambos fallos
+        repository.add(self._order("c", "user1", 3))
+        assert [order.id for order in repository.all()] == ["c"]
+        repository.close()
+
+
+class TestAuthService:
+
+    def test_contrasenas_guardadas_con_hash(self):
+        service = AuthService(hasher=PasswordHasher(iterations=1000))
+
+        assert service.create_user("nuevo", "secreto123")
+        assert not service.create_user("nuevo", "otra")
+        assert service.users_db["nuevo"].password.startswith("pbkdf2_sha256$1000$")
+        assert service.authenticate("nuevo", "secreto123").username == "nuevo"
+        assert service.authenticate("nuevo", "incorrecta") is None
+
+    def test_cache_de_verificacion_evita_rehashear(self):
+        service = AuthService()
+        calls = []
+        verify = service.hasher.verify
+        service.hasher.verify = lambda password, encoded: calls.append(password) or verify(password, encoded)
+
+        assert service.authenticate("user1", "password123")
+        assert service.authenticate("user1", "password123")
+        assert service.authenticate("user1", "wrong") is None
+        assert service.authenticate("user1", "wrong") is None
+
+        assert calls == ["password123", "wrong", "wrong"]
+
+    def test_usuario_inexistente_cuesta_una_verificacion(self):
+        service = AuthService(hasher=PasswordHasher(iterations=1000))
+        calls = []
+        verify = service.hasher.verify
+        service.hasher.verify = lambda password, encoded: calls.append(encoded) or verify(password, encoded)
+
+        assert service.authenticate("fantasma", "password123") is None
+        assert len(calls) == 1
+        assert calls[0].startswith("pbkdf2_sha256$1000$")
+
+    @pytest.mark.parametrize("encoded", [
+        "pbkdf2_sha256$mil$00ff$abcd",
+        "pbkdf2_sha256$1000$no-hex$abcd",
+        "pbkdf2_sha256$0$00ff$abcd",
+        "sin-formato",
+    ])
+    def test_hash_guardado_corrupto_no_verifica(self, encoded):
+        assert PasswordHasher().verify("password123", encoded) is False
+
+
+class TestBruteForceLimiter:
+
+    class FakeClock:
+        def __init__(self):
+            self.now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    class Reject(AuthorizationHandler):
+        def handle(self, request):
+            return Response(status_code=StatusCode.UNAUTHORIZED, headers={}, body={"error": "x"})
+
+    def _handler(self, **kwargs) -> BruteForceProtectionHandler:
+        handler = BruteForceProtectionHandler(**kwargs)
+        handler.set_next(self.Reject())
+        return handler
+
+    def test_bloquea_solo_dentro_de_la_ventana(self, make_request):
+        clock = self.FakeClock()
+        handler = self._handler(max_attempts=3, block_duration=60, attempt_window=100, clock=clock)
+
+        handler.handle(make_request("POST", ip_address="10.7.0.1"))
+        handler.handle(make_request("POST", ip_address="10.7.0.1"))
+        clock.now += 150
+        handler.handle(make_request("POST", ip_address="10.7.0.1"))
+        handler.handle(make_request("POST", ip_address="10.7.0.1"))
+        assert "10.7.0.1" not in handler.blocked_ips
+        assert handler.handle(make_request("POST", ip_address="10.7.0.1")).status_code == StatusCode.UNAUTHORIZED
+
+        response = handler.handle(make_request("POST", ip_address="10.7.0.1"))
+        assert response.status_code == StatusCode.TOO_MANY_REQUESTS
+        assert response.headers["Retry-After"] == "60"
+
+        clock.now += 61
+        assert handler.handle(make_request("POST", ip_address="10.7.0.1")).status_code == StatusCode.UNAUTHORIZED
+
+    def test_memoria_acotada_con_muchas_ips(self, make_request):
+        handler = self._handler(max_tracked_ips=100)
+
+        for i in range(1000):
+            handler.handle(make_request("POST", ip_address=f"10.8.{i // 256}.{i % 256}"))
+
+        assert len(handler.failed_attempts) == 100
+
+    def test_barrido_descarta_ips_inactivas(self, make_request):
+        clock = self.FakeClock()
+        handler = self._handler(attempt_window=100, clock=clock)
+        for i in range(3):
+            handler.handle(make_request("POST", ip_address=f"10.9.0.{i}"))
+
+        clock.now += 101
+        handler.handle(make_request("POST", ip_address="10.9.1.1"))
+        handler.handle(make_request("POST", ip_address="10.9.1.2"))
+
+        assert list(handler.failed_attempts) == ["10.9.1.1", "10.9.1.2"]
+
+
+def _increment_shared_counter(path: str, times: int):
+    backend = SharedMemoryStateBackend(path, slots=64, value_size=64)
+    for _ in range(times):
+        backend.incr("counter")
+    backend.close()
+
+
+class TestStateBackends:
+
+    class FakeClock:
+        def __init__(self):
+            self.now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    @pytest.fixture(params=["memory", "shared"])
+    def backend_factory(self, request, tmp_path):
+        def factory(clock):
+            if request.param == "memory":
+                return InMemoryStateBackend(clock=clock)
+            return SharedMemoryStateBackend(str(tmp_path / "state.bin"), slots=64, value_size=256, clock=clock)
+        return factory
+
+    def test_contrato_tipo_redis(self, backend_factory):
+        clock = self.FakeClock()
+        backend = backend_factory(clock)
+
+        assert backend.get("a") is None
+        assert backend.set("a", b"1", ex=10)
+        assert backend.get("a") == b"1"
+        assert backend.incr("a", 4) == 5
+        assert backend.incr("b") == 1
+        assert backend.expire("b", 5)
+        clock.now += 6
+        assert backend.get("b") is None
+        assert backend.get("a") == b"5"
+        clock.now += 5
+        assert backend.get("a") is None
+        assert backend.set("c", b"x")
+        assert backend.delete("c") == 1
+        assert backend.delete("c") == 0
+
+    def test_set_nx_solo_si_no_existe(self, backend_factory):
+        clock = self.FakeClock()
+        backend = backend_factory(clock)
+
+        assert backend.set("a", b"1", ex=10, nx=True)
+        assert not backend.set("a", b"2", nx=True)
+        assert backend.get("a") == b"1"
+        clock.now += 11
+        assert backend.set("a", b"3", nx=True)
+        assert backend.get("a") == b"3"
+
+    def test_epoca_de_etag_comun_aunque_arranquen_a_la_vez(self):
+        class RacingBackend(InMemoryStateBackend):
+            # Otro proceso guarda su época entre la primera lectura y la escritura de este
+            def get(self, key):
+                value = super().get(key)
+                if key == "cache:etag-epoch" and value is None:
+                    self.set(key, b"otro0000")
+                return value
+
+        handler = CacheHandler(state_backend=RacingBackend())
+
+        assert handler._etag_epoch == "otro0000"
+
+    def test_cache_de_respuestas_mayores_que_la_ranura(self, tmp_path, make_request):
+        backend = SharedMemoryStateBackend(str(tmp_path / "state.bin"), slots=64)
+        handler = CacheHandler(state_backend=backend)
+
+        class LargeListing(RequestHandler):
+            def handle(self, request):
+                return Response(status_code=StatusCode.OK, headers={}, body={"orders": ["x" * 100] * 100})
+
+        handler.set_next(LargeListing())
+
+        first = handler.handle(make_request(user="user1"))
+        second = handler.handle(make_request(user="user1"))
+
+        assert len(serialization.encode_body(first.body)) > backend.value_size
+        assert second.is_from_cache and second.body == first.body
+        stats = handler.stats()
+        assert (stats["hits"], stats["misses"], stats["backend_overflows"]) == (1, 1, 1)
+        backend.close()
+
+    def test_aciertos_del_backend_en_las_estadisticas(self, make_request):
+        handler = CacheHandler(state_backend=InMemoryStateBackend())
+        handler.set_next(OrderController())
+
+        handler.handle(make_request(user="user1"))
+        assert handler.handle(make_request(user="user1")).is_from_cache
+
+        assert (handler.stats()["hits"], handler.stats()["misses"]) == (1, 1)
+
+    def test_memoria_compartida_entre_procesos(self, tmp_path):
+        path = str(tmp_path / "state.bin")
+        backend = SharedMemoryStateBackend(path, slots=64, value_size=64)
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_increment_shared_counter, args=(path, 200)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert backend.get("counter") == b"800"
+        backend.close()
+
+    def test_fuerza_bruta_compartida_entre_workers(self):
+        backend = InMemoryStateBackend()
+        workers = []
+        for _ in range(3):
+            handler = BruteForceProtectionHandler(max_attempts=3, state_backend=backend)
+            handler.set_next(TestBruteForceLimiter.Reject())
+            workers.append(handler)
+        request = Request(method="POST", path="/orders", headers={}, body={},
+                          ip_address="10.10.0.1", timestamp=datetime.now())
+
+        for worker in workers:
+            assert worker.handle(request).status_code == StatusCode.UNAUTHORIZED
+
+        assert workers[0].handle(request).status_code == StatusCode.TOO_MANY_REQUESTS
+
+    def test_bloqueo_compartido_independiente_del_reloj_monotonico(self):
+        backend = InMemoryStateBackend()
+        workers = []
+        for monotonic_now in (5.0, 1e9):
+            handler = BruteForceProtectionHandler(max_attempts=2, block_duration=300, state_backend=backend,
+                                                  clock=lambda now=monotonic_now: now)
+            handler.set_next(TestBruteForceLimiter.Reject())
+            workers.append(handler)
+        request = Request(method="POST", path="/orders", headers={}, body={},
+                          ip_address="10.10.0.9", timestamp=datetime.now())
+
+        workers[0].handle(request)
+        workers[0].handle(request)
+        response = workers[1].handle(request)
+
+        assert response.status_code == StatusCode.TOO_MANY_REQUESTS
+        assert 298 <= int(response.headers["Retry-After"]) <= 300
+
+    def test_cache_no_desaloja_bloqueos_de_fuerza_bruta(self, tmp_path):
+        backend = SharedMemoryStateBackend(str(tmp_path / "state.bin"), slots=64, value_size=64)
+        backend.set("bruteforce:blocked:10.10.0.10", b"1", ex=300)
+        for i in range(500):
+            backend.set(f"cache:{i}", b"x", ex=3600)
+
+        assert backend.get("bruteforce:blocked:10.10.0.10") == b"1"
+        backend.close()
+
+    def test_cache_compartida_entre_workers(self, tmp_path):
+        backend = SharedMemoryStateBackend(str(tmp_path / "cache.bin"), slots=64)
+        first, second = CacheHandler(state_backend=backend), CacheHandler(state_backend=backend)
+        first.set_next(OrderController())
+        request = Request(method="GET", path="/orders", headers={}, body={},
+                          ip_address="10.10.0.2", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="user1", password="x"))
+
+        assert not first.handle(request).is_from_cache
+        response = second.handle(request)
+
+        assert response.is_from_cache
+        assert response.status_code == StatusCode.OK
+        assert [order["id"] for order in response.body["orders"]] == ["1", "3"]
+        backend.close()
+
+
+class TestRouter:
+
+    def test_parametros_y_prioridad_estatica(self):
+        router = Router()
+        router.add_route("GET", "/orders/{order_id}", "get_order")
+        router.add_route("GET", "/orders/admin/stats", "stats")
+        router.add_route("GET", "/orders/{order_id}/items/{item_id}", "get_item")
+
+        assert router.match("GET", "/orders/42") == ("get_order", {"order_id": "42"})
+        assert router.match("get", "/orders/admin/stats") == ("stats", {})
+        assert router.match("GET", "/orders/admin") == ("get_order", {"order_id": "admin"})
+        assert router.match("GET", "/orders/7/items/3") == ("get_item", {"order_id": "7", "item_id": "3"})
+        assert router.match("POST", "/orders/42") is None
+        assert router.match("GET", "/orders/7/items") is None
+
+    def test_registro_declarativo_de_controladores(self):
+        class HealthController:
+            @route("GET", "/health")
+            def health(self):
+                return "ok"
+
+        router = Router()
+        router.register(HealthController())
+        endpoint, params = router.match("GET", "/health")
+
+        assert endpoint() == "ok" and params == {}
+        with pytest.raises(ValueError):
+            router.register(HealthController())
+
+    def test_controlador_de_ordenes_usa_el_router(self):
+        controller = OrderController()
+        request = Request(method="GET", path="/orders/1/extra", headers={}, body={},
+                          ip_address="10.11.0.1", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="user1", password="x"))
+
+        assert controller.handle(request).status_code == StatusCode.NOT_FOUND
+        request.path = "/orders/1"
+        assert controller.handle(request).body["order"]["id"] == "1"
+
+
+class TestPermissionTable:
+
+    def test_prefijos_por_segmento_y_no_por_subcadena(self):
+        handler = AuthorizationHandler()
+
+        assert handler._requires_admin_permission("/admin/users", "GET")
+        assert handler._requires_admin_permission("/system/config?x=1", "GET")
+        assert not handler._requires_admin_permission("/administrator", "GET")
+        assert not handler._requires_admin_permission("/reports/admin", "GET")
+        assert handler._requires_admin_permission("/orders/1", "DELETE")
+
+    def test_comodines_roles_y_regla_mas_especifica(self):
+        table = PermissionTable()
+        table.add_rule("*", "/tenants/*/billing", "admin")
+        table.add_rule("GET", "/tenants/*/billing/invoices", "user")
+        table.add_rule("*", "/tenants/acme/billing", None)
+
+        assert table.required_role("POST", "/tenants/x/billing/cards") == "admin"
+        assert table.required_role("GET", "/tenants/x/billing/invoices/9") == "user"
+        assert table.required_role("POST", "/tenants/x/billing/invoices") == "admin"
+        assert table.required_role("POST", "/tenants/acme/billing") is None
+        assert table.required_role("GET", "/tenants/x") is None
+
+    def test_reglas_adicionales_en_el_handler(self):
+        handler = AuthorizationHandler(rules=[("DELETE", "/cart/*", None)])
+        request = Request(method="DELETE", path="/cart/item-1", headers={}, body={},
+                          ip_address="10.12.0.1", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="user1", password="x"))
+
+        assert handler.handle(request) is None
+        request.path = "/orders/1"
+        assert handler.handle(request).status_code == StatusCode.FORBIDDEN
+
+
+class TestHttpServer:
+
+    def test_parser_peticiones_encadenadas_y_partidas(self):
+        parser = HttpRequestParser("10.13.0.1")
+        body = b'{"items": ["Pizza"], "total": 9.5}'
+        raw = (b"GET /orders?limit=1 HTTP/1.1\r\nauthorization: Basic user1:password123\r\n\r\n"
+               b"POST /orders HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+
+        first = parser.feed(raw[:-5])
+        assert [request.path for request, _ in first] == ["/orders?limit=1"]
+        assert first[0][0].headers["Authorization"] == "Basic user1:password123"
+        assert first[0][0].ip_address == "10.13.0.1"
+
+        second = parser.feed(raw[-5:])
+        request, keep_alive = second[0]
+        assert request.method == "POST"
+        assert request.body == {"items": ["Pizza"], "total": 9.5}
+        assert keep_alive
+        assert parser.feed(b"") == []
+
+    def test_parser_rechaza_peticiones_invalidas(self):
+        with pytest.raises(HttpParseError):
+            HttpRequestParser("10.13.0.2").feed(b"GET /orders\r\n\r\n")
+        with pytest.raises(HttpParseError) as error:
+            HttpRequestParser("10.13.0.2", max_body_bytes=10).feed(
+                b"POST /orders HTTP/1.1\r\nContent-Length: 11\r\n\r\n")
+        assert error.value.status_code == StatusCode.PAYLOAD_TOO_LARGE
+        assert not HttpRequestParser("10.13.0.2").feed(b"GET / HTTP/1.0\r\n\r\n")[0][1]
+
+    def test_parser_rechaza_content_length_con_digitos_unicode(self):
+        # latin-1: b"\xb2" es "²", que isdigit() acepta e int() no
+        with pytest.raises(HttpParseError) as error:
+            HttpRequestParser("10.13.0.2").feed(b"POST /orders HTTP/1.1\r\nContent-Length: \xb2\r\n\r\n")
+        assert error.value.status_code == StatusCode.BAD_REQUEST
+
+    def test_keep_alive_y_pipelining_sobre_socket(self):
+        server = Server()
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+
+        async def scenario():
+            http_server = HttpServer(server, port=0)
+            await http_server.start()
+            reader, writer = await asyncio.open_connection("127.0.0.1", http_server.port)
+            body = b'{"items": ["Pizza"], "total": 9.5}'
+            writer.write(
+                b"POST /orders HTTP/1.1\r\nAuthorization: Basic user1:password123\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(body) + body +
+                b"GET /orders HTTP/1.1\r\nAuthorization: Basic user1:password123\r\n\r\n"
+                b"GET /orders HTTP/1.1\r\nConnection: close\r\n\r\n"
+            )
+            responses = []
+            for _ in range(3):
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                responses.append((head, json.loads(await reader.readexactly(length))))
+            closed = await reader.read()
+            writer.close()
+            await http_server.close()
+            return responses, closed
+
+        responses, closed = asyncio.run(scenario())
+        assert responses[0][0].startswith(b"HTTP/1.1 201 Created")
+        assert b"Connection: keep-alive" in responses[0][0]
+        created_id = responses[0][1]["order"]["id"]
+        assert created_id in [order["id"] for order in responses[1][1]["orders"]]
+        assert responses[2][0].startswith(b"HTTP/1.1 401 Unauthorized")
+        assert b"Connection: close" in responses[2][0]
+        assert closed == b""
+
+    def test_peticiones_completas_se_responden_antes_del_error(self):
+        server = Server()
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+
+        async def scenario():
+            http_server = HttpServer(server, port=0)
+            await http_server.start()
+            reader, writer = await asyncio.open_connection("127.0.0.1", http_server.port)
+            writer.write(b"GET /orders HTTP/1.1\r\nAuthorization: Basic user1:password123\r\n\r\n"
+                         b"GET /orders\r\n\r\n")
+            raw = await reader.read()
+            writer.close()
+            await http_server.close()
+            return raw
+
+        raw = asyncio.run(scenario())
+        assert raw.startswith(b"HTTP/1.1 200 OK")
+        assert b"HTTP/1.1 400 Bad Request" in raw
+        assert raw.index(b"HTTP/1.1 400") > raw.index(b"HTTP/1.1 200")
+
+    def test_aplicacion_sincrona_lenta_no_bloquea_otras_conexiones(self):
+        class SlowApp:
+            def process_request(self, request):
+                if request.path == "/lenta":
+                    time.sleep(0.5)
+                return Response(status_code=StatusCode.OK, headers={}, body={"path": request.path})
+
+        async def scenario():
+            http_server = HttpServer(SlowApp(), port=0)
+            await http_server.start()
+
+            async def get(path):
+                reader, writer = await asyncio.open_connection("127.0.0.1", http_server.port)
+                writer.write(b"GET %s HTTP/1.1\r\nConnection: close\r\n\r\n" % path.encode())
+                raw = await reader.read()
+                writer.close()
+                return raw, time.perf_counter()
+
+            start = time.perf_counter()
+            slow, fast = await asyncio.gather(get("/lenta"), get("/rapida"))
+            await http_server.close()
+            return slow, fast, start
+
+        slow, fast, start = asyncio.run(scenario())
+        assert slow[0].startswith(b"HTTP/1.1 200 OK") and fast[0].startswith(b"HTTP/1.1 200 OK")
+        assert fast[1] - start < 0.4 < slow[1] - start
+
+
+class TestPreforkServer:
+
+    def _get(self, port: int) -> bytes:
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as client:
+            client.sendall(b"GET /orders HTTP/1.1\r\nAuthorization: Basic user1:password123\r\n"
+                           b"Connection: close\r\n\r\n")
+            chunks = []
+            while chunk := client.recv(65536):
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    @pytest.mark.parametrize("reuse_port", [False, True])
+    def test_reinicia_caidos_y_reinicio_escalonado(self, reuse_port):
+        server = Server(compiled=True)
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+        supervisor = PreforkServer(server, port=0, workers=2, reuse_port=reuse_port, restart_delay=0)
+        supervisor.start()
+        try:
+            assert len(supervisor.pids) == 2
+            assert self._get(supervisor.port).startswith(b"HTTP/1.1 200 OK")
+
+            crashed = next(iter(supervisor.pids))
+            os.kill(crashed, signal.SIGKILL)
+            deadline = time.monotonic() + 5
+            while not supervisor.reap() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert crashed not in supervisor.pids
+            assert len(supervisor.pids) == 2
+
+            before = set(supervisor.pids)
+            supervisor.rolling_restart()
+            assert len(supervisor.pids) == 2
+            assert not before & set(supervisor.pids)
+            assert all(self._get(supervisor.port).startswith(b"HTTP/1.1 200 OK") for _ in range(4))
+        finally:
+            supervisor.stop()
+        assert not supervisor.pids
+
+    def _zombies(self) -> list:
+        zombies = []
+        for entry in os.listdir("/proc"):
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    fields = stat.read().rsplit(")", 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            if fields[0] == "Z" and int(fields[1]) == os.getpid():
+                zombies.append(int(entry))
+        return zombies
+
+    def test_trabajador_que_no_arranca_no_tumba_al_supervisor(self):
+        server = Server(compiled=True)
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+        supervisor = PreforkServer(server, port=0, workers=1, restart_delay=0.05)
+
+        async def broken(ready_write):
+            raise RuntimeError("configuración inválida")
+
+        supervisor._run_worker = broken
+        supervisor.start()
+        try:
+            assert not supervisor.pids
+            assert supervisor.failures == 1
+            assert self._zombies() == []
+            # En plena espera no se reintenta; tras ella, fallo de nuevo con espera doble
+            assert supervisor.reap() == 0 and supervisor.failures == 1
+            time.sleep(0.06)
+            assert supervisor.reap() == 0 and supervisor.failures == 2
+
+            del supervisor._run_worker
+            time.sleep(0.11)
+            assert supervisor.reap() == 1
+            assert len(supervisor.pids) == 1 and supervisor.failures == 0
+            assert self._get(supervisor.port).startswith(b"HTTP/1.1 200 OK")
+        finally:
+            supervisor.stop()
+        assert self._zombies() == []
+
+
+class TestOrderSerialization:
+
+    @pytest.fixture
+    def service(self):
+        return OrderService(InMemoryOrderRepository([
+            Order(id=str(i), user_id="user1", items=["Pizza", "Soda"], total=10.0 + i,
+                  created_at=datetime(2024, 1, 1, 12, 0, i))
+            for i in range(5)
+        ]))
+
+    @pytest.fixture
+    def request_user(self):
+        request = Request(method="GET", path="/orders", headers={}, body={},
+                          ip_address="10.17.0.1", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="user1", password="x"))
+        return request
+
+    def test_get_order_es_json_serializable(self, service, request_user):
+        body = service._get_order(request_user, "1").body
+
+        assert body["order"]["status"] == "pending"
+        assert json.loads(serialization.encode_body(body)) == {"order": service.orders_db.get("1").to_json()}
+        assert json.loads(json.dumps(body, default=json_default))["order"]["status"] == "pending"
+
+    def test_bytes_cacheados_e_invalidados_al_mutar(self, service):
+        order = service.orders_db.get("2")
+        encoded = serialization.encode_order(order)
+
+        assert serialization.encode_order(order) is encoded
+        order.status = OrderStatus.COMPLETED
+        assert json.loads(serialization.encode_order(order))["status"] == "completed"
+
+    def test_bytes_invalidados_al_mutar_items_in_situ(self, service):
+        order = service.orders_db.get("2")
+        serialization.encode_order(order)
+
+        order.items.append("item9")
+        assert json.loads(serialization.encode_order(order))["items"][-1] == "item9"
+
+    def test_cache_de_bytes_acotada(self, monkeypatch):
+        monkeypatch.setattr(serialization, "ORDER_CACHE_SIZE", 2)
+        monkeypatch.setattr(serialization, "_orders", serialization.OrderedDict())
+        for i in range(5):
+            serialization.encode_order(Order(id=f"acotada-{i}", user_id="user1", items=[], total=1.0,
+                                             created_at=datetime(2024, 1, 1)))
+
+        assert list(serialization._orders) == ["acotada-3", "acotada-4"]
+
+    def test_listado_empalmado_igual_a_json(self, service, request_user, monkeypatch):
+        body = service._get_orders(request_user, limit=3).body
+        expected = json.loads(json.dumps(body, default=json_default))
+
+        assert json.loads(serialization.encode_body(body)) == expected
+        monkeypatch.setattr(serialization, "orjson", None)
+        service.orders_db.get("0").total = 99.5
+        assert json.loads(serialization.encode_body(body))["orders"][0]["total"] == 99.5
+
+
+class TestPrebuiltErrorResponses:
+
+    def _retained_bytes(self, handle, request, calls: int = 1000) -> float:
+        results = [None] * calls
+        handle(request)
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        for index in range(calls):
+            results[index] = handle(request)
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert all(result is results[0] for result in results)
+        assert results[0].shared
+        return (after - before) / calls
+
+    def test_rechazos_sin_asignaciones_retenidas(self, make_request):
+        now = [1000.0]
+        brute_force = BruteForceProtectionHandler(max_attempts=1, block_duration=60, clock=lambda: now[0])
+        brute_force.blocked_ips["10.19.0.9"] = 1030.0
+        forbidden = make_request(path="/admin/users")
+        forbidden.set_authenticated_user(User(username="user1", password="x"))
+
+        cases = [
+            (AuthenticationHandler(ExtractBasic()).handle, make_request(), StatusCode.UNAUTHORIZED),
+            (AuthorizationHandler().handle, make_request(), StatusCode.UNAUTHORIZED),
+            (AuthorizationHandler().handle, forbidden, StatusCode.FORBIDDEN),
+            (DataValidationHandler().handle, make_request(headers={"X": "<script>x</script>"}),
+             StatusCode.BAD_REQUEST),
+            (brute_force.handle, make_request(ip_address="10.19.0.9"), StatusCode.TOO_MANY_REQUESTS),
+        ]
+        for handle, request, status_code in cases:
+            assert handle(request).status_code == status_code
+            assert self._retained_bytes(handle, request) < 8
+
+    def test_respuestas_compartidas_inmutables_y_copia_al_escribir(self):
+        blocked = BruteForceProtectionHandler(clock=lambda: 1000.0)._blocked_response(30)
+
+        with pytest.raises(TypeError):
+            blocked.body["retry_after"] = 0
+        with pytest.raises(TypeError):
+            blocked.headers["Retry-After"] = "0"
+
+        copy = blocked.with_header("X-Trace", "1")
+        assert copy is not blocked and not copy.shared
+        assert copy.headers == {"Retry-After": "30", "X-Trace": "1"}
+        assert "X-Trace" not in blocked.headers
+
+        response = Response(status_code=StatusCode.OK, headers={}, body={})
+        assert response.headers is DEFAULT_HEADERS
+        assert response.with_header("ETag", '"1"') is response
+        assert response.headers == {"Content-Type": "application/json", "ETag": '"1"'}
+        assert DEFAULT_HEADERS == {"Content-Type": "application/json"}
+
+
+class TestInstrumentation:
+
+    @pytest.fixture
+    def server(self):
+        server = Server(compiled=True)
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+        server.add_middleware(CacheHandler())
+        server.add_middleware(AuthorizationHandler())
+        return server
+
+    def test_histogramas_cortocircuitos_y_aciertos(self, server, make_request):
+        instrumentation = server.enable_instrumentation()
+
+        server.process_request(make_request("POST", body={"items": ["Pizza"], "total": 5.0},
+                                            credentials=("user1", "password123")))
+        server.process_request(make_request(credentials=("user1", "password123")))
+        assert server.process_request(make_request(credentials=("user1", "password123"))).is_from_cache
+        assert server.process_request(make_request(credentials=("user1", "mala"))).status_code == StatusCode.UNAUTHORIZED
+
+        snapshot = instrumentation.snapshot()
+        handlers = snapshot["handlers"]
+        assert snapshot["requests"] == 4
+        assert snapshot["cache_hit_ratio"] == 0.25
+        assert handlers["AuthenticationHandler"]["short_circuits"] == {401: 1}
+        assert handlers["CacheHandler"]["short_circuits"] == {200: 1}
+        assert handlers["CacheHandler"]["cache_hits"] == 1
+        assert handlers["OrderController"]["calls"] == 2
+        assert handlers["OrderController"]["short_circuits"] == {}
+        authentication = handlers["AuthenticationHandler"]
+        assert authentication["inclusive"]["count"] == 4
+        assert authentication["inclusive"]["p99_ms"] >= authentication["self"]["p50_ms"] > 0
+
+    def test_gancho_de_spans(self, server, make_request):
+        spans = []
+
+        class Span:
+            def __init__(self, name, attributes):
+                self.name, self.attributes = name, dict(attributes)
+
+            def set_attribute(self, key, value):
+                self.attributes[key] = value
+
+        @contextlib.contextmanager
+        def start_span(name, attributes=None):
+            span = Span(name, attributes)
+            yield span
+            spans.append(span)
+
+        server.enable_instrumentation(Instrumentation(span_hook=start_span))
+        server.process_request(make_request(credentials=("user1", "mala")))
+
+        assert [span.name for span in spans] == ["AuthenticationHandler"]
+        assert spans[0].attributes == {"http.method": "GET", "http.target": "/orders",
+                                       "http.status_code": 401, "handler.short_circuit": True}
+
+    def test_desactivada_no_deja_envoltorios(self, server, make_request):
+        server.enable_instrumentation()
+        server.process_request(make_request(credentials=("user1", "password123")))
+        server.disable_instrumentation()
+        server.process_request(make_request(credentials=("user1", "password123")))
+
+        for handler in server.middlewares + [server.controller]:
+            assert "handle" not in vars(handler)
+        assert server._pipeline.__func__ is AuthenticationHandler.handle
+
+
+class TestThreadedServer:
+
+    @pytest.fixture(autouse=True)
+    def frequent_switches(self):
+        # Cambios de hilo muy frecuentes para que afloren las condiciones de carrera
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        yield
+        sys.setswitchinterval(interval)
+
+    def _run_threads(self, target, threads: int = 8):
+        workers = [threading.Thread(target=target, args=(index,)) for index in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def test_sin_ordenes_perdidas(self):
+        server = ThreadedServer(max_workers=8)
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+        server.add_middleware(CacheHandler())
+        server.add_middleware(AuthorizationHandler())
+        repository = server.controller.order_service.orders_db
+        initial = len(repository)
+
+        def request(index: int) -> Request:
+            username, password = (("user1", "password123"), ("user2", "mypassword"))[index % 2]
+            return Request(method="POST" if index % 4 else "GET", path="/orders", headers={},
+                           body={"items": [f"item{index}"], "total": 1.0 + index},
+                           ip_address="10.21.0.1", timestamp=datetime.now(),
+                           user_credentials={"username": username, "password": password})
+
+        for index in range(2):
+            server.process_request(request(index + 1))
+        responses = list(server.map(request(index) for index in range(2000)))
+        server.shutdown()
+
+        created = [response.body["order"]["id"] for response in responses
+                   if response.status_code == StatusCode.CREATED]
+        assert all(response.status_code in (StatusCode.OK, StatusCode.CREATED) for response in responses)
+        assert len(created) == 1500
+        assert len(repository) == initial + 2 + 1500
+        assert all(order_id in repository for order_id in created)
+        assert len(list(repository.all())) == len(repository)
+
+    def test_contadores_sin_corromper(self):
+        brute_force = BruteForceProtectionHandler(max_attempts=1000, block_duration=60)
+        brute_force.set_next(TestBruteForceLimiter.Reject())
+        cache = LRUCache(max_entries=50)
+
+        def hammer(index: int):
+            for attempt in range(100):
+                brute_force.handle(Request(method="POST", path="/orders", headers={}, body={},
+                                           ip_address="10.21.1.1", timestamp=datetime.now()))
+                brute_force.handle(Request(method="POST", path="/orders", headers={}, body={},
+                                           ip_address=f"10.21.2.{index * 100 + attempt}",
+                                           timestamp=datetime.now()))
+                cache.set((index, attempt % 60), attempt)
+                cache.get((index, attempt % 70))
+
+        self._run_threads(hammer)
+
+        ring = brute_force.failed_attempts["10.21.1.1"]
+        assert sum(1 for timestamp in ring.times if timestamp != float("-inf")) == 800
+        assert "10.21.1.1" not in brute_force.blocked_ips
+        assert len(brute_force.failed_attempts) == 801
+        stats = cache.stats()
+        assert stats["hits"] + stats["misses"] == 800
+        assert stats["entries"] == len(cache) <= 50
+
+
+class TestCacheCoalescing:
+
+    class SlowController(RequestHandler):
+        def __init__(self, delay: float = 0.05):
+            super().__init__()
+            self.delay = delay
+            self.calls = 0
+
+        def handle(self, request):
+            self.calls += 1
+            time.sleep(self.delay)
+            return Response(status_code=StatusCode.OK, headers={}, body={"version": self.calls})
+
+    class SlowAsyncController(AsyncRequestHandler):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        async def handle(self, request):
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return Response(status_code=StatusCode.OK, headers={}, body={"version": self.calls})
+
+    class Clock:
+        def __init__(self):
+            self.now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+    def test_fallos_concurrentes_llaman_una_vez(self, make_request):
+        handler = CacheHandler()
+        controller = self.SlowController()
+        handler.set_next(controller)
+        barrier = threading.Barrier(16)
+        responses = []
+
+        def worker():
+            barrier.wait()
+            responses.append(handler.handle(make_request(user="user1")))
+
+        workers = [threading.Thread(target=worker) for _ in range(16)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        assert controller.calls == 1
+        assert handler.stats()["coalesced"] == 15
+        assert all(response.body == {"version": 1} for response in responses)
+        # Cada petición recibe su propio objeto: nadie comparte el cuerpo mutable
+        assert len({id(response) for response in responses}) == 16
+
+    def test_fallos_concurrentes_en_servidor_asincrono(self, make_request):
+        server = AsyncServer(controller=self.SlowAsyncController())
+        cache = CacheHandler()
+        server.add_middleware(cache)
+
+        async def run_all():
+            return await asyncio.gather(*(server.process_request(make_request(user="user1")) for _ in range(20)))
+
+        responses = asyncio.run(run_all())
+        server.shutdown()
+
+        assert server.controller.calls == 1
+        assert cache.stats()["coalesced"] == 19
+        assert all(response.status_code == StatusCode.OK for response in responses)
+
+    def test_error_se_propaga_a_los_que_esperan(self, make_request):
+        handler = CacheHandler()
+
+        class Failing(RequestHandler):
+            def handle(self, request):
+                time.sleep(0.05)
+                raise RuntimeError("caído")
+
+        handler.set_next(Failing())
+        errors = []
+
+        def worker():
+            try:
+                handler.handle(make_request(user="user1"))
+            except RuntimeError as error:
+                errors.append(error)
+
+        workers = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        assert len(errors) == 4
+        assert handler.flights.in_flight() == 0
+
+    def test_espera_acotada_si_el_lider_se_atasca(self):
+        flights = SingleFlight(wait_timeout=0.05)
+        release = threading.Event()
+        results = []
+        leader = threading.Thread(target=lambda: results.append(
+            flights.do("k", lambda: release.wait(5) and "lider")))
+        leader.start()
+        while not flights.in_flight():
+            time.sleep(0.001)
+
+        assert flights.do("k", lambda: "propio") == ("propio", False)
+        assert flights.timeouts == 1
+        release.set()
+        leader.join()
+        assert results == [("lider", False)]
+
+    def test_sirve_caducado_y_revalida_una_vez(self, make_request):
+        clock = self.Clock()
+        handler = CacheHandler(cache_duration=10, stale_grace=30, clock=clock)
+        controller = self.SlowController(delay=0.05)
+        handler.set_next(controller)
+
+        assert handler.handle(make_request(user="user1")).body == {"version": 1}
+        clock.now += 15
+
+        stale = [handler.handle(make_request(user="user1")) for _ in range(5)]
+        handler._revalidate_executor.shutdown(wait=True)
+
+        assert all(response.is_from_cache and response.body == {"version": 1} for response in stale)
+        assert controller.calls == 2
+        assert handler.handle(make_request(user="user1")).body == {"version": 2}
+        stats = handler.stats()
+        assert stats["stale_served"] == 5
+        assert stats["revalidations"] == 1
+
+    def test_sin_gracia_la_entrada_caducada_es_un_fallo(self, make_request):
+        clock = self.Clock()
+        handler = CacheHandler(cache_duration=10, clock=clock)
+        controller = self.SlowController(delay=0)
+        handler.set_next(controller)
+
+        handler.handle(make_request(user="user1"))
+        clock.now += 10
+        response = handler.handle(make_request(user="user1"))
+
+        assert not response.is_from_cache
+        assert controller.calls == 2
+        assert handler.stats()["stale_served"] == 0
+
+    def test_caducado_en_backend_compartido(self, make_request):
+        clock = self.Clock()
+        backend = InMemoryStateBackend()
+        handler = CacheHandler(cache_duration=10, stale_grace=30, clock=clock, state_backend=backend)
+        controller = self.SlowController(delay=0)
+        handler.set_next(controller)
+
+        handler.handle(make_request(user="user1"))
+        clock.now += 15
+        response = handler.handle(make_request(user="user1"))
+        handler._revalidate_executor.shutdown(wait=True)
+
+        assert response.is_from_cache and response.body == {"version": 1}
+        assert handler.handle(make_request(user="user1")).body == {"version": 2}
+
+
+class TestCacheInvalidation:
+
+    def test_importar_servicios_primero_no_crea_ciclo(self):
+        result = subprocess.run([sys.executable, "-c", "import src.services.auth_service"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True)
+
+        assert result.returncode == 0, result.stderr.decode()
+
+    def _server(self) -> Server:
+        server = Server()
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+        server.add_middleware(AuthorizationHandler())
+        server.add_middleware(CacheHandler(cache_duration=3600))
+        return server
+
+    def test_crear_orden_invalida_el_listado_del_usuario(self, make_request):
+        server = self._server()
+        list_user1 = lambda: server.process_request(make_request(credentials=("user1", "password123")))
+        list_user2 = lambda: server.process_request(make_request(credentials=("user2", "mypassword")))
+
+        before = list_user1()
+        list_user2()
+        assert list_user1().is_from_cache
+        server.process_request(make_request("POST", body={"items": ["Pizza"], "total": 10.0},
+                                            credentials=("user1", "password123")))
+
+        after = list_user1()
+        assert not after.is_from_cache
+        assert after.body["count"] == before.body["count"] + 1
+        assert list_user2().is_from_cache
+
+    def test_borrar_orden_invalida_orden_dueño_y_administradores(self, make_request):
+        server = self._server()
+        admin = lambda method, path: server.process_request(
+            make_request(method, path, credentials=("admin", "admin123")))
+        owner = lambda path: server.process_request(make_request("GET", path, credentials=("user1", "password123")))
+
+        admin("GET", "/orders")
+        owner("/orders")
+        owner("/orders/1")
+        owner("/orders/3")
+        assert admin("DELETE", "/orders/1").status_code == StatusCode.OK
+
+        assert owner("/orders/1").status_code == StatusCode.NOT_FOUND
+        assert owner("/orders/3").is_from_cache
+        listing = owner("/orders")
+        assert not listing.is_from_cache
+        assert [order["id"] for order in listing.body["orders"]] == ["3"]
+        assert not admin("GET", "/orders").is_from_cache
+        assert server.middlewares[-1].stats()["invalidations"] == 3
+
+    def test_escritura_durante_la_consulta_no_deja_entrada_vigente(self):
+        handler = CacheHandler()
+
+        class WriteWhileReading(RequestHandler):
+            def handle(self, request):
+                handler.invalidate_tags(["user:user1"])
+                return Response(status_code=StatusCode.OK, headers={}, body={})
+
+        handler.set_next(WriteWhileReading())
+        request = Request(method="GET", path="/orders", headers={}, body={},
+                          ip_address="10.23.0.2", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="user1", password="x"))
+
+        handler.handle(request)
+
+        assert not handler.handle(request).is_from_cache
+
+    def test_invalidacion_compartida_entre_workers(self):
+        backend = InMemoryStateBackend()
+        first, second = CacheHandler(state_backend=backend), CacheHandler(state_backend=backend)
+        first.set_next(OrderController())
+        request = Request(method="GET", path="/orders", headers={}, body={},
+                          ip_address="10.23.0.3", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="user1", password="x"))
+
+        first.handle(request)
+        assert second.handle(request).is_from_cache
+        first.invalidate_tags(["user:user1"])
+
+        assert second._get_from_cache(second._generate_cache_key(request)) is None
+
+
+    def test_versiones_de_etiquetas_caducan(self):
+        now = [1000.0]
+        handler = CacheHandler(cache_duration=10, stale_grace=5, clock=lambda: now[0])
+        handler.invalidate_tags(["order:1"])
+        before = handler._current_versions(("order:1",))
+
+        now[0] += 16
+        handler.invalidate_tags(["order:2"])
+
+        assert list(handler._tag_versions) == ["order:2"]
+        assert handler._current_versions(("order:1",)) != before
+        handler.invalidate_tags(["order:1"])
+        assert handler._current_versions(("order:1",)) != before
+
+    def test_etag_anterior_a_una_invalidacion_caducada_no_coincide(self):
+        now = [1000.0]
+        handler = CacheHandler(cache_duration=10, clock=lambda: now[0])
+        etag = handler._etag("k", handler._current_versions(("user:user1",)))
+
+        handler.invalidate_tags(["user:user1"])
+        now[0] += 11
+        handler.invalidate_tags(["order:9"])
+
+        assert "user:user1" not in handler._tag_versions
+        assert handler._etag("k", handler._current_versions(("user:user1",))) != etag
+
+    def test_versiones_en_backend_con_caducidad(self):
+        now = [1000.0]
+        backend = InMemoryStateBackend(clock=lambda: now[0])
+        handler = CacheHandler(cache_duration=10, state_backend=backend, clock=lambda: now[0])
+        handler.invalidate_tags(["order:1"])
+
+        assert backend.get("tag:order:1") is not None
+        now[0] += 11
+        assert backend.get("tag:order:1") is None
+
+
+class TestConditionalGet:
+
+    class CountingController(OrderController):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        def handle(self, request):
+            self.calls += 1
+            return super().handle(request)
+
+    @pytest.fixture
+    def server(self) -> Server:
+        server = Server()
+        server.controller = self.CountingController()
+        server.add_middleware(AuthenticationHandler(ExtractBasic()))
+        server.add_middleware(AuthorizationHandler())
+        server.add_middleware(CacheHandler())
+        return server
+
+    def _get(self, server, etag=None, username="user1", password="password123", path="/orders") -> Response:
+        return server.process_request(Request(
+            method="GET", path=path, headers={"If-None-Match": etag} if etag else {}, body={},
+            ip_address="10.24.0.1", timestamp=datetime.now(),
+            user_credentials={"username": username, "password": password}))
+
+    def test_etag_coincidente_devuelve_304_sin_controlador(self, server):
+        etag = self._get(server).headers["ETag"]
+        calls = server.controller.calls
+
+        response = self._get(server, etag)
+
+        assert response.status_code == StatusCode.NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+        assert server.controller.calls == calls
+        assert self._get(server, f'"otro", {etag[2:]}').status_code == StatusCode.NOT_MODIFIED
+        assert server.middlewares[-1].stats()["not_modified"] == 2
+
+    def test_escritura_cambia_el_etag(self, server):
+        etag = self._get(server).headers["ETag"]
+        server.process_request(Request(
+            method="POST", path="/orders", headers={}, body={"items": ["Pizza"], "total": 10.0},
+            ip_address="10.24.0.1", timestamp=datetime.now(),
+            user_credentials={"username": "user1", "password": "password123"}))
+
+        response = self._get(server, etag)
+
+        assert response.status_code == StatusCode.OK
+        assert response.headers["ETag"] != etag
+
+    def test_etag_distinto_por_usuario(self, server):
+        etag = self._get(server).headers["ETag"]
+
+        response = self._get(server, etag, username="user2", password="mypassword")
+
+        assert response.status_code == StatusCode.OK
+        assert response.headers["ETag"] != etag
+
+    def test_asterisco_solo_si_existe_la_representacion(self, server):
+        assert self._get(server, "*", path="/orders/1").status_code == StatusCode.NOT_MODIFIED
+        assert self._get(server, "*", path="/orders/1").status_code == StatusCode.NOT_MODIFIED
+        assert self._get(server, "*", path="/orders/999").status_code == StatusCode.NOT_FOUND
+        assert self._get(server, "*", path="/orders/2").status_code == StatusCode.FORBIDDEN
+
+    def test_sin_bus_de_invalidacion_no_hay_etag(self):
+        handler = CacheHandler()
+        handler.set_next(OrderController())
+        request = Request(method="GET", path="/orders", headers={"If-None-Match": "*"}, body={},
+                          ip_address="10.24.0.2", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="user1", password="x"))
+
+        response = handler.handle(request)
+
+        assert response.status_code == StatusCode.OK
+        assert "ETag" not in response.headers
+
+    def test_304_se_serializa_sin_cuerpo(self):
+        response = Response(status_code=StatusCode.NOT_MODIFIED, headers={"ETag": 'W/"x"'}, body={})
+
+        raw = serialize_response(response, keep_alive=True)
+
+        assert raw.startswith(b"HTTP/1.1 304 Not Modified\r\n")
+        assert raw.endswith(b"\r\n\r\n")
+        assert b"Content-Length" not in raw
+
+
+class TestCompression:
+
+    @pytest.fixture
+    def chain(self):
+        compression, cache = CompressionHandler(min_size=512, use_zstd=False), CacheHandler()
+        controller = OrderController(OrderService(InMemoryOrderRepository(
+            Order(id=str(i), user_id="user1", items=["item1", "item2"], total=10.0,
+                  created_at=datetime(2024, 1, 1, 12, 0, i % 60))
+            for i in range(50)
+        )))
+        compression.set_next(cache)
+        cache.set_next(controller)
+        return compression, cache
+
+    def _get(self, handler, accept_encoding=None, path="/orders") -> Response:
+        request = Request(method="GET", path=path,
+                          headers={"Accept-Encoding": accept_encoding} if accept_encoding else {},
+                          body={}, ip_address="10.25.0.1", timestamp=datetime.now())
+        request.set_authenticated_user(User(username="admin", password="x", is_admin=True))
+        return handler.handle(request)
+
+    def test_comprime_con_gzip_cuerpos_grandes(self, chain):
+        compression, _ = chain
+
+        response = self._get(compression, "gzip, deflate")
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert json.loads(gzip.decompress(response.payload))["count"] == 50
+        assert len(response.payload) < len(serialization.encode_body(response.body)) / 4
+
+    def test_cuerpos_pequeños_y_clientes_sin_compresion(self, chain):
+        compression, _ = chain
+
+        small = self._get(compression, "gzip", path="/orders/1")
+        plain = self._get(compression)
+
+        assert "Content-Encoding" not in small.headers
+        assert "Content-Encoding" not in plain.headers
+        assert json.loads(plain.payload)["count"] == 50
+
+    def test_aciertos_de_cache_sirven_variantes_precomprimidas(self, chain):
+        compression, cache = chain
+
+        first = self._get(compression, "gzip")
+        second = self._get(compression, "gzip")
+        plain = self._get(compression)
+
+        assert second.is_from_cache
+        assert second.payload is first.payload
+        assert second.headers["Content-Encoding"] == "gzip"
+        assert "Content-Encoding" not in plain.headers
+        assert compression.compressed == 1
+        assert compression.precompressed_hits == 1
+
+    def test_variantes_cuentan_en_el_tamano_de_la_cache(self, chain):
+        compression, cache = chain
+        gzipped = self._get(compression, "gzip").payload
+        stored = next(iter(cache.cache._entries.values())).value[0]
+        body_size = cache._estimate_size(stored)
+
+        assert cache.cache.current_bytes == body_size + len(gzipped)
+        plain = self._get(compression).payload
+        self._get(compression, "gzip")
+        assert cache.cache.current_bytes == body_size + len(gzipped) + len(plain)
+
+    def test_variantes_respetan_max_bytes(self):
+        class Listing(RequestHandler):
+            def handle(self, request):
+                return Response(status_code=StatusCode.OK, headers={}, body={"orders": ["x" * 100] * 20})
+
+        cache = CacheHandler(max_bytes=3000)
+        cache.set_next(Listing())
+        compression = CompressionHandler(min_size=10_000, use_zstd=False)
+        compression.set_next(cache)
+
+        self._get(compression)
+
+        # Cuerpo (~2 KB) más su variante sin comprimir superan max_bytes: la entrada no puede quedarse
+        assert cache.stats()["evictions"] == 1
+        assert cache.cache.current_bytes == 0
+
+    def test_contadores_exactos_con_hilos_concurrentes(self, chain):
+        compression, _ = chain
+        self._get(compression, "gzip")
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            workers = [threading.Thread(target=lambda: [self._get(compression, "gzip") for _ in range(50)])
+                       for _ in range(8)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        assert compression.compressed == 1
+        assert compression.precompressed_hits == 400
+
+    def test_negociacion_por_calidad(self):
+        handler = CompressionHandler(use_zstd=False)
+
+        assert handler.negotiate("zstd, gzip;q=0.5") == "gzip"
+        assert handler.negotiate("gzip;q=0, *;q=0.3") is None
+        assert handler.negotiate("br, *") == "gzip"
+        assert handler.negotiate("identity") is None
+
+    def test_serializa_el_cuerpo_precomprimido(self, chain):
+        compression, _ = chain
+        response = self._get(compression, "gzip")
+
+        raw = serialize_response(response, keep_alive=False)
+
+        assert b"Content-Encoding: gzip\r\n" in raw
+        assert raw.endswith(b"\r\n\r\n" + response.payload)
+        assert b"Content-Length: %d\r\n" % len(response.payload) in raw
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])